@@ -3,7 +3,7 @@ import re
 from multiprocessing import Pool
 from os import listdir
 from os.path import isdir, isfile, join
-from typing import AnyStr, Callable, Dict, Generator, List, Union
+from typing import AnyStr, BinaryIO, Callable, Dict, Generator, List, Tuple, Union
 
 import numpy as np
 import requests
@@ -34,7 +34,7 @@ def download_from_url(
     with tqdm(total=file_size, initial=0, unit="B", unit_scale=True) as progressbar:
         req = requests.get(url, stream=True)
         req.encoding = "utf-8"
-        with (open(destination_filepath, "ab")) as f:
+        with open(destination_filepath, "ab") as f:
             for chunk in req.iter_content(chunk_size=chunk_size):
                 if chunk:
                     f.write(chunk)
@@ -191,6 +191,110 @@ def text_files_total_line_count(filepaths: List[str]) -> int:
     return total
 
 
+def get_text_files_shards(
+    filepaths: List[str], shard_size: int = 64 * 1024 * 1024
+) -> List[Tuple[str, int, int]]:
+    """
+    Splits text files into byte-range shards of (at most) `shard_size` bytes. The
+    text files can be on any filesystem supported by `tf.io.gfile` (e.g. gs://).
+
+    The shards are nominal byte ranges; a line belongs to the shard its first byte
+    is in (see `read_text_file_shard`).
+
+    Parameters
+    ----------
+    filepaths : list of str
+        Filepaths of text files to split into shards.
+    shard_size : int, optional
+        Size of each shard in bytes (defaults to 64 MiB).
+
+    Returns
+    -------
+    shards : list of tuple of str, int and int
+        List of shards, each consisting of a filepath and the start (inclusive) and
+        end (exclusive) byte offsets of the shard.
+    """
+    import tensorflow as tf
+
+    shards = []
+    for filepath in filepaths:
+        file_size = tf.io.gfile.stat(filepath).length
+        for start in range(0, max(file_size, 1), shard_size):
+            shards.append((filepath, start, min(start + shard_size, file_size)))
+    return shards
+
+
+def _text_file_line_offset(file: BinaryIO, offset: int) -> int:
+    """
+    Gets the offset of the first line starting at or after a byte offset in a file
+    (used in `read_text_file_shard`).
+
+    Parameters
+    ----------
+    file : BinaryIO
+        Text file opened in binary mode (e.g. a `tf.io.gfile.GFile`).
+    offset : int
+        Byte offset in the file.
+
+    Returns
+    -------
+    line_offset : int
+        Byte offset of the first line starting at or after `offset`.
+    """
+    if offset == 0:
+        return 0
+    file.seek(offset - 1)
+    file.readline()
+    return file.tell()
+
+
+def read_text_file_shard(
+    filepath: str, start: int, end: int, block_size: int = 1024 * 1024
+) -> Generator[str, None, None]:
+    """
+    Reads the lines of a byte-range shard of a text file (see
+    `get_text_files_shards`) in blocks of (roughly) `block_size` bytes.
+
+    A shard contains the lines starting in the byte range [start, end), such that
+    the shards of a file contain each of its lines exactly once. The text file is
+    read using `tf.io.gfile.GFile`, such that it can be on any filesystem supported
+    by TensorFlow (e.g. gs://).
+
+    Parameters
+    ----------
+    filepath : str
+        Filepath of text file to read.
+    start : int
+        Start byte offset of the shard (inclusive).
+    end : int
+        End byte offset of the shard (exclusive).
+    block_size : int, optional
+        Number of bytes to read at a time (defaults to 1 MiB).
+
+    Yields
+    ------
+    text_block : str
+        Block of (complete) lines of the shard.
+    """
+    import tensorflow as tf
+
+    with tf.io.gfile.GFile(filepath, "rb") as file:
+        start = _text_file_line_offset(file, start)
+        end = _text_file_line_offset(file, end)
+        file.seek(start)
+        remaining_bytes = end - start
+        while remaining_bytes > 0:
+            block = file.read(min(block_size, remaining_bytes))
+            remaining_bytes -= len(block)
+
+            # Read the rest of the last line of the block
+            if remaining_bytes > 0 and not block.endswith(b"\n"):
+                block_rest = file.readline()
+                remaining_bytes -= len(block_rest)
+                block += block_rest
+            yield block.decode("utf-8")
+
+
 def get_all_filepaths(file_dir: str, file_ext: str) -> List[str]:
     """
     Gets all paths of files of a specific file extension in a directory.
@@ -0,0 +1,121 @@
+import argparse
+import sys
+from os import makedirs
+from os.path import basename, join
+
+from word2phrase import load_phrase_model
+
+sys.path.append("..")
+
+from utils import get_all_filepaths  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses arguments sent to the python script.
+
+    Returns
+    -------
+    parsed_args : argparse.Namespace
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--phrase_model_filepath",
+        type=str,
+        default="",
+        help="Filepath of the phrase model saved by train_word2phrase.py",
+    )
+    parser.add_argument(
+        "--text_data_filepath",
+        type=str,
+        default="",
+        help="Text filepath containing the text we wish to replace phrases in",
+    )
+    parser.add_argument(
+        "--text_data_dir",
+        type=str,
+        default="",
+        help="Directory containing text files we wish to replace phrases in",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output",
+        help="Output directory to save the new text data files",
+    )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=-1,
+        help="Number of worker processes to replace phrases in. Defaults to use all "
+        "CPUs",
+    )
+    return parser.parse_args()
+
+
+def apply_word2phrase(
+    phrase_model_filepath: str,
+    text_data_filepath: str,
+    text_data_dir: str,
+    output_dir: str,
+    num_workers: int,
+) -> None:
+    """
+    Applies a phrase model trained using word2phrase to a given set of text data
+    files, i.e. replaces phrases with single words. Saves output to the output
+    directory.
+
+    Parameters
+    ----------
+    phrase_model_filepath : str
+        Filepath of the phrase model.
+    text_data_filepath : str
+        Text filepath containing the text we wish to replace phrases in.
+    text_data_dir : str
+        Directory containing text files we wish to replace phrases in.
+    output_dir : str
+        Output directory to save the new text data files.
+    num_workers : int
+        Number of worker processes to replace phrases in.
+    """
+    if (
+        text_data_filepath == ""
+        and text_data_dir == ""
+        or (text_data_filepath != "" and text_data_dir != "")
+    ):
+        raise ValueError(
+            "Either text_data_filepath or text_data_dir has to be specified."
+        )
+
+    if text_data_filepath != "":
+        text_data_filepaths = [text_data_filepath]
+    else:
+        text_data_filepaths = get_all_filepaths(text_data_dir, ".txt")
+
+    # Load phrase model
+    phrase_model = load_phrase_model(phrase_model_filepath)
+    print(f"Loaded phrase model with {phrase_model.num_epochs} epochs")
+
+    # Replace phrases in each text data file
+    makedirs(output_dir, exist_ok=True)
+    for filepath in text_data_filepaths:
+        output_filepath = join(output_dir, basename(filepath))
+        print(f"{filepath} --> {output_filepath}")
+        num_lines = phrase_model.apply_file(
+            input_filepath=filepath,
+            output_filepath=output_filepath,
+            num_workers=num_workers,
+        )
+        print(f"Done, {num_lines} lines!")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    apply_word2phrase(
+        phrase_model_filepath=args.phrase_model_filepath,
+        text_data_filepath=args.text_data_filepath,
+        text_data_dir=args.text_data_dir,
+        output_dir=args.output_dir,
+        num_workers=args.num_workers,
+    )
@@ -0,0 +1,191 @@
+import os
+import queue
+import shutil
+import threading
+from os.path import dirname, isdir, join
+from typing import BinaryIO, Callable, Optional
+
+
+def write_file_atomic(
+    target_filepath: str, write_fn: Callable[[BinaryIO], None]
+) -> None:
+    """
+    Writes a file atomically, by first writing to a temporary file in the same
+    directory, flushing it to disk (fsync) and then renaming it to the target
+    filepath. Readers of `target_filepath` will never see a partially written file.
+
+    Parameters
+    ----------
+    target_filepath : str
+        Where to write the file to.
+    write_fn : Callable[[BinaryIO], None]
+        Function which writes the contents of the file to a binary file object.
+    """
+    target_dir = dirname(target_filepath) or "."
+    tmp_filepath = f"{target_filepath}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_filepath, "wb") as tmp_file:
+            write_fn(tmp_file)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_filepath, target_filepath)
+    except BaseException:
+        if os.path.exists(tmp_filepath):
+            os.remove(tmp_filepath)
+        raise
+
+    # Ensure the rename itself is persisted
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(target_dir, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+def write_dir_atomic(target_dir: str, write_fn: Callable[[str], None]) -> None:
+    """
+    Writes a directory atomically, by first writing its files to a temporary
+    directory next to it, flushing them to disk (fsync) and then renaming it to the
+    target directory. Readers of `target_dir` will never see a partially written
+    directory.
+
+    If the target directory exists, it is first renamed to a side name, and only
+    removed once the new directory is in place. If interrupted in between, the
+    previous directory is thus kept at `{target_dir}.old`.
+
+    Parameters
+    ----------
+    target_dir : str
+        Where to write the directory to.
+    write_fn : Callable[[str], None]
+        Function which writes the files of the directory to a (temporary) directory.
+    """
+    tmp_dir = f"{target_dir}.{os.getpid()}.{threading.get_ident()}.tmp"
+    old_dir = f"{target_dir}.old"
+    try:
+        os.makedirs(tmp_dir)
+        write_fn(tmp_dir)
+        for dirpath, _, filenames in os.walk(tmp_dir):
+            for filename in filenames:
+                with open(join(dirpath, filename), "rb") as tmp_file:
+                    os.fsync(tmp_file.fileno())
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    # Move the previous directory aside (removing any leftover of an earlier
+    # interrupted write), such that it is only removed once replaced
+    if os.path.exists(target_dir):
+        if isdir(old_dir):
+            shutil.rmtree(old_dir)
+        os.replace(target_dir, old_dir)
+    os.replace(tmp_dir, target_dir)
+
+    # Ensure the renames themselves are persisted before removing the previous
+    # directory
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(dirname(target_dir) or ".", os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    if isdir(old_dir):
+        shutil.rmtree(old_dir)
+    elif os.path.exists(old_dir):
+        os.remove(old_dir)
+
+
+class BackgroundWriter:
+    """
+    Writes files to disk in a background thread, using a bounded queue of pending writes.
+    """
+
+    def __init__(self, max_pending_writes: int = 2) -> None:
+        """
+        Initializes the background writer and starts its thread.
+
+        Parameters
+        ----------
+        max_pending_writes : int, optional
+            Maximum number of pending writes in the queue (defaults to 2). Submitting
+            a write when the queue is full blocks until a pending write has finished,
+            which bounds the memory used by snapshots waiting to be written.
+        """
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending_writes)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        """
+        Runs write tasks from the queue until a `None` item is received.
+        """
+        while True:
+            task = self._queue.get()
+            try:
+                if task is None:
+                    return
+                if self._error is None:
+                    task()
+            except BaseException as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        """
+        Raises the first error which occurred in the background thread, if any.
+        """
+        if self._error is not None:
+            error = self._error
+            self._error = None
+            raise RuntimeError("Background write failed") from error
+
+    def submit(
+        self, target_filepath: str, write_fn: Callable[[BinaryIO], None]
+    ) -> None:
+        """
+        Submits a file to be written atomically in the background.
+
+        Parameters
+        ----------
+        target_filepath : str
+            Where to write the file to.
+        write_fn : Callable[[BinaryIO], None]
+            Function which writes the contents of the file to a binary file object.
+            Any data used by the function should be a snapshot, as it is called
+            while the caller continues.
+        """
+        self.submit_task(lambda: write_file_atomic(target_filepath, write_fn))
+
+    def submit_task(self, task: Callable[[], None]) -> None:
+        """
+        Submits a write task to be run in the background.
+
+        Parameters
+        ----------
+        task : Callable[[], None]
+            Write task to run, e.g. a call to `write_dir_atomic`. Any data used by the
+            task should be a snapshot, as it is called while the caller continues.
+        """
+        self._raise_error()
+        if not self._thread.is_alive():
+            raise RuntimeError("Background writer is closed")
+        self._queue.put(task)
+
+    def wait(self) -> None:
+        """
+        Waits for all pending writes to finish.
+        """
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        """
+        Waits for all pending writes to finish and stops the background thread.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._raise_error()
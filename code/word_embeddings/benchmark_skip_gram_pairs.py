@@ -0,0 +1,167 @@
+import argparse
+import sys
+from time import time
+from typing import Callable
+
+import tensorflow as tf
+
+sys.path.append("..")
+
+from word_embeddings.dataset import (  # noqa: E402
+    AUTOTUNE,
+    generate_skip_gram_pairs,
+    generate_skip_gram_pairs_while_loop,
+)
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses arguments sent to the python script.
+
+    Returns
+    -------
+    parsed_args : argparse.Namespace
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num_texts",
+        type=int,
+        default=10000,
+        help="Number of (synthetic) texts to generate skip-gram pairs from",
+    )
+    parser.add_argument(
+        "--min_text_length",
+        type=int,
+        default=2,
+        help="Minimum number of words in each text",
+    )
+    parser.add_argument(
+        "--max_text_length",
+        type=int,
+        default=50,
+        help="Maximum number of words in each text",
+    )
+    parser.add_argument(
+        "--vocab_size",
+        type=int,
+        default=100000,
+        help="Vocabulary size to sample word integers from",
+    )
+    parser.add_argument(
+        "--max_window_size",
+        type=int,
+        default=5,
+        help="Maximum window size to use when generating skip-gram pairs",
+    )
+    parser.add_argument(
+        "--n_runs",
+        type=int,
+        default=3,
+        help="Number of runs per skip-gram pairs generator (best run is reported)",
+    )
+    return parser.parse_args()
+
+
+def skip_gram_pairs_per_sec(
+    skip_gram_pairs_fn: Callable[[tf.Tensor, int], tf.Tensor],
+    texts: tf.RaggedTensor,
+    max_window_size: int,
+) -> float:
+    """
+    Measures the number of skip-gram target/context pairs generated per second
+    by a skip-gram pairs generator, using the same tf.data setup as `create_dataset`.
+
+    Parameters
+    ----------
+    skip_gram_pairs_fn : Callable[[tf.Tensor, int], tf.Tensor]
+        Skip-gram pairs generator function.
+    texts : tf.RaggedTensor
+        Ragged tensor of tokenized texts.
+    max_window_size : int
+        Maximum window size to use when generating skip-gram pairs.
+
+    Returns
+    -------
+    pairs_per_sec : float
+        Number of skip-gram pairs generated per second.
+    """
+    dataset = tf.data.Dataset.from_tensor_slices(texts)
+    dataset = dataset.map(
+        lambda word_indices: skip_gram_pairs_fn(word_indices, max_window_size),
+        num_parallel_calls=AUTOTUNE,
+    )
+    dataset = dataset.unbatch()
+    dataset = dataset.batch(4096)
+
+    num_pairs = 0
+    time_start = time()
+    for skip_gram_pairs_batch in dataset:
+        num_pairs += int(skip_gram_pairs_batch.shape[0])
+    time_spent = time() - time_start
+
+    return num_pairs / time_spent
+
+
+def benchmark_skip_gram_pairs(
+    num_texts: int,
+    min_text_length: int,
+    max_text_length: int,
+    vocab_size: int,
+    max_window_size: int,
+    n_runs: int,
+) -> None:
+    """
+    Benchmarks the vectorized skip-gram pairs generator against the tf.while_loop
+    based one and prints the number of pairs generated per second.
+
+    Parameters
+    ----------
+    num_texts : int
+        Number of (synthetic) texts to generate skip-gram pairs from.
+    min_text_length : int
+        Minimum number of words in each text.
+    max_text_length : int
+        Maximum number of words in each text.
+    vocab_size : int
+        Vocabulary size to sample word integers from.
+    max_window_size : int
+        Maximum window size to use when generating skip-gram pairs.
+    n_runs : int
+        Number of runs per skip-gram pairs generator (best run is reported).
+    """
+    # Create synthetic texts
+    text_lengths = tf.random.uniform(
+        [num_texts], minval=min_text_length, maxval=max_text_length + 1, dtype=tf.int32
+    )
+    word_indices = tf.random.uniform(
+        [tf.reduce_sum(text_lengths)], maxval=vocab_size, dtype=tf.int64
+    )
+    texts = tf.RaggedTensor.from_row_lengths(word_indices, text_lengths)
+    print(
+        f"Generating skip-gram pairs from {num_texts} texts "
+        f"({int(tf.size(word_indices))} words, max_window_size={max_window_size})"
+    )
+
+    skip_gram_pairs_fns = {
+        "while_loop": generate_skip_gram_pairs_while_loop,
+        "vectorized": generate_skip_gram_pairs,
+    }
+    for name, skip_gram_pairs_fn in skip_gram_pairs_fns.items():
+        best_pairs_per_sec = max(
+            skip_gram_pairs_per_sec(skip_gram_pairs_fn, texts, max_window_size)
+            for _ in range(n_runs)
+        )
+        print(f"- {name}: {best_pairs_per_sec:.0f} pairs/sec")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    benchmark_skip_gram_pairs(
+        num_texts=args.num_texts,
+        min_text_length=args.min_text_length,
+        max_text_length=args.max_text_length,
+        vocab_size=args.vocab_size,
+        max_window_size=args.max_window_size,
+        n_runs=args.n_runs,
+    )
@@ -0,0 +1,531 @@
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+from contextlib import redirect_stdout
+from os.path import join
+from time import time
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import tensorflow as tf
+
+sys.path.append("..")
+
+from word_embeddings.dataset import (  # noqa: E402
+    AUTOTUNE,
+    _examples_dataset,
+    _texts_dataset,
+    _word_indices_dataset,
+    create_dataset,
+)
+from word_embeddings.tokenizer import Tokenizer  # noqa: E402
+from word_embeddings.word2vec import Word2vec  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses arguments sent to the python script.
+
+    Returns
+    -------
+    parsed_args : argparse.Namespace
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--num_texts",
+        type=int,
+        default=20000,
+        help="Number of texts in the synthetic corpus",
+    )
+    parser.add_argument(
+        "--min_text_length",
+        type=int,
+        default=5,
+        help="Minimum number of words in each text",
+    )
+    parser.add_argument(
+        "--max_text_length",
+        type=int,
+        default=40,
+        help="Maximum number of words in each text",
+    )
+    parser.add_argument(
+        "--vocab_size",
+        type=int,
+        default=50000,
+        help="Number of unique words in the synthetic corpus",
+    )
+    parser.add_argument(
+        "--zipf_exponent",
+        type=float,
+        default=1.0,
+        help="Exponent of the Zipf distribution words are sampled from",
+    )
+    parser.add_argument(
+        "--min_word_count",
+        type=int,
+        default=5,
+        help="Minimum number of times a word might occur for it to be in the vocabulary",
+    )
+    parser.add_argument(
+        "--sampling_factor",
+        type=float,
+        default=1e-5,
+        help="Sampling factor to use when computing the probability of "
+        "keeping a word during random subsampling of words",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=256,
+        help="Batch size used for training",
+    )
+    parser.add_argument(
+        "--embedding_dim",
+        type=int,
+        default=300,
+        help="Number of latent dimensions to use in the embedding layers",
+    )
+    parser.add_argument(
+        "--max_window_size",
+        type=int,
+        default=5,
+        help="Maximum window size to use when generating skip-gram couples",
+    )
+    parser.add_argument(
+        "--num_negative_samples",
+        type=int,
+        default=10,
+        help="Number of negative samples to use when generating skip-gram couples",
+    )
+    parser.add_argument(
+        "--num_shared_negative_samples",
+        type=int,
+        default=0,
+        help="Number of negative samples to share among all target/context pairs "
+        "of a batch. Defaults to sample negative samples for each pair",
+    )
+    parser.add_argument(
+        "--training_mode",
+        type=str,
+        default="skip_gram",
+        choices=["skip_gram", "cbow"],
+        help="Training mode to benchmark. Either skip_gram (default) or cbow",
+    )
+    parser.add_argument(
+        "--steps_per_execution",
+        type=int,
+        default=1,
+        help="Number of training steps to run inside each call to the TensorFlow "
+        "training function",
+    )
+    parser.add_argument(
+        "--sparse_updates",
+        default=False,
+        action="store_true",
+        help="Whether or not to update the touched rows of the embedding matrices "
+        "in-place when training",
+    )
+    parser.add_argument(
+        "--output_filepath",
+        type=str,
+        default="",
+        help="Where to save the benchmark results (JSON). Defaults to print them",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Random seed to use when generating the synthetic corpus",
+    )
+    parser.add_argument(
+        "--cpu_only",
+        default=False,
+        action="store_true",
+        help="Whether or not to benchmark on the CPU only",
+    )
+    return parser.parse_args()
+
+
+def generate_zipf_corpus(
+    target_filepath: str,
+    num_texts: int,
+    min_text_length: int,
+    max_text_length: int,
+    vocab_size: int,
+    zipf_exponent: float,
+    seed: int = 0,
+) -> int:
+    """
+    Generates a synthetic corpus of texts, where the words are sampled from a
+    (truncated) Zipf distribution, and saves it to file, one text in each line.
+
+    Parameters
+    ----------
+    target_filepath : str
+        Where to save the corpus.
+    num_texts : int
+        Number of texts in the corpus.
+    min_text_length : int
+        Minimum number of words in each text.
+    max_text_length : int
+        Maximum number of words in each text.
+    vocab_size : int
+        Number of unique words to sample from.
+    zipf_exponent : float
+        Exponent of the Zipf distribution.
+    seed : int, optional
+        Random seed (defaults to 0).
+
+    Returns
+    -------
+    num_words : int
+        Number of words in the corpus.
+    """
+    rng = np.random.default_rng(seed)
+    word_probs = 1 / np.arange(1, vocab_size + 1) ** zipf_exponent
+    word_probs /= word_probs.sum()
+    words = np.array([f"w{i}" for i in range(vocab_size)])
+    text_lengths = rng.integers(min_text_length, max_text_length + 1, size=num_texts)
+    word_indices = rng.choice(vocab_size, size=text_lengths.sum(), p=word_probs)
+    text_offsets = np.concatenate(([0], np.cumsum(text_lengths)))
+    with open(target_filepath, "w") as file:
+        for i in range(num_texts):
+            text_words = words[word_indices[text_offsets[i] : text_offsets[i + 1]]]
+            file.write(" ".join(text_words) + "\n")
+    return int(text_lengths.sum())
+
+
+def peak_rss_mb() -> float:
+    """
+    Gets the peak resident set size (RSS) of the current process.
+
+    Returns
+    -------
+    peak_rss : float
+        Peak RSS in megabytes.
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def iterate_dataset(
+    dataset: tf.data.Dataset, count_element: Optional[Callable] = None
+) -> Tuple[float, int]:
+    """
+    Iterates over a dataset and measures the time spent.
+
+    The dataset is consumed using `tf.data.Dataset.reduce` inside a `tf.function`,
+    such that the time spent is not dominated by the overhead of iterating over
+    the elements one by one in eager Python.
+
+    Parameters
+    ----------
+    dataset : tf.data.Dataset
+        Dataset to iterate over.
+    count_element : callable, optional
+        Function taking the components of an element of the dataset and returning
+        the number of items in it, as an int64 tensor (defaults to counting each
+        element as 1).
+
+    Returns
+    -------
+    result : tuple of float and int
+        Seconds spent and number of items in the dataset.
+    """
+    if count_element is None:
+        count_element = lambda *element: tf.constant(1, tf.int64)  # noqa: E731
+
+    @tf.function
+    def count_items() -> tf.Tensor:
+        return dataset.reduce(
+            tf.constant(0, tf.int64),
+            lambda num_items, element: num_items + count_element(*element),
+        )
+
+    time_start = time()
+    num_items = int(count_items())
+    return time() - time_start, num_items
+
+
+def benchmark_word2vec(
+    num_texts: int,
+    min_text_length: int,
+    max_text_length: int,
+    vocab_size: int,
+    zipf_exponent: float,
+    min_word_count: int,
+    sampling_factor: float,
+    batch_size: int,
+    embedding_dim: int,
+    max_window_size: int,
+    num_negative_samples: int,
+    num_shared_negative_samples: int,
+    training_mode: str,
+    steps_per_execution: int,
+    sparse_updates: bool,
+    output_filepath: str,
+    seed: int,
+    cpu_only: bool,
+) -> dict:
+    """
+    Benchmarks each stage of the word2vec input pipeline alone (text reading,
+    tokenization, subsampling, pair generation and batching) and the full training
+    loop on a synthetic Zipf-distributed corpus. Reports throughput, time spent
+    and peak RSS after each stage, as JSON.
+
+    The time of a stage includes the stages before it, as the pipeline is
+    consumed from the last stage; the time spent in the stage itself is reported
+    as the difference to the previous stage.
+
+    Parameters
+    ----------
+    num_texts : int
+        Number of texts in the synthetic corpus.
+    min_text_length : int
+        Minimum number of words in each text.
+    max_text_length : int
+        Maximum number of words in each text.
+    vocab_size : int
+        Number of unique words in the synthetic corpus.
+    zipf_exponent : float
+        Exponent of the Zipf distribution words are sampled from.
+    min_word_count : int
+        Minimum number of times a word might occur for it to be in the vocabulary.
+    sampling_factor : float
+        Sampling factor to use when computing the probability of keeping a word
+        during random subsampling of words.
+    batch_size : int
+        Batch size used for training.
+    embedding_dim : int
+        Number of latent dimensions to use in the embedding layers.
+    max_window_size : int
+        Maximum window size to use when generating skip-gram couples.
+    num_negative_samples : int
+        Number of negative samples to use when generating skip-gram couples.
+    num_shared_negative_samples : int
+        Number of negative samples to share among all target/context pairs of a
+        batch (0 to sample negative samples for each pair).
+    training_mode : str
+        Training mode to benchmark, either "skip_gram" or "cbow". In CBOW mode, the
+        pairs of the pair generation stage are CBOW examples.
+    steps_per_execution : int
+        Number of training steps to run inside each call to the TensorFlow
+        training function.
+    sparse_updates : bool
+        Whether or not to update the touched rows of the embedding matrices in-place
+        when training.
+    output_filepath : str
+        Where to save the benchmark results (JSON). If empty, they are printed.
+    seed : int
+        Random seed to use when generating the synthetic corpus.
+    cpu_only : bool
+        Whether or not to benchmark on the CPU only.
+
+    Returns
+    -------
+    results : dict
+        Benchmark results.
+    """
+    if cpu_only:
+        os.environ["CUDA_DEVICE_ORDER"] = "PCI_BUS_ID"
+        os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results: dict = {
+            "config": {
+                "num_texts": num_texts,
+                "min_text_length": min_text_length,
+                "max_text_length": max_text_length,
+                "vocab_size": vocab_size,
+                "zipf_exponent": zipf_exponent,
+                "min_word_count": min_word_count,
+                "sampling_factor": sampling_factor,
+                "batch_size": batch_size,
+                "embedding_dim": embedding_dim,
+                "max_window_size": max_window_size,
+                "num_negative_samples": num_negative_samples,
+                "num_shared_negative_samples": num_shared_negative_samples,
+                "training_mode": training_mode,
+                "steps_per_execution": steps_per_execution,
+                "sparse_updates": sparse_updates,
+            },
+            "stages": {},
+        }
+        stages = results["stages"]
+
+        def add_stage(name: str, seconds: float, **throughputs: float) -> None:
+            """
+            Adds the results of a stage.
+
+            Parameters
+            ----------
+            name : str
+                Name of the stage.
+            seconds : float
+                Seconds spent on the stage (including previous pipeline stages).
+            throughputs : float
+                Number of items (e.g. words) processed by the stage, by item name.
+            """
+            stages[name] = {"seconds": seconds}
+            stages[name].update(
+                {
+                    f"{item_name}_per_sec": num_items / seconds
+                    for item_name, num_items in throughputs.items()
+                }
+            )
+            stages[name]["peak_rss_mb"] = peak_rss_mb()
+
+        # Generate synthetic corpus
+        text_data_filepath = join(tmp_dir, "corpus.txt")
+        time_start = time()
+        num_words = generate_zipf_corpus(
+            text_data_filepath,
+            num_texts,
+            min_text_length,
+            max_text_length,
+            vocab_size,
+            zipf_exponent,
+            seed,
+        )
+        results["corpus"] = {"num_texts": num_texts, "num_words": num_words}
+        add_stage("generate_corpus", time() - time_start, words=num_words)
+
+        # Build vocabulary (printing its progress to stderr, such that stdout only
+        # contains the results)
+        time_start = time()
+        tokenizer = Tokenizer()
+        with redirect_stdout(sys.stderr):
+            tokenizer.build_word_occurrences([text_data_filepath], num_texts)
+            tokenizer.build_vocab(
+                min_word_count=min_word_count, sampling_factor=sampling_factor
+            )
+        add_stage("build_vocab", time() - time_start, words=num_words)
+        results["corpus"]["vocab_size"] = tokenizer.vocab_size
+
+        # The stages are built from the same dataset helpers as `create_dataset`
+        # Text reading
+        texts_dataset = _texts_dataset([text_data_filepath], num_texts)
+        seconds, _ = iterate_dataset(texts_dataset)
+        add_stage("read_texts", seconds, texts=num_texts, words=num_words)
+
+        # Tokenization
+        tokenized_dataset = texts_dataset.map(
+            lambda text, sent_percentage: (
+                tokenizer.tokenize_text_tf(text),
+                sent_percentage,
+            ),
+            num_parallel_calls=AUTOTUNE,
+        )
+        seconds, _ = iterate_dataset(tokenized_dataset)
+        add_stage("tokenize", seconds, texts=num_texts, words=num_words)
+
+        # Subsampling
+        subsampled_dataset = _word_indices_dataset(
+            [text_data_filepath], num_texts, tokenizer
+        )
+        seconds, _ = iterate_dataset(subsampled_dataset)
+        add_stage("subsample", seconds, texts=num_texts, words=num_words)
+
+        # Pair generation
+        seconds, num_pairs = iterate_dataset(
+            _examples_dataset(subsampled_dataset, max_window_size, training_mode),
+            lambda examples, sent_percentage: tf.shape(examples, tf.int64)[0],
+        )
+        add_stage("generate_pairs", seconds, words=num_words, pairs=num_pairs)
+        results["corpus"]["num_pairs"] = num_pairs
+
+        # Batching (full input pipeline)
+        seconds, num_batches = iterate_dataset(
+            create_dataset(
+                [text_data_filepath],
+                num_texts,
+                tokenizer,
+                max_window_size,
+                batch_size,
+                training_mode=training_mode,
+            )
+        )
+        add_stage("batch", seconds, words=num_words, pairs=num_batches * batch_size)
+
+        # Full training loop (one epoch)
+        word2vec = Word2vec(
+            tokenizer=tokenizer,
+            embedding_dim=embedding_dim,
+            batch_size=batch_size,
+            max_window_size=max_window_size,
+            num_negative_samples=num_negative_samples,
+            training_mode=training_mode,
+            num_shared_negative_samples=num_shared_negative_samples,
+        )
+        time_start = time()
+        word2vec.fit(
+            text_data_filepaths=[text_data_filepath],
+            num_texts=num_texts,
+            dataset_name="benchmark",
+            n_epochs=1,
+            output_dir=join(tmp_dir, "output"),
+            tensorboard_logs_dir="",
+            train_logs_to_file=False,
+            steps_per_execution=steps_per_execution,
+            sparse_updates=sparse_updates,
+            verbose=0,
+        )
+        add_stage(
+            "train",
+            time() - time_start,
+            words=num_words,
+            pairs=num_batches * batch_size,
+        )
+
+        # Estimate time spent in each pipeline stage by itself
+        previous_stage_seconds = 0.0
+        for stage_name in [
+            "read_texts",
+            "tokenize",
+            "subsample",
+            "generate_pairs",
+            "batch",
+        ]:
+            stage_seconds = stages[stage_name]["seconds"]
+            stages[stage_name]["stage_seconds"] = max(
+                stage_seconds - previous_stage_seconds, 0.0
+            )
+            previous_stage_seconds = stage_seconds
+        results["peak_rss_mb"] = peak_rss_mb()
+
+    results_json = json.dumps(results, indent=2)
+    if output_filepath != "":
+        with open(output_filepath, "w") as file:
+            file.write(results_json)
+    else:
+        print(results_json)
+
+    return results
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    benchmark_word2vec(
+        num_texts=args.num_texts,
+        min_text_length=args.min_text_length,
+        max_text_length=args.max_text_length,
+        vocab_size=args.vocab_size,
+        zipf_exponent=args.zipf_exponent,
+        min_word_count=args.min_word_count,
+        sampling_factor=args.sampling_factor,
+        batch_size=args.batch_size,
+        embedding_dim=args.embedding_dim,
+        max_window_size=args.max_window_size,
+        num_negative_samples=args.num_negative_samples,
+        num_shared_negative_samples=args.num_shared_negative_samples,
+        training_mode=args.training_mode,
+        steps_per_execution=args.steps_per_execution,
+        sparse_updates=args.sparse_updates,
+        output_filepath=args.output_filepath,
+        seed=args.seed,
+        cpu_only=args.cpu_only,
+    )
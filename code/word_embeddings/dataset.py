@@ -1,11 +1,77 @@
-from typing import List, Tuple
-
+import hashlib
+import json
+import os
+import sys
+from os.path import isfile, join
+from typing import Generator, List, Tuple
+
+import numpy as np
 import tensorflow as tf
+from tqdm import tqdm
+
+sys.path.append("..")
 
-from word_embeddings.tokenizer import Tokenizer
+from utils import get_text_files_shards, read_text_file_shard  # noqa: E402
+from word_embeddings.tokenizer import Tokenizer  # noqa: E402
 
 AUTOTUNE = tf.data.experimental.AUTOTUNE
 
+# Filenames of compiled corpus files
+COMPILED_CORPUS_TOKENS_FILENAME = "tokens.int32"
+COMPILED_CORPUS_OFFSETS_FILENAME = "offsets.npy"
+COMPILED_CORPUS_INFO_FILENAME = "info.json"
+
+
+def _sample_context_windows(
+    size: tf.Tensor, max_window_size: int
+) -> Tuple[tf.Tensor, tf.Tensor]:
+    """
+    Samples a window size for every word in a text and computes the positions of
+    the context words within the window of every word.
+
+    Parameters
+    ----------
+    size : tf.Tensor
+        Number of words in the text.
+    max_window_size : int
+        Maximum number of words to the left and right of a word to use as context.
+
+    Returns
+    -------
+    context_windows : tuple of tf.Tensor
+        Positions of context words of shape [size, 2 * max_window_size], ordered from
+        left to right, and a boolean mask of the same shape telling which of them are
+        within the sampled window and inside the text.
+    """
+    # Randomly sample window size for each target word
+    # [size, 1]
+    window_sizes = tf.random.uniform(
+        [size, 1], minval=1, maxval=max_window_size + 1, dtype=tf.int32
+    )
+
+    # Offsets from target to context words, ordered from left to right
+    # [2 * max_window_size]
+    offsets = tf.concat(
+        [tf.range(-max_window_size, 0), tf.range(1, max_window_size + 1)], axis=0
+    )
+
+    # Positions of context words
+    # [size, 2 * max_window_size]
+    context_positions = tf.expand_dims(tf.range(size), axis=1) + tf.expand_dims(
+        offsets, axis=0
+    )
+
+    # Keep context words within the sampled window and inside the text
+    # [size, 2 * max_window_size]
+    context_mask = tf.logical_and(
+        tf.less_equal(tf.abs(offsets), window_sizes),
+        tf.logical_and(
+            tf.greater_equal(context_positions, 0), tf.less(context_positions, size)
+        ),
+    )
+
+    return context_positions, context_mask
+
 
 def generate_skip_gram_pairs(
     word_indices: tf.Tensor,
@@ -14,6 +80,95 @@ def generate_skip_gram_pairs(
     """
     Generates skip-gram target/context pairs.
 
+    Every target word gets a randomly sampled window size and all target/context
+    pairs of the text are generated at once, by masking a matrix of shifted word
+    positions (instead of looping over each word in the text).
+
+    Parameters
+    ----------
+    word_indices : tf.Tensor
+        Tokenized words in a Tensor.
+    max_window_size : int
+        Maximum number of words to the left and right of the target word to generate positive samples from.
+
+    Returns
+    -------
+    skip_gram_pairs : tf.Tensor
+        Tensor of shape [num_pairs, 2] containing target/context pairs.
+    """
+    size = tf.size(word_indices)
+    context_positions, context_mask = _sample_context_windows(size, max_window_size)
+
+    # Generate positive samples
+    target_positions = tf.broadcast_to(
+        tf.expand_dims(tf.range(size), axis=1), tf.shape(context_positions)
+    )
+    positive_positions = tf.boolean_mask(
+        tf.stack([target_positions, context_positions], axis=-1), context_mask
+    )
+    instances = tf.cast(tf.gather(word_indices, positive_positions), tf.int64)
+    instances.set_shape([None, 2])
+
+    return instances
+
+
+def generate_cbow_examples(
+    word_indices: tf.Tensor,
+    max_window_size: int,
+) -> tf.Tensor:
+    """
+    Generates continuous bag-of-words (CBOW) examples, i.e. one example for each
+    target word, consisting of the target word and the context words within its
+    (randomly sampled) window.
+
+    Like `generate_skip_gram_pairs`, all examples of the text are generated at once.
+
+    Parameters
+    ----------
+    word_indices : tf.Tensor
+        Tokenized words in a Tensor.
+    max_window_size : int
+        Maximum number of words to the left and right of the target word to use as
+        context words.
+
+    Returns
+    -------
+    cbow_examples : tf.Tensor
+        Tensor of shape [num_words, 1 + 2 * max_window_size] containing the target
+        word, followed by its context words, in each row. Context words outside of
+        the sampled window (or text) are padded with -1.
+    """
+    size = tf.size(word_indices)
+    context_positions, context_mask = _sample_context_windows(size, max_window_size)
+
+    # Look up context words and pad the ones outside of the window
+    # [size, 2 * max_window_size]
+    context_words = tf.where(
+        context_mask,
+        tf.gather(word_indices, tf.clip_by_value(context_positions, 0, size - 1)),
+        -tf.ones_like(context_positions, dtype=word_indices.dtype),
+    )
+
+    instances = tf.cast(
+        tf.concat([tf.expand_dims(word_indices, axis=1), context_words], axis=1),
+        tf.int64,
+    )
+    instances.set_shape([None, 1 + 2 * max_window_size])
+
+    return instances
+
+
+def generate_skip_gram_pairs_while_loop(
+    word_indices: tf.Tensor,
+    max_window_size: int,
+) -> tf.Tensor:
+    """
+    Generates skip-gram target/context pairs, one target word at a time using a
+    tf.while_loop.
+
+    Kept as a reference implementation of `generate_skip_gram_pairs`
+    (e.g. for benchmarking).
+
     Parameters
     ----------
     word_indices : tf.Tensor
@@ -78,6 +233,42 @@ def generate_skip_gram_pairs(
     return instances
 
 
+def subsample_words(word_indices: tf.Tensor, word_keep_probs: tf.Tensor) -> tf.Tensor:
+    """
+    Applies subsampling to tokenized words with a certain probability for each word.
+
+    Parameters
+    ----------
+    word_indices : tf.Tensor
+        Tokenized words in a Tensor (without unknown words).
+    word_keep_probs : tf.Tensor
+        Tensor containing probabilities of keeping a word during subsampling.
+
+        It is ordered such that the first probability corresponds to the word with the
+        most occurrences, the second probability to the second most occurring word, etc.
+
+    Returns
+    -------
+    word_indices_subsampled : tf.Tensor
+        Tensor containing subsampled word indices.
+    """
+    word_indices_keep_probs = tf.gather(word_keep_probs, word_indices)
+
+    # Generate random values from 0 to 1 to determine
+    # if we keep or discard a word, with probabilities
+    # defined in `word_indices_keep_probs`
+    rng_values = tf.random.uniform(
+        tf.shape(word_indices_keep_probs), 0, 1, dtype=tf.float64
+    )
+
+    # Subsample word indices
+    word_indices_subsampled = tf.boolean_mask(
+        word_indices, tf.less(rng_values, word_indices_keep_probs)
+    )
+
+    return word_indices_subsampled
+
+
 def tokenize_and_subsample_words(
     text: tf.Tensor, word_keep_probs: tf.Tensor, tokenizer: Tokenizer
 ) -> tf.Tensor:
@@ -109,66 +300,416 @@ def tokenize_and_subsample_words(
     word_indices_filtered = tf.boolean_mask(
         tokenized_text, tf.not_equal(tokenized_text, tokenizer.unknown_word_int)
     )
-    word_keep_probs_filtered = tf.gather(word_keep_probs, word_indices_filtered)
 
-    # Generate random values from 0 to 1 to determine
-    # if we keep or discard a word, with probabilities
-    # defined in `word_keep_probs_filtered`
-    rng_values = tf.random.uniform(
-        tf.shape(word_keep_probs_filtered), 0, 1, dtype=tf.float64
-    )
+    return subsample_words(word_indices_filtered, word_keep_probs)
 
-    # Subsample word indices
-    word_indices_subsampled = tf.boolean_mask(
-        word_indices_filtered, tf.less(rng_values, word_keep_probs_filtered)
-    )
 
-    return word_indices_subsampled
+def compiled_corpus_exists(compiled_corpus_dir: str) -> bool:
+    """
+    Checks whether or not a compiled corpus exists in a directory.
 
+    Parameters
+    ----------
+    compiled_corpus_dir : str
+        Directory of the compiled corpus.
 
-# Create dataset
-def create_dataset(
+    Returns
+    -------
+    exists : bool
+        Whether or not a (completely written) compiled corpus exists.
+    """
+    return isfile(join(compiled_corpus_dir, COMPILED_CORPUS_INFO_FILENAME))
+
+
+def vocab_fingerprint(tokenizer: Tokenizer) -> str:
+    """
+    Computes a fingerprint of the vocabulary of a tokenizer, used to validate that a
+    compiled corpus is compiled using the same vocabulary.
+
+    Parameters
+    ----------
+    tokenizer : Tokenizer
+        Tokenizer instance with a built vocabulary.
+
+    Returns
+    -------
+    fingerprint : str
+        SHA-1 hash of the words of the vocabulary (in order).
+    """
+    words_hash = hashlib.sha1()
+    for word in tokenizer.words:
+        words_hash.update(word.encode("utf-8"))
+        words_hash.update(b"\n")
+    return words_hash.hexdigest()
+
+
+def compile_corpus(
     text_data_filepaths: List[str],
     num_texts: int,
     tokenizer: Tokenizer,
-    max_window_size: int,
-    batch_size: int,
-) -> tf.data.Dataset:
+    compiled_corpus_dir: str,
+    batch_size: int = 10000,
+) -> None:
     """
-    Creates a tf.data.Dataset for training a word2vec model using skip-grams and negative sampling.
+    Compiles text data files into a pre-tokenized binary corpus, such that
+    the texts only have to be read and tokenized once.
+
+    The compiled corpus consists of a flat int32 array of word integers, where
+    unknown words are dropped, and an int64 array of offsets of each text (or sentence)
+    into the flat array (i.e. text i consists of tokens[offsets[i]:offsets[i + 1]]).
 
     Parameters
     ----------
     text_data_filepaths : list
-        Paths of text data to generate skip-gram target/context pairs from.
+        Paths of text data to compile.
     num_texts : int
-        Number of texts (or sentences) in the text data file.
+        Number of texts (or sentences) in the text data files.
     tokenizer : Tokenizer
         Tokenizer instance for tokenizing individual texts.
-    max_window_size : int
-        Maximum number of words to the left and right of a target word during sampling of positive words.
-    batch_size : int
-        Number of skip-gram target/context pairs to yield for each batch of data.
+    compiled_corpus_dir : str
+        Directory to save the compiled corpus to.
+    batch_size : int, optional
+        Number of texts to tokenize at once (defaults to 10000).
+    """
+    os.makedirs(compiled_corpus_dir, exist_ok=True)
+
+    # Tokenize texts in batches
+    dataset = tf.data.TextLineDataset(text_data_filepaths)
+    dataset = dataset.batch(batch_size)
+    dataset = dataset.map(
+        lambda texts: tokenizer.tokenize_text_tf(texts), num_parallel_calls=AUTOTUNE
+    )
+    dataset = dataset.map(
+        lambda tokenized_texts: tf.ragged.boolean_mask(
+            tokenized_texts,
+            tf.not_equal(tokenized_texts, tokenizer.unknown_word_int),
+        ),
+        num_parallel_calls=AUTOTUNE,
+    )
+    dataset = dataset.prefetch(AUTOTUNE)
+
+    # Write word integers to file
+    text_lengths = []
+    num_tokens = 0
+    with open(join(compiled_corpus_dir, COMPILED_CORPUS_TOKENS_FILENAME), "wb") as f:
+        for tokenized_texts in tqdm(
+            dataset,
+            desc="- Compiling corpus",
+            total=int(np.ceil(num_texts / batch_size)),
+        ):
+            tokens = tokenized_texts.flat_values.numpy().astype(np.int32)
+            f.write(tokens.tobytes())
+            num_tokens += len(tokens)
+            text_lengths.append(tokenized_texts.row_lengths().numpy())
+
+    # Write text offsets to file
+    offsets = np.zeros(sum(len(lengths) for lengths in text_lengths) + 1, np.int64)
+    if len(text_lengths) > 0:
+        np.cumsum(np.concatenate(text_lengths), out=offsets[1:])
+    np.save(join(compiled_corpus_dir, COMPILED_CORPUS_OFFSETS_FILENAME), offsets)
+
+    # Write info file last, to mark the compiled corpus as complete
+    with open(join(compiled_corpus_dir, COMPILED_CORPUS_INFO_FILENAME), "w") as f:
+        json.dump(
+            {
+                "num_texts": len(offsets) - 1,
+                "num_tokens": num_tokens,
+                "vocab_size": tokenizer.vocab_size,
+                "vocab_fingerprint": vocab_fingerprint(tokenizer),
+                "text_data_filepaths": list(text_data_filepaths),
+                "text_data_num_texts": num_texts,
+            },
+            f,
+        )
+
+
+def load_compiled_corpus(
+    compiled_corpus_dir: str, mmap_mode: str = "r"
+) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """
+    Loads a compiled corpus, created using `compile_corpus`.
+
+    Parameters
+    ----------
+    compiled_corpus_dir : str
+        Directory of the compiled corpus.
+    mmap_mode : str, optional
+        Memmap mode to use when loading the arrays (defaults to "r", or read).
+
+    Returns
+    -------
+    tokens : np.ndarray
+        Flat int32 array of word integers of all texts.
+    offsets : np.ndarray
+        Offsets of each text into `tokens`.
+    info : dict
+        Info of the compiled corpus (number of texts and tokens, vocabulary size and
+        fingerprint (see `vocab_fingerprint`), and the text data files and number of
+        texts it is compiled from).
+    """
+    with open(join(compiled_corpus_dir, COMPILED_CORPUS_INFO_FILENAME), "r") as f:
+        info = json.load(f)
+    tokens = np.memmap(
+        join(compiled_corpus_dir, COMPILED_CORPUS_TOKENS_FILENAME),
+        dtype=np.int32,
+        mode=mmap_mode,
+        shape=(info["num_tokens"],),
+    )
+    offsets = np.load(
+        join(compiled_corpus_dir, COMPILED_CORPUS_OFFSETS_FILENAME),
+        mmap_mode=mmap_mode,
+    )
+
+    return tokens, offsets, info
+
+
+def _compiled_corpus_dataset(
+    compiled_corpus_dir: str,
+    chunk_size: int = 1000,
+    num_shards: int = 1,
+    shard_index: int = 0,
+) -> tf.data.Dataset:
+    """
+    Creates a tf.data.Dataset yielding tokenized texts from a compiled corpus.
+
+    Parameters
+    ----------
+    compiled_corpus_dir : str
+        Directory of the compiled corpus.
+    chunk_size : int, optional
+        Number of texts to read from the compiled corpus at once (defaults to 1000).
+    num_shards : int, optional
+        Number of (contiguous) shards to split the texts of the compiled corpus
+        into (defaults to 1).
+    shard_index : int, optional
+        Index of the shard to yield texts from (defaults to 0).
 
     Returns
     -------
     dataset : tf.data.Dataset
-        Dataset used for yielding skip-gram target/context pairs.
+        Dataset yielding tokenized texts and the percentage of texts (of the shard)
+        read so far.
     """
+    tokens, offsets, info = load_compiled_corpus(compiled_corpus_dir)
+    shard_bounds = np.linspace(0, info["num_texts"], num_shards + 1).astype(int)
+    shard_start = shard_bounds[shard_index]
+    shard_end = shard_bounds[shard_index + 1]
+    num_texts = int(max(shard_end - shard_start, 1))
 
-    # Convert word keep probs to tensors
-    word_keep_probs_tf = tf.convert_to_tensor(tokenizer.word_keep_probs)
+    def compiled_corpus_chunks() -> Generator[tuple, None, None]:
+        """
+        Yields chunks of texts from the compiled corpus.
 
-    # Initialize tf.data.Dataset
-    dataset = tf.data.Dataset.zip(
+        Returns
+        -------
+        chunk : tuple
+            Tuple consisting of the word integers of the texts, the length of
+            each text and the index of the first text in the chunk.
+        """
+        for chunk_start in range(shard_start, shard_end, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, shard_end)
+            chunk_offsets = offsets[chunk_start : chunk_end + 1]
+            yield (
+                tokens[chunk_offsets[0] : chunk_offsets[-1]].astype(np.int64),
+                np.diff(chunk_offsets),
+                chunk_start - shard_start,
+            )
+
+    dataset = tf.data.Dataset.from_generator(
+        compiled_corpus_chunks,
+        output_signature=(
+            tf.TensorSpec(shape=(None,), dtype=tf.int64),
+            tf.TensorSpec(shape=(None,), dtype=tf.int64),
+            tf.TensorSpec(shape=(), dtype=tf.int64),
+        ),
+    )
+    dataset = dataset.map(
+        lambda chunk_tokens, chunk_text_lengths, chunk_start: (
+            tf.RaggedTensor.from_row_lengths(chunk_tokens, chunk_text_lengths),
+            tf.range(chunk_start, chunk_start + tf.size(chunk_text_lengths, tf.int64))
+            / num_texts,
+        ),
+        num_parallel_calls=AUTOTUNE,
+    )
+    dataset = dataset.unbatch()
+
+    return dataset
+
+
+def _text_files_shard_dataset(
+    text_data_filepaths: List[str], num_shards: int, shard_index: int
+) -> tf.data.Dataset:
+    """
+    Creates a tf.data.Dataset yielding the texts of a shard of text data files. Each
+    text data file is split into `num_shards` byte ranges (see
+    `get_text_files_shards`), and only the byte ranges of the shard are read.
+
+    Parameters
+    ----------
+    text_data_filepaths : list
+        Paths of text data to read texts from.
+    num_shards : int
+        Number of shards to split the text data files into.
+    shard_index : int
+        Index of the shard to yield texts from.
+
+    Returns
+    -------
+    dataset : tf.data.Dataset
+        Dataset yielding texts and the percentage of bytes (of the shard) read so
+        far.
+    """
+    file_shards = []
+    for filepath in text_data_filepaths:
+        file_size = tf.io.gfile.stat(filepath).length
+        shard_size = max(-(-file_size // num_shards), 1)
+        shards = get_text_files_shards([filepath], shard_size)
+        if shard_index < len(shards):
+            file_shards.append(shards[shard_index])
+    num_shard_bytes = max(sum(end - start for _, start, end in file_shards), 1)
+
+    def text_blocks() -> Generator[tuple, None, None]:
+        """
+        Yields blocks of texts from the byte ranges of the shard.
+
+        Returns
+        -------
+        text_block : tuple
+            Tuple consisting of a block of (complete) lines, the number of bytes
+            read before the block and the number of bytes in the block.
+        """
+        bytes_read = 0
+        for file_shard in file_shards:
+            for text_block in read_text_file_shard(*file_shard):
+                text_block_bytes = text_block.encode("utf-8")
+                yield text_block_bytes, bytes_read, len(text_block_bytes)
+                bytes_read += len(text_block_bytes)
+
+    dataset = tf.data.Dataset.from_generator(
+        text_blocks,
+        output_signature=(
+            tf.TensorSpec(shape=(), dtype=tf.string),
+            tf.TensorSpec(shape=(), dtype=tf.int64),
+            tf.TensorSpec(shape=(), dtype=tf.int64),
+        ),
+    )
+
+    def split_text_block(
+        text_block: tf.Tensor, bytes_read: tf.Tensor, num_block_bytes: tf.Tensor
+    ) -> Tuple[tf.Tensor, tf.Tensor]:
+        """
+        Splits a block of texts into lines, and interpolates the percentage of
+        bytes read at each line.
+
+        Parameters
+        ----------
+        text_block : tf.Tensor
+            Block of (complete) lines.
+        bytes_read : tf.Tensor
+            Number of bytes read before the block.
+        num_block_bytes : tf.Tensor
+            Number of bytes in the block.
+
+        Returns
+        -------
+        result : tuple of tf.Tensor
+            Lines of the block and the percentage of bytes read at each line.
+        """
+        texts = tf.strings.split(tf.strings.regex_replace(text_block, "\n$", ""), "\n")
+        num_texts = tf.size(texts, tf.int64)
+        sent_percentages = tf.cast(
+            bytes_read + tf.range(num_texts) * num_block_bytes // num_texts,
+            tf.float64,
+        )
+        return texts, tf.minimum(sent_percentages / num_shard_bytes, 1.0)
+
+    dataset = dataset.map(split_text_block, num_parallel_calls=AUTOTUNE)
+    dataset = dataset.unbatch()
+
+    return dataset
+
+
+def _texts_dataset(
+    text_data_filepaths: List[str],
+    num_texts: int,
+    num_shards: int = 1,
+    shard_index: int = 0,
+) -> tf.data.Dataset:
+    """
+    Creates a tf.data.Dataset yielding the texts of text data files.
+
+    Parameters
+    ----------
+    text_data_filepaths : list
+        Paths of text data to read texts from.
+    num_texts : int
+        Number of texts (or sentences) in the text data files.
+    num_shards : int, optional
+        Number of shards to split the texts into (defaults to 1). Each text data
+        file is split into contiguous byte ranges, such that each shard only reads
+        its own part of the text data files (see `_text_files_shard_dataset`).
+    shard_index : int, optional
+        Index of the shard to yield texts from (defaults to 0).
+
+    Returns
+    -------
+    dataset : tf.data.Dataset
+        Dataset yielding texts and the percentage of texts (of the shard) read so
+        far.
+    """
+    if num_shards > 1:
+        return _text_files_shard_dataset(text_data_filepaths, num_shards, shard_index)
+    return tf.data.Dataset.zip(
         (
             tf.data.TextLineDataset(text_data_filepaths, num_parallel_reads=AUTOTUNE),
             tf.data.Dataset.from_tensor_slices(tf.range(num_texts) / num_texts),
         )
     )
 
+
+def _word_indices_dataset(
+    text_data_filepaths: List[str],
+    num_texts: int,
+    tokenizer: Tokenizer,
+    compiled_corpus_dir: str = "",
+    num_shards: int = 1,
+    shard_index: int = 0,
+) -> tf.data.Dataset:
+    """
+    Creates a tf.data.Dataset yielding tokenized and subsampled texts, read from
+    text data files or a compiled corpus (see `create_dataset` for a description of
+    the parameters).
+
+    Returns
+    -------
+    dataset : tf.data.Dataset
+        Dataset yielding the (subsampled) word integers of texts and the percentage
+        of texts read so far.
+    """
+    # Convert word keep probs to tensors
+    word_keep_probs_tf = tf.convert_to_tensor(tokenizer.word_keep_probs)
+
+    if compiled_corpus_dir != "":
+
+        # Initialize tf.data.Dataset from compiled corpus
+        dataset = _compiled_corpus_dataset(
+            compiled_corpus_dir, num_shards=num_shards, shard_index=shard_index
+        )
+
+        # Apply subsampling
+        return dataset.map(
+            lambda word_indices, sent_percentage: (
+                subsample_words(word_indices, word_keep_probs_tf),
+                sent_percentage,
+            ),
+            num_parallel_calls=AUTOTUNE,
+        )
+
+    # Initialize tf.data.Dataset
+    dataset = _texts_dataset(text_data_filepaths, num_texts, num_shards, shard_index)
+
     # Apply subsampling
-    dataset = dataset.map(
+    return dataset.map(
         lambda text, sent_percentage: (
             tokenize_and_subsample_words(text, word_keep_probs_tf, tokenizer),
             sent_percentage,
@@ -176,20 +717,46 @@ def create_dataset(
         num_parallel_calls=AUTOTUNE,
     )
 
+
+def _examples_dataset(
+    word_indices_dataset: tf.data.Dataset, max_window_size: int, training_mode: str
+) -> tf.data.Dataset:
+    """
+    Creates a tf.data.Dataset yielding the skip-gram target/context pairs (or CBOW
+    examples) of each text (see `create_dataset` for a description of the
+    parameters).
+
+    Parameters
+    ----------
+    word_indices_dataset : tf.data.Dataset
+        Dataset yielding (subsampled) word integers of texts and the percentage of
+        texts read so far (see `_word_indices_dataset`).
+
+    Returns
+    -------
+    dataset : tf.data.Dataset
+        Dataset yielding the examples of each text, of shape [examples, 2] (or
+        [examples, 1 + 2 * max_window_size] in CBOW mode), and the percentage of
+        texts read so far, of shape [examples].
+    """
     # Filter out texts with less than 2 words in them
-    dataset = dataset.filter(
+    dataset = word_indices_dataset.filter(
         lambda word_indices, sent_percentage: tf.greater(tf.size(word_indices), 1),
     )
 
-    # Generate skip-gram target/context pairs
+    # Generate skip-gram target/context pairs (or CBOW examples)
+    generate_examples = (
+        generate_cbow_examples if training_mode == "cbow" else generate_skip_gram_pairs
+    )
     dataset = dataset.map(
         lambda word_indices, sent_percentage: (
-            generate_skip_gram_pairs(
+            generate_examples(
                 word_indices,
                 max_window_size,
             ),
             sent_percentage,
         ),
+        num_parallel_calls=AUTOTUNE,
     )
 
     # Reshape `sent_percentage` to have the same size as `word_indices`
@@ -200,14 +767,85 @@ def create_dataset(
         ),
         num_parallel_calls=AUTOTUNE,
     )
+    return dataset
 
-    # Create a dataset by unstacking word_indices
-    dataset = dataset.flat_map(
-        lambda word_indices, sent_percentages: tf.data.Dataset.from_tensor_slices(
-            (word_indices, sent_percentages)
+
+# Create dataset
+def create_dataset(
+    text_data_filepaths: List[str],
+    num_texts: int,
+    tokenizer: Tokenizer,
+    max_window_size: int,
+    batch_size: int,
+    compiled_corpus_dir: str = "",
+    num_shards: int = 1,
+    shard_index: int = 0,
+    training_mode: str = "skip_gram",
+) -> tf.data.Dataset:
+    """
+    Creates a tf.data.Dataset for training a word2vec model using skip-grams (or
+    continuous bag-of-words) and negative sampling.
+
+    Parameters
+    ----------
+    text_data_filepaths : list
+        Paths of text data to generate skip-gram target/context pairs from.
+    num_texts : int
+        Number of texts (or sentences) in the text data file.
+    tokenizer : Tokenizer
+        Tokenizer instance for tokenizing individual texts.
+    max_window_size : int
+        Maximum number of words to the left and right of a target word during sampling of positive words.
+    batch_size : int
+        Number of skip-gram target/context pairs to yield for each batch of data.
+    compiled_corpus_dir : str, optional
+        Directory of a compiled corpus of `text_data_filepaths` (see `compile_corpus`).
+        If specified, the tokenized texts are read from the compiled corpus instead
+        of reading and tokenizing the text data files (defaults to "").
+    num_shards : int, optional
+        Number of shards to split the texts into, e.g. when training in multiple
+        processes (defaults to 1). A compiled corpus is split into contiguous
+        shards of texts, while the text data files are split into contiguous byte
+        ranges, such that each shard only reads its own part of the corpus.
+    shard_index : int, optional
+        Index of the shard to generate skip-gram target/context pairs from
+        (defaults to 0).
+    training_mode : str, optional
+        Training mode to generate examples for (defaults to "skip_gram"). Must be
+        one of:
+        - "skip_gram": Yields batches of skip-gram target/context pairs, i.e.
+          contexts of shape [batch_size].
+        - "cbow": Yields batches of continuous bag-of-words (CBOW) examples, i.e.
+          one example for each target word, with contexts of shape
+          [batch_size, 2 * max_window_size] padded with -1
+          (see `generate_cbow_examples`).
+
+    Returns
+    -------
+    dataset : tf.data.Dataset
+        Dataset used for yielding skip-gram target/context pairs.
+    """
+
+    if training_mode not in ("skip_gram", "cbow"):
+        raise ValueError(f"Unknown training mode: {training_mode}")
+
+    # Generate skip-gram target/context pairs (or CBOW examples) of each text
+    dataset = _examples_dataset(
+        _word_indices_dataset(
+            text_data_filepaths,
+            num_texts,
+            tokenizer,
+            compiled_corpus_dir,
+            num_shards,
+            shard_index,
         ),
+        max_window_size,
+        training_mode,
     )
 
+    # Create a dataset by unstacking word_indices
+    dataset = dataset.unbatch()
+
     # Perform batching
     dataset = dataset.batch(batch_size, drop_remainder=True)
 
@@ -221,7 +859,7 @@ def create_dataset(
         Parameters
         ----------
         skip_gram_pairs_batch : tf.Tensor
-            Tensor containing input target/context pairs
+            Tensor containing input target/context pairs (or CBOW examples)
         sent_percentages : tf.Tensor
             Tensor containing percentages of training progress
         Returns
@@ -231,13 +869,17 @@ def create_dataset(
         """
 
         # Set shape of tf.Tensor and extract targets/contexts
-        skip_gram_pairs_batch.set_shape([batch_size, 2])
+        if training_mode == "cbow":
+            skip_gram_pairs_batch.set_shape([batch_size, 1 + 2 * max_window_size])
+        else:
+            skip_gram_pairs_batch.set_shape([batch_size, 2])
         input_targets = skip_gram_pairs_batch[:, :1]
         input_contexts = skip_gram_pairs_batch[:, 1:]
 
         # Ensure that dimensions are correct
         input_targets = tf.squeeze(input_targets, axis=1)
-        input_contexts = tf.squeeze(input_contexts, axis=1)
+        if training_mode == "skip_gram":
+            input_contexts = tf.squeeze(input_contexts, axis=1)
 
         # Return percentage as a single number
         sent_percentage = sent_percentages[0]
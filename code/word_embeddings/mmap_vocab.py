@@ -0,0 +1,428 @@
+import json
+import os
+from collections.abc import Mapping
+from hashlib import blake2b
+from os.path import abspath, join
+from typing import Iterator, Optional, Sequence
+
+import numpy as np
+
+# Filenames of memory-mappable vocabulary files
+MMAP_VOCAB_WORDS_FILENAME = "words.npy"
+MMAP_VOCAB_WORD_OFFSETS_FILENAME = "word_offsets.npy"
+MMAP_VOCAB_WORD_COUNTS_FILENAME = "word_counts.npy"
+MMAP_VOCAB_WORD_KEEP_PROBS_FILENAME = "word_keep_probs.npy"
+MMAP_VOCAB_HASH_TABLE_FILENAME = "hash_table.npy"
+MMAP_VOCAB_INFO_FILENAME = "info.json"
+
+# Maximum fraction of occupied slots of the hash table
+MMAP_VOCAB_HASH_TABLE_MAX_LOAD_FACTOR = 0.5
+
+
+def _hash_word(word_bytes: bytes) -> int:
+    """
+    Hashes a (UTF-8 encoded) word into a 64-bit integer.
+
+    Parameters
+    ----------
+    word_bytes : bytes
+        UTF-8 encoded word to hash.
+
+    Returns
+    -------
+    word_hash : int
+        64-bit hash of the word.
+    """
+    return int.from_bytes(blake2b(word_bytes, digest_size=8).digest(), "little")
+
+
+def _build_hash_table(word_hashes: np.ndarray) -> np.ndarray:
+    """
+    Builds an open-addressing hash table (with linear probing) of word indices.
+
+    The words are inserted in rounds, in which every word not yet inserted probes
+    its next slot. If several words probe the same empty slot, the word with the
+    lowest index is inserted. Since slots are never emptied, every slot between
+    the initial slot of a word and its slot is occupied, i.e. a lookup of a word
+    finds it before reaching an empty slot.
+
+    Parameters
+    ----------
+    word_hashes : np.ndarray
+        64-bit hashes of the words (see `_hash_word`).
+
+    Returns
+    -------
+    hash_table : np.ndarray
+        Hash table of word indices, where empty slots are -1. Its size is a power
+        of two.
+    """
+    num_words = len(word_hashes)
+    hash_table_size = 1
+    while hash_table_size * MMAP_VOCAB_HASH_TABLE_MAX_LOAD_FACTOR < max(num_words, 1):
+        hash_table_size *= 2
+    hash_table_mask = np.uint64(hash_table_size - 1)
+    hash_table = np.full(hash_table_size, -1, dtype=np.int64)
+
+    pending_word_indices = np.arange(num_words, dtype=np.int64)
+    pending_slots = (word_hashes & hash_table_mask).astype(np.int64)
+    while len(pending_word_indices) > 0:
+        empty = hash_table[pending_slots] == -1
+        empty_slots, first_indices = np.unique(pending_slots[empty], return_index=True)
+        hash_table[empty_slots] = pending_word_indices[empty][first_indices]
+
+        inserted = np.zeros(len(pending_word_indices), dtype=bool)
+        inserted[np.flatnonzero(empty)[first_indices]] = True
+        pending_word_indices = pending_word_indices[~inserted]
+        pending_slots = (pending_slots[~inserted] + 1) & (hash_table_size - 1)
+
+    return hash_table
+
+
+def save_mmap_vocab(
+    destination_dir: str,
+    words: Sequence[str],
+    word_counts: Sequence[int],
+    word_keep_probs: Sequence[float],
+    corpus_size: int,
+    unknown_word_int: int,
+) -> None:
+    """
+    Saves a vocabulary to a directory of memory-mappable files, such that it can be
+    loaded without deserializing (or even reading) all of it (see `MmapVocab`).
+
+    The words are stored in vocabulary order (i.e. sorted by word counts) as a blob
+    of UTF-8 encoded words and an int64 array of offsets of each word into the blob
+    (i.e. word i is words[offsets[i]:offsets[i + 1]]), next to an int64 array of
+    word counts, a float64 array of word keep probabilities and an open-addressing
+    hash table of word indices for looking up words.
+
+    Parameters
+    ----------
+    destination_dir : str
+        Directory to save the vocabulary to.
+    words : sequence of str
+        Words of the vocabulary.
+    word_counts : sequence of int
+        Word counts of the words of the vocabulary.
+    word_keep_probs : sequence of float
+        Probabilities of keeping the words of the vocabulary during subsampling.
+    corpus_size : int
+        Size of the text corpus of the vocabulary.
+    unknown_word_int : int
+        Integer value used for characterizing unknown words.
+    """
+    os.makedirs(destination_dir, exist_ok=True)
+
+    # Write words and their offsets into the blob of words
+    encoded_words = [word.encode("utf-8") for word in words]
+    word_offsets = np.zeros(len(encoded_words) + 1, dtype=np.int64)
+    np.cumsum([len(word) for word in encoded_words], out=word_offsets[1:])
+    np.save(
+        join(destination_dir, MMAP_VOCAB_WORDS_FILENAME),
+        np.frombuffer(b"".join(encoded_words), dtype=np.uint8),
+    )
+    np.save(join(destination_dir, MMAP_VOCAB_WORD_OFFSETS_FILENAME), word_offsets)
+
+    # Write word counts and keep probabilities
+    np.save(
+        join(destination_dir, MMAP_VOCAB_WORD_COUNTS_FILENAME),
+        np.asarray(word_counts, dtype=np.int64),
+    )
+    np.save(
+        join(destination_dir, MMAP_VOCAB_WORD_KEEP_PROBS_FILENAME),
+        np.asarray(word_keep_probs, dtype=np.float64),
+    )
+
+    # Write hash table for looking up words
+    word_hashes = np.fromiter(
+        (_hash_word(word) for word in encoded_words),
+        dtype=np.uint64,
+        count=len(encoded_words),
+    )
+    np.save(
+        join(destination_dir, MMAP_VOCAB_HASH_TABLE_FILENAME),
+        _build_hash_table(word_hashes),
+    )
+
+    # Write info file last, to mark the vocabulary as complete
+    with open(join(destination_dir, MMAP_VOCAB_INFO_FILENAME), "w") as f:
+        json.dump(
+            {
+                "vocab_size": len(encoded_words),
+                "corpus_size": int(corpus_size),
+                "unknown_word_int": int(unknown_word_int),
+            },
+            f,
+        )
+
+
+class MmapVocab:
+    """
+    Memory-mapped vocabulary, saved using `save_mmap_vocab`.
+    """
+
+    def __init__(self, vocab_dir: str) -> None:
+        """
+        Initializes the MmapVocab class.
+
+        Parameters
+        ----------
+        vocab_dir : str
+            Directory of the vocabulary.
+        """
+        self._vocab_dir = vocab_dir
+        with open(join(vocab_dir, MMAP_VOCAB_INFO_FILENAME), "r") as f:
+            self._info = json.load(f)
+        self._words = np.load(join(vocab_dir, MMAP_VOCAB_WORDS_FILENAME), mmap_mode="r")
+        self._word_offsets = np.load(
+            join(vocab_dir, MMAP_VOCAB_WORD_OFFSETS_FILENAME), mmap_mode="r"
+        )
+        self._word_counts = np.load(
+            join(vocab_dir, MMAP_VOCAB_WORD_COUNTS_FILENAME), mmap_mode="r"
+        )
+        self._word_keep_probs = np.load(
+            join(vocab_dir, MMAP_VOCAB_WORD_KEEP_PROBS_FILENAME), mmap_mode="r"
+        )
+        self._hash_table = np.load(
+            join(vocab_dir, MMAP_VOCAB_HASH_TABLE_FILENAME), mmap_mode="r"
+        )
+        self._hash_table_mask = len(self._hash_table) - 1
+
+        # Memoryviews of the arrays, for fast (scalar) indexing when looking up words
+        self._words_view = memoryview(self._words)
+        self._word_offsets_view = memoryview(self._word_offsets)
+        self._hash_table_view = memoryview(self._hash_table)
+
+    def __getstate__(self) -> dict:
+        """
+        Gets the internal state of the class, i.e. the (absolute) directory of the
+        vocabulary (instead of its content).
+        """
+        return {"vocab_dir": abspath(self._vocab_dir)}
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Sets the internal state of the class, i.e. memory-maps the vocabulary again.
+        """
+        self.__init__(state["vocab_dir"])
+
+    def __len__(self) -> int:
+        """
+        Gets the vocabulary size.
+        """
+        return self._info["vocab_size"]
+
+    @property
+    def vocab_dir(self) -> str:
+        """
+        Gets the directory of the vocabulary.
+
+        Returns
+        -------
+        vocab_dir : str
+            Directory of the vocabulary.
+        """
+        return self._vocab_dir
+
+    @property
+    def corpus_size(self) -> int:
+        """
+        Gets the text corpus size of the vocabulary.
+
+        Returns
+        -------
+        corpus_size : int
+            Size of the text corpus.
+        """
+        return self._info["corpus_size"]
+
+    @property
+    def unknown_word_int(self) -> int:
+        """
+        Gets the value for denoting an unknown word of the vocabulary.
+
+        Returns
+        -------
+        unknown_word_int : int
+            Unknown word integer value.
+        """
+        return self._info["unknown_word_int"]
+
+    @property
+    def word_counts(self) -> np.ndarray:
+        """
+        Gets the (memory-mapped) word counts of the words of the vocabulary.
+
+        Returns
+        -------
+        word_counts : np.ndarray
+            Word counts of the words of the vocabulary.
+        """
+        return self._word_counts
+
+    @property
+    def word_keep_probs(self) -> np.ndarray:
+        """
+        Gets the (memory-mapped) probabilities of keeping the words of the
+        vocabulary during subsampling.
+
+        Returns
+        -------
+        word_keep_probs : np.ndarray
+            Word keep probabilities of the words of the vocabulary.
+        """
+        return self._word_keep_probs
+
+    def _encoded_word(self, word_int: int) -> memoryview:
+        """
+        Gets a word of the vocabulary from the blob of words.
+
+        Parameters
+        ----------
+        word_int : int
+            Integer representation of the word.
+
+        Returns
+        -------
+        word_bytes : memoryview
+            UTF-8 encoded word.
+        """
+        return self._words_view[
+            self._word_offsets_view[word_int] : self._word_offsets_view[word_int + 1]
+        ]
+
+    def word(self, word_int: int) -> str:
+        """
+        Gets the word of an integer representation.
+
+        Parameters
+        ----------
+        word_int : int
+            Integer representation of the word.
+
+        Returns
+        -------
+        word : str
+            Word of the integer representation.
+
+        Raises
+        ------
+        IndexError
+            If the integer representation is out of the vocabulary.
+        """
+        if not 0 <= word_int < len(self):
+            raise IndexError(f"Word integer {word_int} is out of the vocabulary")
+        return bytes(self._encoded_word(word_int)).decode("utf-8")
+
+    def word_int(self, word: str, default: int = -1) -> int:
+        """
+        Looks up the integer representation of a word in the hash table.
+
+        Parameters
+        ----------
+        word : str
+            Word to look up.
+        default : int, optional
+            Value to return if the word is out of the vocabulary (defaults to -1).
+
+        Returns
+        -------
+        word_int : int
+            Integer representation of the word (or `default`).
+        """
+        word_bytes = word.encode("utf-8")
+        slot = _hash_word(word_bytes) & self._hash_table_mask
+        while True:
+            word_int = self._hash_table_view[slot]
+            if word_int == -1:
+                return default
+            if self._encoded_word(word_int) == word_bytes:
+                return word_int
+            slot = (slot + 1) & self._hash_table_mask
+
+    def words(self) -> np.ndarray:
+        """
+        Decodes all words of the vocabulary into a numpy array.
+
+        Returns
+        -------
+        words : np.ndarray
+            Numpy array of words of the vocabulary.
+        """
+        words_blob = self._words.tobytes()
+        return np.asarray(
+            [
+                words_blob[start:end].decode("utf-8")
+                for start, end in zip(
+                    self._word_offsets[:-1].tolist(), self._word_offsets[1:].tolist()
+                )
+            ]
+        )
+
+
+class MmapWordToInt(Mapping):
+    """
+    Read-only dictionary mapping from a word to its integer representation, backed by
+    a memory-mapped vocabulary.
+    """
+
+    def __init__(self, mmap_vocab: MmapVocab) -> None:
+        """
+        Initializes the MmapWordToInt class.
+
+        Parameters
+        ----------
+        mmap_vocab : MmapVocab
+            Memory-mapped vocabulary.
+        """
+        self._mmap_vocab = mmap_vocab
+
+    def __getitem__(self, word: str) -> int:
+        word_int = self._mmap_vocab.word_int(word) if isinstance(word, str) else -1
+        if word_int == -1:
+            raise KeyError(word)
+        return word_int
+
+    def __contains__(self, word: object) -> bool:
+        return isinstance(word, str) and self._mmap_vocab.word_int(word) != -1
+
+    def get(self, word: str, default: Optional[int] = None) -> Optional[int]:
+        word_int = self._mmap_vocab.word_int(word) if isinstance(word, str) else -1
+        return default if word_int == -1 else word_int
+
+    def __iter__(self) -> Iterator[str]:
+        return (self._mmap_vocab.word(i) for i in range(len(self._mmap_vocab)))
+
+    def __len__(self) -> int:
+        return len(self._mmap_vocab)
+
+
+class MmapIntToWord(Mapping):
+    """
+    Read-only dictionary mapping from an integer representation to its word, backed by
+    a memory-mapped vocabulary.
+    """
+
+    def __init__(self, mmap_vocab: MmapVocab) -> None:
+        """
+        Initializes the MmapIntToWord class.
+
+        Parameters
+        ----------
+        mmap_vocab : MmapVocab
+            Memory-mapped vocabulary.
+        """
+        self._mmap_vocab = mmap_vocab
+
+    def __getitem__(self, word_int: int) -> str:
+        try:
+            return self._mmap_vocab.word(word_int)
+        except (IndexError, TypeError):
+            raise KeyError(word_int)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self._mmap_vocab)))
+
+    def __len__(self) -> int:
+        return len(self._mmap_vocab)
@@ -1,12 +1,430 @@
-import itertools
+import hashlib
+import multiprocessing
+import os
+import shutil
+import sys
 from collections import Counter
-from typing import List, Optional
+from itertools import islice, repeat
+from multiprocessing import cpu_count
+from os.path import abspath, isdir, isfile, join
+from typing import Iterable, List, Mapping, Optional, Tuple
 
 import joblib
 import numpy as np
 import tensorflow as tf
 from tqdm import tqdm
 
+sys.path.append("..")
+
+from utils import get_text_files_shards, read_text_file_shard  # noqa: E402
+from word_embeddings.mmap_vocab import (  # noqa: E402
+    MmapIntToWord,
+    MmapVocab,
+    MmapWordToInt,
+    save_mmap_vocab,
+)
+
+# Fraction of the maximum number of words to keep when pruning word occurrences.
+# Pruning to less than the maximum leaves room for new words, such that pruning
+# is not needed again right away
+WORD_OCCURRENCES_PRUNING_FRACTION = 0.5
+
+# Filename of the word occurrences counter saved next to a memory-mapped vocabulary
+# (see `Tokenizer.save_mmap_vocab`)
+WORD_OCCURRENCES_FILENAME = "word_occurrences.joblib"
+
+# Multiprocessing variable dict
+mp_var_dict: dict = {}
+
+
+def _text_file_shard_counts_filepath(
+    shard_counts_cache_dir: str,
+    filepath: str,
+    start: int,
+    end: int,
+    max_word_occurrences: int,
+) -> str:
+    """
+    Gets the filepath of the cached word counts of a text file shard. The filepath
+    depends on the size and modification time of the text file, such that the word
+    counts are recounted when the text file changes.
+
+    Parameters
+    ----------
+    shard_counts_cache_dir : str
+        Directory of cached word counts of text file shards.
+    filepath : str
+        Filepath of text file.
+    start : int
+        Start byte offset of the shard.
+    end : int
+        End byte offset of the shard.
+    max_word_occurrences : int
+        Maximum number of words the word counts were pruned to (or -1).
+
+    Returns
+    -------
+    shard_counts_filepath : str
+        Filepath of the cached word counts of the shard.
+    """
+    file_stat = tf.io.gfile.stat(filepath)
+    shard_key = (
+        f"{abspath(filepath)}:{file_stat.length}:{file_stat.mtime_nsec}:{start}:{end}"
+        f":{max_word_occurrences}"
+    )
+    shard_hash = hashlib.sha1(shard_key.encode("utf-8")).hexdigest()
+    return join(shard_counts_cache_dir, f"{shard_hash}.joblib")
+
+
+def _prune_word_occurrences(
+    word_occurrences_counter: Counter, max_word_occurrences: int
+) -> Tuple[Counter, int]:
+    """
+    Prunes a word occurrences counter which has more than `max_word_occurrences`
+    words, by removing the words with a count of at most some threshold, similar to
+    ReduceVocab of word2vec.c. The threshold is the smallest one that prunes the
+    counter to at most `max_word_occurrences * WORD_OCCURRENCES_PRUNING_FRACTION`
+    words.
+
+    The count of a word that is removed (and possibly counted again later) is thus
+    underestimated by at most the threshold.
+
+    Parameters
+    ----------
+    word_occurrences_counter : Counter
+        Word occurrences counter to prune.
+    max_word_occurrences : int
+        Maximum number of words of the counter.
+
+    Returns
+    -------
+    result : tuple of Counter and int
+        Pruned word occurrences counter and threshold used for pruning (0 if the
+        counter was not pruned).
+    """
+    if len(word_occurrences_counter) <= max_word_occurrences:
+        return word_occurrences_counter, 0
+
+    # Find the count of the (num_kept_words + 1)-th most occurring word
+    num_kept_words = int(max_word_occurrences * WORD_OCCURRENCES_PRUNING_FRACTION)
+    word_counts = np.fromiter(
+        word_occurrences_counter.values(),
+        dtype=np.int64,
+        count=len(word_occurrences_counter),
+    )
+    threshold = int(-np.partition(-word_counts, num_kept_words)[num_kept_words])
+
+    pruned_word_occurrences_counter = Counter(
+        {
+            word: word_count
+            for word, word_count in word_occurrences_counter.items()
+            if word_count > threshold
+        }
+    )
+    return pruned_word_occurrences_counter, threshold
+
+
+def _count_text_file_shard_words(
+    shard: Tuple[str, int, int, str, int],
+) -> Tuple[Counter, int, int]:
+    """
+    Counts the words of a text file shard (used in `_count_text_files_words`).
+    If a cache directory is given, the word counts are read from it if they exist,
+    or saved to it otherwise.
+
+    If `mp_var_dict` contains a set of "candidate_words", only those words are
+    counted.
+
+    Parameters
+    ----------
+    shard : tuple of str, int, int, str and int
+        Filepath of text file, start and end byte offsets of the shard (see
+        `get_text_files_shards`), directory of cached word counts of text file
+        shards (or "", i.e. no caching) and maximum number of words to keep
+        counts of (or -1, i.e. no maximum).
+
+    Returns
+    -------
+    result : tuple of Counter, int and int
+        Word occurrences counter, number of lines of the shard and the maximum
+        number of occurrences any word count is underestimated by due to pruning.
+    """
+    filepath, start, end, shard_counts_cache_dir, max_word_occurrences = shard
+    if shard_counts_cache_dir != "":
+        shard_counts_filepath = _text_file_shard_counts_filepath(
+            shard_counts_cache_dir, filepath, start, end, max_word_occurrences
+        )
+        if isfile(shard_counts_filepath):
+            return joblib.load(shard_counts_filepath)
+
+    candidate_words = mp_var_dict.get("candidate_words")
+    word_occurrences_counter: Counter = Counter()
+    num_lines = 0
+    error_bound = 0
+    for text_block in read_text_file_shard(filepath, start, end):
+        words = text_block.split()
+        if candidate_words is not None:
+            words = filter(candidate_words.__contains__, words)
+        word_occurrences_counter.update(words)
+        num_lines += text_block.count("\n")
+        if max_word_occurrences > 0:
+            word_occurrences_counter, threshold = _prune_word_occurrences(
+                word_occurrences_counter, max_word_occurrences
+            )
+            error_bound += threshold
+
+    result = (word_occurrences_counter, num_lines, error_bound)
+    if shard_counts_cache_dir != "":
+        tmp_filepath = f"{shard_counts_filepath}.{os.getpid()}.tmp"
+        joblib.dump(result, tmp_filepath)
+        os.replace(tmp_filepath, shard_counts_filepath)
+
+    return result
+
+
+def _count_text_files_words(
+    shards: List[Tuple[str, int, int, str, int]],
+    num_workers: int,
+    num_texts: int,
+    max_word_occurrences: int = -1,
+    desc: str = "- Building word occurrences",
+) -> Tuple[Counter, int]:
+    """
+    Counts the words of text file shards in parallel (see
+    `_count_text_file_shard_words`) and merges the word counts of the shards in a
+    tree reduction (as they are counted).
+
+    The shards are merged in order, such that the words of the counter are ordered by
+    first occurrence, like when counting the words of the text files sequentially.
+
+    Parameters
+    ----------
+    shards : list of tuple of str, int, int, str and int
+        Shards to count the words of (see `_count_text_file_shard_words`).
+    num_workers : int
+        Number of processes to count words in.
+    num_texts : int
+        Number of texts (or sentences) of the shards.
+    max_word_occurrences : int, optional
+        Maximum number of words to keep counts of when merging word counts (defaults
+        to -1, i.e. no maximum).
+    desc : str, optional
+        Description of the progressbar (defaults to "- Building word occurrences").
+
+    Returns
+    -------
+    result : tuple of Counter and int
+        Word occurrences counter and the maximum number of occurrences any word count
+        is underestimated by due to pruning.
+    """
+    num_workers = max(min(num_workers, len(shards)), 1)
+
+    def merge_word_occurrences(
+        word_occurrences: Tuple[Counter, int],
+        other_word_occurrences: Tuple[Counter, int],
+    ) -> Tuple[Counter, int]:
+        """
+        Merges two word occurrences counters (and their error bounds), pruning the
+        merged counter if needed. The first counter is updated in-place.
+        """
+        word_occurrences_counter, error_bound = word_occurrences
+        other_word_occurrences_counter, other_error_bound = other_word_occurrences
+        word_occurrences_counter.update(other_word_occurrences_counter)
+        error_bound += other_error_bound
+        if max_word_occurrences > 0:
+            word_occurrences_counter, threshold = _prune_word_occurrences(
+                word_occurrences_counter, max_word_occurrences
+            )
+            error_bound += threshold
+        return word_occurrences_counter, error_bound
+
+    # Merge word counts of shards in a tree reduction, i.e. two (consecutive)
+    # counters of the same level are merged as soon as both exist, such that
+    # at most log2(number of shards) counters are kept in memory
+    pending_word_occurrences: List[Tuple[int, Tuple[Counter, int]]] = []
+    with tqdm(desc=desc, total=num_texts) as progressbar:
+        with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+            for shard_counter, shard_num_lines, shard_error_bound in pool.imap(
+                _count_text_file_shard_words, shards
+            ):
+                level = 0
+                word_occurrences = (shard_counter, shard_error_bound)
+                while (
+                    pending_word_occurrences
+                    and pending_word_occurrences[-1][0] == level
+                ):
+                    _, previous_word_occurrences = pending_word_occurrences.pop()
+                    word_occurrences = merge_word_occurrences(
+                        previous_word_occurrences, word_occurrences
+                    )
+                    level += 1
+                pending_word_occurrences.append((level, word_occurrences))
+                progressbar.update(shard_num_lines)
+
+    if not pending_word_occurrences:
+        return Counter(), 0
+    word_occurrences = pending_word_occurrences[0][1]
+    for _, other_word_occurrences in pending_word_occurrences[1:]:
+        word_occurrences = merge_word_occurrences(
+            word_occurrences, other_word_occurrences
+        )
+    return word_occurrences
+
+
+def _tokenize_texts_batch(
+    word_to_int: Mapping[str, int],
+    texts: List[str],
+    unknown_word_int: int,
+    drop_unknown_words: bool,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tokenizes a batch of texts, looking up all words of the batch at once.
+
+    Parameters
+    ----------
+    word_to_int : Mapping of str and int
+        Dictionary mapping from a word to its integer representation.
+    texts : list of str
+        Space-separated texts to tokenize.
+    unknown_word_int : int
+        Integer value to use for characterizing unknown words.
+    drop_unknown_words : bool
+        Whether or not to drop unknown words.
+
+    Returns
+    -------
+    result : tuple of np.ndarray and np.ndarray
+        Flat int32 array of word integers of the texts and an int64 array of the
+        number of words of each text.
+    """
+    # Split the texts of the batch at once (instead of keeping a list of words of
+    # each text), such that the number of allocated lists stays small
+    text_lengths = np.fromiter(
+        map(len, map(str.split, texts)), dtype=np.int64, count=len(texts)
+    )
+    words = "\n".join(texts).split()
+    tokens = np.fromiter(
+        map(word_to_int.get, words, repeat(unknown_word_int)),
+        dtype=np.int32,
+        count=len(words),
+    )
+    if drop_unknown_words:
+        known_words = tokens != unknown_word_int
+        tokens = tokens[known_words]
+        text_lengths = np.bincount(
+            np.repeat(np.arange(len(texts)), text_lengths)[known_words],
+            minlength=len(texts),
+        ).astype(np.int64)
+
+    return tokens, text_lengths
+
+
+def _tokenize_text_file_shard(
+    shard: Tuple[str, int, int],
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Tokenizes the lines of a text file shard (used in `Tokenizer.tokenize_text_files`),
+    using the tokenizer of `mp_var_dict`.
+
+    Parameters
+    ----------
+    shard : tuple of str, int and int
+        Filepath of text file and start and end byte offsets of the shard (see
+        `get_text_files_shards`).
+
+    Returns
+    -------
+    result : tuple of np.ndarray and np.ndarray
+        Flat int32 array of word integers of the lines of the shard and an int64
+        array of the number of words of each line.
+    """
+    filepath, start, end = shard
+    tokenizer: Tokenizer = mp_var_dict["tokenizer"]
+    word_to_int = tokenizer.word_to_int
+    tokens = []
+    text_lengths = []
+    for text_block in read_text_file_shard(filepath, start, end):
+        texts = text_block.split("\n")
+        if texts[-1] == "":
+            texts.pop()
+        block_tokens, block_text_lengths = _tokenize_texts_batch(
+            word_to_int,
+            texts,
+            tokenizer.unknown_word_int,
+            mp_var_dict["drop_unknown_words"],
+        )
+        tokens.append(block_tokens)
+        text_lengths.append(block_text_lengths)
+
+    return (
+        np.concatenate(tokens) if tokens else np.zeros(0, dtype=np.int32),
+        np.concatenate(text_lengths) if text_lengths else np.zeros(0, dtype=np.int64),
+    )
+
+
+def _tokens_with_offsets(
+    tokens: List[np.ndarray], text_lengths: List[np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Concatenates tokenized batches of texts into a flat array of word integers and
+    an array of offsets of each text into it.
+
+    Parameters
+    ----------
+    tokens : list of np.ndarray
+        Flat int32 arrays of word integers of each batch.
+    text_lengths : list of np.ndarray
+        Int64 arrays of the number of words of each text of each batch.
+
+    Returns
+    -------
+    result : tuple of np.ndarray and np.ndarray
+        Flat int32 array of word integers of all texts and an int64 array of offsets
+        of each text into it (i.e. text i consists of tokens[offsets[i]:offsets[i + 1]]).
+    """
+    offsets = np.zeros(sum(len(lengths) for lengths in text_lengths) + 1, np.int64)
+    if len(text_lengths) > 0:
+        np.cumsum(np.concatenate(text_lengths), out=offsets[1:])
+    tokens = np.concatenate(tokens) if tokens else np.zeros(0, dtype=np.int32)
+    return tokens, offsets
+
+
+def _compute_word_keep_probs(
+    word_counts: np.ndarray, corpus_size: int, sampling_factor: float
+) -> np.ndarray:
+    """
+    Computes the probabilities of keeping words during subsampling of texts.
+
+    Parameters
+    ----------
+    word_counts : np.ndarray
+        Word counts of the words of the vocabulary.
+    corpus_size : int
+        Size of the text corpus, i.e. the sum of the word counts.
+    sampling_factor : float
+        Sampling factor to use when computing the probability of keeping a word.
+
+    Returns
+    -------
+    word_keep_probs : np.ndarray
+        Probabilities of keeping the words during subsampling (0 for words with no
+        occurrences).
+    """
+    # As specified by word2vec's source code:
+    # - https://github.com/tmikolov/word2vec/blob/e092540633572b883e25b367938b0cca2cf3c0e7/word2vec.c#L407 # noqa: E501
+    # - https://www.quora.com/How-does-sub-sampling-of-frequent-words-work-in-the-context-of-Word2Vec # noqa: E501
+    word_keep_probs = np.zeros(len(word_counts))
+    positive_word_counts = word_counts > 0
+    word_frequency_fracs = word_counts[positive_word_counts] / float(
+        max(corpus_size, 1)
+    )
+    word_keep_probs[positive_word_counts] = np.minimum(
+        np.sqrt(sampling_factor / word_frequency_fracs)
+        + sampling_factor / word_frequency_fracs,
+        1.0,
+    )
+    return word_keep_probs
+
 
 class Tokenizer:
     """
@@ -26,6 +444,7 @@ class Tokenizer:
         self._unknown_word_int = unknown_word_int
 
         self._word_occurrences_counter: Optional[Counter] = None
+        self._word_occurrences_error_bound = 0
         self._corpus_size: Optional[int] = None
         self._vocab_size: Optional[int] = None
         self._word_to_int: Optional[dict] = None
@@ -34,6 +453,7 @@ class Tokenizer:
         self._word_counts: Optional[list] = None
         self._word_keep_probs: Optional[list] = None
         self._static_vocab_table: Optional[tf.lookup.StaticHashTable] = None
+        self._mmap_vocab: Optional[MmapVocab] = None
 
     def __getstate__(self) -> dict:
         """
@@ -44,6 +464,12 @@ class Tokenizer:
         # Remove unpickable static vocabulary table
         del state["_static_vocab_table"]
 
+        # Remove vocabulary decoded from memory-mapped vocabulary
+        if self._mmap_vocab is not None:
+            state["_words"] = None
+            state["_word_counts"] = None
+            state["_word_keep_probs"] = None
+
         return state
 
     def __setstate__(self, state: dict) -> None:
@@ -51,10 +477,11 @@ class Tokenizer:
         Sets the internal state of the class.
         """
         self.__dict__.update(state)
+        self.__dict__.setdefault("_word_occurrences_error_bound", 0)
+        self.__dict__.setdefault("_mmap_vocab", None)
 
-        # Initialize static vocabulary table if tokenizer is built
-        if self._words is not None:
-            self._init_static_vocabulary_table()
+        # Static vocabulary table is initialized on demand
+        self._static_vocab_table = None
 
     @property
     def corpus_size(self) -> int:
@@ -78,6 +505,20 @@ class Tokenizer:
             )
         return self._corpus_size
 
+    @property
+    def word_occurrences_error_bound(self) -> int:
+        """
+        Gets the maximum number of occurrences the count of any word is underestimated
+        by, due to pruning when building word occurrences with a maximum number of
+        words (see `build_word_occurrences`).
+
+        Returns
+        -------
+        word_occurrences_error_bound : int
+            Error bound of the word counts (0 if the word counts are exact).
+        """
+        return self._word_occurrences_error_bound
+
     @property
     def vocab_size(self) -> int:
         """
@@ -117,6 +558,8 @@ class Tokenizer:
         TypeError
             If the vocabulary has not been built yet.
         """
+        if self._word_keep_probs is None and self._mmap_vocab is not None:
+            self._word_keep_probs = list(self._mmap_vocab.word_keep_probs)
         if self._word_keep_probs is None:
             raise TypeError(
                 "Word keep probabilities list is empty. "
@@ -151,6 +594,8 @@ class Tokenizer:
         TypeError
             If the vocabulary has not been built yet.
         """
+        if self._words is None and self._mmap_vocab is not None:
+            self._words = self._mmap_vocab.words()
         if self._words is None:
             raise TypeError(
                 "List of words is empty. " "Did you forget to build the vocabulary?"
@@ -172,6 +617,8 @@ class Tokenizer:
         TypeError
             If the vocabulary has not been built yet.
         """
+        if self._word_counts is None and self._mmap_vocab is not None:
+            self._word_counts = self._mmap_vocab.word_counts.tolist()
         if self._word_counts is None:
             raise TypeError(
                 "List of words counts is empty. "
@@ -194,6 +641,8 @@ class Tokenizer:
         TypeError
             If the vocabulary has not been built yet.
         """
+        if self._word_to_int is None and self._mmap_vocab is not None:
+            return MmapWordToInt(self._mmap_vocab)
         if self._word_to_int is None:
             raise TypeError(
                 "Word to integer dictionary is None."
@@ -216,6 +665,8 @@ class Tokenizer:
         TypeError
             If the vocabulary has not been built yet.
         """
+        if self._int_to_word is None and self._mmap_vocab is not None:
+            return MmapIntToWord(self._mmap_vocab)
         if self._int_to_word is None:
             raise TypeError(
                 "Integer to word dictionary is None."
@@ -226,31 +677,50 @@ class Tokenizer:
     def _init_static_vocabulary_table(self) -> None:
         """
         Initializes the static vocabulary table for tokenizing tensors of text.
+        The table is initialized eagerly, also when called while tracing a
+        tf.function (e.g. of a tf.data.Dataset).
         """
-        if self._words is None:
-            raise TypeError(
-                "List of words is empty. " "Did you forget to build the vocabulary?"
-            )
+        words = self.words
 
         # Initialize static vocabulary table
-        self._static_vocab_table = tf.lookup.StaticHashTable(
-            tf.lookup.KeyValueTensorInitializer(
-                key_dtype=tf.string,
-                keys=self._words,
-                value_dtype=tf.int64,
-                values=tf.cast(tf.range(len(self._words)), tf.int64),
-            ),
-            default_value=self._unknown_word_int,
-        )
+        with tf.init_scope():
+            self._static_vocab_table = tf.lookup.StaticHashTable(
+                tf.lookup.KeyValueTensorInitializer(
+                    key_dtype=tf.string,
+                    keys=words,
+                    value_dtype=tf.int64,
+                    values=tf.cast(tf.range(len(words)), tf.int64),
+                ),
+                default_value=self._unknown_word_int,
+            )
 
     def build_word_occurrences(
         self,
         filepaths: List[str],
         num_texts: int,
+        num_workers: int = -1,
+        shard_size: int = 64 * 1024 * 1024,
+        shard_counts_cache_dir: str = "",
+        max_word_occurrences: int = -1,
+        recount_min_word_count: int = -1,
     ) -> None:
         """
         Builds the internal word occurrences counter.
 
+        The text files are split into byte-range shards, the words of each shard are
+        counted in a separate process and the word counts of the shards are merged
+        in a tree reduction (as they are counted). The shards are merged in order,
+        such that the words of the counter are ordered by first occurrence, like
+        when counting the words of the text files sequentially.
+
+        To bound the memory usage, the number of words to keep counts of can be
+        limited using `max_word_occurrences`. Counters exceeding the limit are pruned
+        by removing their least occurring words (see `_prune_word_occurrences`),
+        which makes the word counts approximate. The maximum number of occurrences
+        any word count is underestimated by is reported and can be retrieved using
+        `word_occurrences_error_bound`. Exact word counts can be restored using
+        `recount_min_word_count`.
+
         Sets the following class variables:
         - word_occurrences_counter = Word occurrences counter;
         for looking up how often a word occurs in the vocabulary.
@@ -261,22 +731,86 @@ class Tokenizer:
             Filepaths of text files to build on.
         num_texts : int
             Number of texts (or sentences) of the content of `filepaths`.
+        num_workers : int, optional
+            Number of processes to count words in (defaults to -1, i.e. use all
+            CPUs).
+        shard_size : int, optional
+            Size of each shard of the text files in bytes (defaults to 64 MiB).
+        shard_counts_cache_dir : str, optional
+            Directory to cache the word counts of each shard in (defaults to "",
+            i.e. no caching). Word counts of shards of unchanged text files are
+            read from the cache, such that e.g. adding text files only requires
+            the shards of the new text files to be counted.
+        max_word_occurrences : int, optional
+            Maximum number of words to keep counts of in each counter (defaults to
+            -1, i.e. no maximum). At most `num_workers` + log2(number of shards)
+            counters exist at the same time.
+        recount_min_word_count : int, optional
+            If positive and the word counts were pruned, the words which might occur
+            at least `recount_min_word_count` times are counted exactly in a second
+            pass over the text files (defaults to -1). If the error bound of the
+            pruned word counts is less than `recount_min_word_count`, building the
+            vocabulary with a minimum word count of at least `recount_min_word_count`
+            then gives the same vocabulary as exact counting.
         """
-        # Read file content and split into words
-        lines = []
-        for filepath in filepaths:
-            with tf.io.gfile.GFile(filepath) as f:
-                lines.append(f)
-        lines_iter = itertools.chain(*lines)
-
-        self._word_occurrences_counter = Counter()
-        for line in tqdm(
-            lines_iter,
-            desc="- Building word occurrences",
-            total=num_texts,
-        ):
-            self._word_occurrences_counter.update(line.strip().split())
+        if shard_counts_cache_dir != "":
+            os.makedirs(shard_counts_cache_dir, exist_ok=True)
+        shards = get_text_files_shards(filepaths, shard_size)
+        if num_workers == -1:
+            num_workers = cpu_count()
+
+        (
+            self._word_occurrences_counter,
+            self._word_occurrences_error_bound,
+        ) = _count_text_files_words(
+            [
+                (filepath, start, end, shard_counts_cache_dir, max_word_occurrences)
+                for filepath, start, end in shards
+            ],
+            num_workers,
+            num_texts,
+            max_word_occurrences,
+        )
         print(f"Initial vocabulary size: {len(self._word_occurrences_counter)}")
+        if self._word_occurrences_error_bound == 0:
+            return
+        print(
+            "Word occurrences were pruned; word counts are underestimated by at most "
+            f"{self._word_occurrences_error_bound}"
+        )
+
+        if recount_min_word_count > 0:
+
+            # Count candidate words exactly, i.e. words which might occur at least
+            # `recount_min_word_count` times. Other words occur less than
+            # `recount_min_word_count` times if the error bound is less than it.
+            mp_var_dict["candidate_words"] = {
+                word
+                for word, word_count in self._word_occurrences_counter.items()
+                if word_count + self._word_occurrences_error_bound
+                >= recount_min_word_count
+            }
+            try:
+                self._word_occurrences_counter, _ = _count_text_files_words(
+                    [(filepath, start, end, "", -1) for filepath, start, end in shards],
+                    num_workers,
+                    num_texts,
+                    desc="- Recounting word occurrences",
+                )
+            finally:
+                del mp_var_dict["candidate_words"]
+            if self._word_occurrences_error_bound < recount_min_word_count:
+                self._word_occurrences_error_bound = 0
+                print(
+                    "Recounted word occurrences exactly for words occurring at least "
+                    f"{recount_min_word_count} times"
+                )
+            else:
+                print(
+                    "Recounted word occurrences, but words occurring at least "
+                    f"{recount_min_word_count} times might be missing; increase "
+                    "max_word_occurrences for exact word counts"
+                )
 
     def build_vocab(
         self,
@@ -312,84 +846,203 @@ class Tokenizer:
             Sampling factor to use when computing the probability
             of keeping a word during random subsampling of words (defaults to 1e-5).
         """
+        self._load_word_occurrences()
         if self._word_occurrences_counter is None:
             raise TypeError(
                 "Word occurrences counter is None. Did you forget to build it?"
             )
+        if self._word_occurrences_error_bound > 0:
+            print(
+                "Building vocabulary from approximate word counts (underestimated by "
+                f"at most {self._word_occurrences_error_bound})"
+            )
 
-        # Only use most common words
-        if max_vocab_size == -1:
-            max_vocab_size = None
-        word_occurrences = self._word_occurrences_counter.most_common(max_vocab_size)
-        print(f"New vocabulary size after maximization: {len(word_occurrences)}")
+        # Convert word occurrences to arrays
+        words = list(self._word_occurrences_counter.keys())
+        word_counts = np.fromiter(
+            self._word_occurrences_counter.values(), dtype=np.int64, count=len(words)
+        )
 
-        # Exclude words with less than `self._min_word_count` occurrences
-        word_occurrences = [
-            (word, word_count)
-            for word, word_count in tqdm(
-                word_occurrences, desc="- Filtering word occurences"
+        # Only use most common words
+        if max_vocab_size == -1 or max_vocab_size >= len(words):
+            word_indices = np.arange(len(words))
+        elif max_vocab_size <= 0:
+            word_indices = np.arange(0)
+        else:
+
+            # Select words occurring more than the `max_vocab_size`-th most common
+            # word, and the first occurring words of the ones occurring equally often
+            max_vocab_word_count = word_counts[
+                np.argpartition(-word_counts, max_vocab_size - 1)[max_vocab_size - 1]
+            ]
+            more_common_word_indices = np.flatnonzero(
+                word_counts > max_vocab_word_count
             )
-            if word_count >= min_word_count
+            equally_common_word_indices = np.flatnonzero(
+                word_counts == max_vocab_word_count
+            )[: max_vocab_size - len(more_common_word_indices)]
+            word_indices = np.sort(
+                np.concatenate((more_common_word_indices, equally_common_word_indices))
+            )
+
+        # Sort words by word count (descending), keeping the order of first occurrence
+        # of equally common words (like Counter.most_common)
+        word_indices = word_indices[
+            np.argsort(-word_counts[word_indices], kind="stable")
         ]
+        print(f"New vocabulary size after maximization: {len(word_indices)}")
+
+        # Exclude words with less than `self._min_word_count` occurrences
+        word_indices = word_indices[word_counts[word_indices] >= min_word_count]
         print(
-            f"Final vocabulary size after filtering on minimum word count: {len(word_occurrences)}"
+            f"Final vocabulary size after filtering on minimum word count: {len(word_indices)}"
         )
 
         # Set vocabulary size and total number of words
-        self._vocab_size = len(word_occurrences)
+        self._vocab_size = len(word_indices)
+        word_counts = word_counts[word_indices]
 
         # Calculate how many words we have in the text corpus
-        self._corpus_size = sum(
-            [
-                word_count
-                for _, word_count in tqdm(
-                    word_occurrences, desc="- Computing corpus size"
-                )
-            ]
+        self._corpus_size = int(word_counts.sum())
+
+        # Compute probabilities of keeping words during subsampling
+        word_keep_probs = _compute_word_keep_probs(
+            word_counts, self._corpus_size, sampling_factor
         )
 
-        # Set word_to_int, int_to_word, word_counts
-        # and word_keep_probs
-        self._word_to_int = {}
-        self._int_to_word = {}
-        self._words = []
-        self._word_counts = []
-        self._word_keep_probs = []
-        for word_idx, (word, word_count) in tqdm(
-            enumerate(word_occurrences),
-            desc="- Finalizing vocabulary",
-            total=len(word_occurrences),
-        ):
-
-            # Lookup tables
-            self._word_to_int[word] = word_idx
-            self._int_to_word[word_idx] = word
-
-            # Add word and its count to the lists
-            self._words.append(word)
-            self._word_counts.append(word_count)
-
-            # Add probability of keeping a word during subsampling
-            if word_count > 0:
-                word_frequency_frac = word_count / float(self._corpus_size)
-
-                # As specified by word2vec's source code:
-                # - https://github.com/tmikolov/word2vec/blob/e092540633572b883e25b367938b0cca2cf3c0e7/word2vec.c#L407 # noqa: E501
-                # - https://www.quora.com/How-does-sub-sampling-of-frequent-words-work-in-the-context-of-Word2Vec # noqa: E501
-                keep_prob = (
-                    np.sqrt(sampling_factor / word_frequency_frac)
-                    + sampling_factor / word_frequency_frac
-                )
-                keep_prob = np.minimum(keep_prob, 1.0)
-            else:
-                keep_prob = 0
-            self._word_keep_probs.append(keep_prob)
+        # Set words, word_to_int, int_to_word, word_counts and word_keep_probs
+        self._words = [words[word_idx] for word_idx in word_indices.tolist()]
+        self._word_to_int = dict(zip(self._words, range(self._vocab_size)))
+        self._int_to_word = dict(enumerate(self._words))
+        self._word_counts = word_counts.tolist()
+        self._word_keep_probs = list(word_keep_probs)
 
         # Convert words to numpy array
         self._words = np.asarray(self._words)
 
-        # Initialize static vocabulary table
-        self._init_static_vocabulary_table()
+        # Static vocabulary table is initialized on demand
+        self._static_vocab_table = None
+        self._mmap_vocab = None
+
+    def grow_vocab(
+        self,
+        filepaths: List[str],
+        num_texts: int,
+        min_word_count: int = 5,
+        sampling_factor: float = 1e-5,
+        max_vocab_size: int = -1,
+        num_workers: int = -1,
+        shard_size: int = 64 * 1024 * 1024,
+    ) -> int:
+        """
+        Grows the vocabulary with the words of new text files, e.g. for continuing
+        training of a word2vec model on new data (see `Word2vec.grow_vocab`).
+
+        The word counts of the new text files are merged into the word occurrences
+        counter. Words of the new text files that are not in the vocabulary yet and
+        now occur at least `min_word_count` times are appended to the end of the
+        vocabulary (sorted by word counts), such that the integer representations
+        of the existing words are unchanged. Hence, the vocabulary is no longer
+        sorted by word counts after growing it. The word counts and word keep
+        probabilities of all words are updated.
+
+        Parameters
+        ----------
+        filepaths : list of str
+            Filepaths of new text files.
+        num_texts : int
+            Number of texts (or sentences) of the content of `filepaths`.
+        min_word_count : int, optional
+            Minimum word count of new words (defaults to 5).
+        sampling_factor : float, optional
+            Sampling factor to use when computing the probability
+            of keeping a word during random subsampling of words (defaults to 1e-5).
+        max_vocab_size : int, optional
+            Maximum vocabulary size after growing it (defaults to -1, i.e. add all
+            new words).
+        num_workers : int, optional
+            Number of processes to count words in (defaults to -1, i.e. use all
+            CPUs).
+        shard_size : int, optional
+            Size of each shard of the text files in bytes (defaults to 64 MiB).
+
+        Returns
+        -------
+        num_new_words : int
+            Number of words added to the vocabulary.
+        """
+        self._load_word_occurrences()
+        if self._word_occurrences_counter is None:
+            raise TypeError(
+                "Word occurrences counter is None. Did you forget to build it?"
+            )
+        word_to_int = self.word_to_int
+        shards = get_text_files_shards(filepaths, shard_size)
+        if num_workers == -1:
+            num_workers = cpu_count()
+
+        # Count words of new text files and merge them into the word occurrences
+        new_word_occurrences_counter, _ = _count_text_files_words(
+            [(filepath, start, end, "", -1) for filepath, start, end in shards],
+            num_workers,
+            num_texts,
+            desc="- Counting new word occurrences",
+        )
+        self._word_occurrences_counter.update(new_word_occurrences_counter)
+
+        # Update word counts of existing words
+        word_counts = np.asarray(self.word_counts, dtype=np.int64)
+        new_words = []
+        for word in new_word_occurrences_counter:
+            word_int = word_to_int.get(word)
+            if word_int is None:
+                new_words.append(word)
+            else:
+                word_counts[word_int] = self._word_occurrences_counter[word]
+
+        # Select new words occurring at least `min_word_count` times, sorted by
+        # word count (descending) and first occurrence
+        new_word_counts = np.fromiter(
+            (self._word_occurrences_counter[word] for word in new_words),
+            dtype=np.int64,
+            count=len(new_words),
+        )
+        new_word_indices = np.flatnonzero(new_word_counts >= min_word_count)
+        new_word_indices = new_word_indices[
+            np.argsort(-new_word_counts[new_word_indices], kind="stable")
+        ]
+        if max_vocab_size != -1:
+            new_word_indices = new_word_indices[
+                : max(max_vocab_size - self._vocab_size, 0)
+            ]
+        new_words = [new_words[word_idx] for word_idx in new_word_indices.tolist()]
+        word_counts = np.concatenate((word_counts, new_word_counts[new_word_indices]))
+
+        # Append new words to the vocabulary (decoding a memory-mapped vocabulary)
+        old_vocab_size = self._vocab_size
+        if self._word_to_int is None:
+            words = self.words.tolist()
+            self._word_to_int = dict(zip(words, range(old_vocab_size)))
+            self._int_to_word = dict(enumerate(words))
+        self._vocab_size = len(word_counts)
+        self._corpus_size = int(word_counts.sum())
+        word_keep_probs = _compute_word_keep_probs(
+            word_counts, self._corpus_size, sampling_factor
+        )
+        self._word_to_int.update(
+            zip(new_words, range(old_vocab_size, self._vocab_size))
+        )
+        self._int_to_word.update(enumerate(new_words, old_vocab_size))
+        self._words = np.concatenate((self.words, np.asarray(new_words, dtype=str)))
+        self._word_counts = word_counts.tolist()
+        self._word_keep_probs = list(word_keep_probs)
+        print(f"Vocabulary size after growing: {self._vocab_size}")
+
+        # Static vocabulary table is initialized on demand
+        self._static_vocab_table = None
+        self._mmap_vocab = None
+
+        return len(new_words)
 
     def tokenize_text(self, text: str) -> list:
         """
@@ -405,24 +1058,119 @@ class Tokenizer:
         tokenized_words : list of str
             List of words tokenized into their integer representations.
         """
-        if self._word_to_int is None:
-            raise TypeError(
-                "Word to word integer lookup table is None."
-                "Did you forget to build the vocabulary?"
-            )
+        word_to_int = self.word_to_int
+
         # Split text by space to get words
         words = text.split()
 
         # Tokenizes the words
         tokenized_words = [
-            self._word_to_int[word]
-            if word in self._word_to_int
-            else self._unknown_word_int
-            for word in words
+            word_to_int.get(word, self._unknown_word_int) for word in words
         ]
 
         return tokenized_words
 
+    def tokenize_texts(
+        self,
+        texts: Iterable[str],
+        drop_unknown_words: bool = False,
+        batch_size: int = 10000,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tokenizes texts where each word is separated by a space, looking up the
+        words of a batch of texts at once.
+
+        The tokenized texts are returned in the format of a compiled corpus (see
+        `compile_corpus` of dataset.py), i.e. as a flat array of word integers and
+        an array of offsets of each text into it.
+
+        Parameters
+        ----------
+        texts : iterable of str
+            Space-separated texts to tokenize.
+        drop_unknown_words : bool, optional
+            Whether or not to drop unknown words, instead of tokenizing them into
+            `unknown_word_int` (defaults to False).
+        batch_size : int, optional
+            Number of texts to tokenize at once (defaults to 10000).
+
+        Returns
+        -------
+        tokens : np.ndarray
+            Flat int32 array of word integers of all texts.
+        offsets : np.ndarray
+            Int64 array of offsets of each text into `tokens` (i.e. text i consists
+            of tokens[offsets[i]:offsets[i + 1]]).
+        """
+        word_to_int = self.word_to_int
+        texts = iter(texts)
+        tokens = []
+        text_lengths = []
+        while True:
+            texts_batch = list(islice(texts, batch_size))
+            if len(texts_batch) == 0:
+                break
+            batch_tokens, batch_text_lengths = _tokenize_texts_batch(
+                word_to_int, texts_batch, self._unknown_word_int, drop_unknown_words
+            )
+            tokens.append(batch_tokens)
+            text_lengths.append(batch_text_lengths)
+
+        return _tokens_with_offsets(tokens, text_lengths)
+
+    def tokenize_text_files(
+        self,
+        filepaths: List[str],
+        drop_unknown_words: bool = False,
+        num_workers: int = -1,
+        shard_size: int = 64 * 1024 * 1024,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Tokenizes the lines of text files (see `tokenize_texts`). The text files are
+        split into byte-range shards, which are tokenized in separate processes.
+
+        Parameters
+        ----------
+        filepaths : list of str
+            Filepaths of text files to tokenize.
+        drop_unknown_words : bool, optional
+            Whether or not to drop unknown words, instead of tokenizing them into
+            `unknown_word_int` (defaults to False).
+        num_workers : int, optional
+            Number of processes to tokenize in (defaults to -1, i.e. use all CPUs).
+        shard_size : int, optional
+            Size of each shard of the text files in bytes (defaults to 64 MiB).
+
+        Returns
+        -------
+        tokens : np.ndarray
+            Flat int32 array of word integers of all lines.
+        offsets : np.ndarray
+            Int64 array of offsets of each line into `tokens` (i.e. line i consists
+            of tokens[offsets[i]:offsets[i + 1]]).
+        """
+        shards = get_text_files_shards(filepaths, shard_size)
+        if num_workers == -1:
+            num_workers = cpu_count()
+        num_workers = max(min(num_workers, len(shards)), 1)
+
+        mp_var_dict["tokenizer"] = self
+        mp_var_dict["drop_unknown_words"] = drop_unknown_words
+        tokens = []
+        text_lengths = []
+        try:
+            with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+                for shard_tokens, shard_text_lengths in pool.imap(
+                    _tokenize_text_file_shard, shards
+                ):
+                    tokens.append(shard_tokens)
+                    text_lengths.append(shard_text_lengths)
+        finally:
+            del mp_var_dict["tokenizer"]
+            del mp_var_dict["drop_unknown_words"]
+
+        return _tokens_with_offsets(tokens, text_lengths)
+
     def tokenize_text_tf(self, text: tf.Tensor) -> tf.Tensor:
         """
         Tokenizes a text where each word is separated by a space.
@@ -430,7 +1178,8 @@ class Tokenizer:
         Parameters
         ----------
         text : tf.Tensor
-            Space-separated text tensor to tokenize.
+            Space-separated text tensor to tokenize. If `text` is a batch of texts
+            (i.e. a 1-D tensor), the texts are tokenized into a tf.RaggedTensor.
 
         Returns
         -------
@@ -438,16 +1187,15 @@ class Tokenizer:
             Tensor of words tokenized into their integer representations.
         """
         if self._static_vocab_table is None:
-            raise TypeError(
-                "Static vocabulary lookup table is None."
-                "Did you forget to build the vocabulary?"
-            )
+            self._init_static_vocabulary_table()
 
         # Split text into words
         words = tf.strings.split(text)
 
         # Tokenize words
-        tokenized_words = self._static_vocab_table.lookup(words)
+        tokenized_words = tf.ragged.map_flat_values(
+            self._static_vocab_table.lookup, words
+        )
 
         return tokenized_words
 
@@ -464,6 +1212,104 @@ class Tokenizer:
             self, destination_filepath, protocol=4
         )  # protocol=4 for saving big files
 
+    def save_mmap_vocab(
+        self, destination_dir: str, save_word_occurrences: bool = False
+    ) -> None:
+        """
+        Saves the vocabulary of the tokenizer to a directory of memory-mappable files
+        (see `save_mmap_vocab` of mmap_vocab.py). Unlike `save`, the word occurrences
+        counter is not saved, unless `save_word_occurrences` is True.
+
+        Loading the tokenizer from the directory (see `load_tokenizer`) only
+        memory-maps the vocabulary, i.e. words are looked up in the memory-mapped
+        vocabulary, and the list of words, word counts and word keep probabilities
+        are only decoded when used.
+
+        Parameters
+        ----------
+        destination_dir : str
+            Directory to save the vocabulary to.
+        save_word_occurrences : bool, optional
+            Whether or not to save the word occurrences counter next to the
+            vocabulary (defaults to False). The word occurrences counter is only
+            loaded once it is needed, e.g. when growing the vocabulary.
+        """
+        if self._mmap_vocab is not None:
+
+            # Copy the files of the memory-mapped vocabulary, rather than decoding it
+            os.makedirs(destination_dir, exist_ok=True)
+            for filename in os.listdir(self._mmap_vocab.vocab_dir):
+                if filename != WORD_OCCURRENCES_FILENAME:
+                    shutil.copyfile(
+                        join(self._mmap_vocab.vocab_dir, filename),
+                        join(destination_dir, filename),
+                    )
+        else:
+            save_mmap_vocab(
+                destination_dir,
+                words=self.words,
+                word_counts=self.word_counts,
+                word_keep_probs=self.word_keep_probs,
+                corpus_size=self.corpus_size,
+                unknown_word_int=self._unknown_word_int,
+            )
+        if not save_word_occurrences:
+            return
+        word_occurrences_filepath = join(destination_dir, WORD_OCCURRENCES_FILENAME)
+        if self._word_occurrences_counter is not None:
+            joblib.dump(
+                (self._word_occurrences_counter, self._word_occurrences_error_bound),
+                word_occurrences_filepath,
+                protocol=4,
+            )
+        elif self._mmap_vocab is not None:
+            mmap_word_occurrences_filepath = join(
+                self._mmap_vocab.vocab_dir, WORD_OCCURRENCES_FILENAME
+            )
+            if isfile(mmap_word_occurrences_filepath):
+                shutil.copyfile(
+                    mmap_word_occurrences_filepath, word_occurrences_filepath
+                )
+
+    def _load_word_occurrences(self) -> None:
+        """
+        Loads the word occurrences counter saved next to the memory-mapped vocabulary
+        (see `save_mmap_vocab`), if it has not been loaded yet.
+        """
+        if self._word_occurrences_counter is not None or self._mmap_vocab is None:
+            return
+        word_occurrences_filepath = join(
+            self._mmap_vocab.vocab_dir, WORD_OCCURRENCES_FILENAME
+        )
+        if isfile(word_occurrences_filepath):
+            (
+                self._word_occurrences_counter,
+                self._word_occurrences_error_bound,
+            ) = joblib.load(word_occurrences_filepath)
+
+    @classmethod
+    def from_mmap_vocab(cls, vocab_dir: str) -> "Tokenizer":
+        """
+        Initializes a tokenizer from a memory-mapped vocabulary, saved using
+        `save_mmap_vocab`.
+
+        Parameters
+        ----------
+        vocab_dir : str
+            Directory of the vocabulary.
+
+        Returns
+        -------
+        tokenizer : Tokenizer
+            Tokenizer instance.
+        """
+        mmap_vocab = MmapVocab(vocab_dir)
+        tokenizer = cls(unknown_word_int=mmap_vocab.unknown_word_int)
+        tokenizer._mmap_vocab = mmap_vocab
+        tokenizer._vocab_size = len(mmap_vocab)
+        tokenizer._corpus_size = mmap_vocab.corpus_size
+        return tokenizer
+
 
 def load_tokenizer(tokenizer_filepath: str) -> Tokenizer:
     """
@@ -472,12 +1318,16 @@ def load_tokenizer(tokenizer_filepath: str) -> Tokenizer:
     Parameters
     ----------
     tokenizer_filepath : str
-        Filepath of the Tokenizer.
+        Filepath of the Tokenizer, or directory of a memory-mapped vocabulary
+        (see `Tokenizer.save_mmap_vocab`).
 
     Returns
     -------
     tokenizer : Tokenizer
         Tokenizer instance.
     """
+    if isdir(tokenizer_filepath):
+        return Tokenizer.from_mmap_vocab(tokenizer_filepath)
+
     # Read saved model dictionary from file
     return joblib.load(tokenizer_filepath)
@@ -1,7 +1,22 @@
+import resource
+from contextlib import contextmanager
 from os.path import join
+from time import time
+from typing import Iterator, List, Optional, Tuple
 
 import tensorflow as tf
 
+# Training stages to measure the wall time of per epoch (see `EpochProfiler`)
+PROFILING_STAGES = ["input_wait", "train_step", "sync", "save"]
+
+# Names of the statistics of an epoch computed by `EpochProfiler`, in the order they
+# are written to the train logs
+PROFILING_STATS_NAMES = [f"{stage}_time" for stage in PROFILING_STAGES] + [
+    "batches_per_sec",
+    "pairs_per_sec",
+    "peak_rss_mb",
+]
+
 
 def enable_dynamic_gpu_memory() -> bool:
     """
@@ -116,3 +131,157 @@ def create_model_train_logs_filepath(
     filename = f"{model_name}_{dataset_name}_logs.csv"
     filepath = join(output_dir, filename)
     return filepath
+
+
+class EpochProfiler:
+    """
+    Profiles an epoch of training, measuring the wall time spent in each training
+    stage (see `PROFILING_STAGES`), the throughput and the peak memory usage.
+    """
+
+    def __init__(self) -> None:
+        """
+        Initializes the EpochProfiler class.
+        """
+        self._stage_times = dict.fromkeys(PROFILING_STAGES, 0.0)
+        self._nested_times: List[float] = []
+
+    def reset(self) -> None:
+        """
+        Resets the measured wall times, e.g. at the start of an epoch.
+        """
+        self._stage_times = dict.fromkeys(PROFILING_STAGES, 0.0)
+        self._nested_times = []
+
+    @contextmanager
+    def measure(self, stage: str) -> Iterator[None]:
+        """
+        Measures the wall time spent in a training stage. Time attributed to other
+        stages within the measurement (nested measurements or `add`) is excluded.
+
+        Parameters
+        ----------
+        stage : str
+            Training stage to measure.
+        """
+        start_time = time()
+        self._nested_times.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed_time = time() - start_time
+            nested_time = self._nested_times.pop()
+            self._stage_times[stage] += elapsed_time - nested_time
+            if len(self._nested_times) > 0:
+                self._nested_times[-1] += elapsed_time
+
+    def add(self, stage: str, seconds: float) -> None:
+        """
+        Adds wall time to a training stage which has been measured elsewhere (e.g.
+        inside a TensorFlow function). The time is excluded from the current
+        measurement, if any.
+
+        Parameters
+        ----------
+        stage : str
+            Training stage to add wall time to.
+        seconds : float
+            Wall time (in seconds) to add.
+        """
+        self._stage_times[stage] += seconds
+        if len(self._nested_times) > 0:
+            self._nested_times[-1] += seconds
+
+    def stats(self, time_spent: float, num_steps: float, num_pairs: float) -> dict:
+        """
+        Computes the statistics of the epoch.
+
+        Parameters
+        ----------
+        time_spent : float
+            Wall time (in seconds) spent on the epoch.
+        num_steps : float
+            Number of training steps (batches) performed in the epoch, or NaN if the
+            training is not performed in batches.
+        num_pairs : float
+            Number of target/context pairs trained on in the epoch.
+
+        Returns
+        -------
+        stats : dict
+            Statistics of the epoch, with keys `PROFILING_STATS_NAMES`. The peak
+            memory usage is the peak resident set size of the process or its
+            (finished) worker processes so far, whichever is larger.
+        """
+        stats = {
+            f"{stage}_time": stage_time
+            for stage, stage_time in self._stage_times.items()
+        }
+        stats["batches_per_sec"] = num_steps / time_spent
+        stats["pairs_per_sec"] = num_pairs / time_spent
+
+        # Linux reports the maximum resident set size in kilobytes
+        peak_rss_kb = max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        )
+        stats["peak_rss_mb"] = peak_rss_kb / 1024
+        return stats
+
+
+class ProfilerTrace:
+    """
+    Captures a TensorFlow profiler trace of a range of training steps.
+    """
+
+    def __init__(self, profile_steps: Optional[Tuple[int, int]], logs_dir: str) -> None:
+        """
+        Initializes the ProfilerTrace class.
+
+        Parameters
+        ----------
+        profile_steps : tuple of int, optional
+            Range of training steps [start, stop) to capture a trace of, counted from
+            the start of training (None to not capture a trace).
+        logs_dir : str
+            TensorBoard logs directory to save the trace to.
+        """
+        self._profile_steps = profile_steps
+        self._logs_dir = logs_dir
+        self._num_steps = 0
+        self._tracing = False
+
+    def update(self) -> None:
+        """
+        Starts/stops capturing the trace once the range of training steps is
+        reached/exceeded. Meant to be called before performing training steps.
+        """
+        if self._profile_steps is None:
+            return
+        start_step, stop_step = self._profile_steps
+        if not self._tracing and start_step <= self._num_steps < stop_step:
+            tf.profiler.experimental.start(self._logs_dir)
+            self._tracing = True
+        elif self._tracing and self._num_steps >= stop_step:
+            tf.profiler.experimental.stop()
+            self._tracing = False
+
+    def add_steps(self, num_steps: int) -> None:
+        """
+        Adds performed training steps to the step count.
+
+        Parameters
+        ----------
+        num_steps : int
+            Number of training steps performed.
+        """
+        self._num_steps += num_steps
+
+    def stop(self) -> None:
+        """
+        Stops capturing the trace, if the range of training steps exceeded the
+        training.
+        """
+        if self._tracing:
+            tf.profiler.experimental.stop()
+            self._tracing = False
@@ -84,6 +84,22 @@ def parse_args() -> argparse.Namespace:
         default="output",
         help="Output directory to save the new text data files",
     )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=-1,
+        help="Number of worker processes to count word occurrences and write the new "
+        "text data files in. Defaults to use all CPUs",
+    )
+    parser.add_argument(
+        "--max_bigram_occurrences",
+        type=int,
+        default=-1,
+        help="Maximum number of bigrams to keep counts of in each worker process when "
+        "counting word occurrences. The least occurring bigrams are pruned once "
+        "exceeded, and the remaining bigrams are recounted exactly in a second pass. "
+        "Defaults to no maximum",
+    )
     return parser.parse_args()
 
 
@@ -99,6 +115,8 @@ def train_word2phrase(
     threshold_decay: float,
     phrase_sep: str,
     output_dir: str,
+    num_workers: int,
+    max_bigram_occurrences: int,
 ) -> None:
     """
     Trains word2phrase on a given set of text data files. Word2phrase converts
@@ -129,6 +147,12 @@ def train_word2phrase(
         Separator to use when combining phrases.
     output_dir : str
         Output directory to save the new text data files.
+    num_workers : int
+        Number of worker processes to count word occurrences and write the new text
+        data files in.
+    max_bigram_occurrences : int
+        Maximum number of bigrams to keep counts of in each worker process when
+        counting word occurrences.
     """
     # Initialize Word2phrase instance
     word2phrase = Word2phrase(
@@ -166,6 +190,8 @@ def train_word2phrase(
         num_texts=num_texts,
         max_vocab_size=max_vocab_size,
         output_dir=output_dir,
+        num_workers=num_workers,
+        max_bigram_occurrences=max_bigram_occurrences,
     )
 
 
@@ -183,4 +209,6 @@ if __name__ == "__main__":
         threshold_decay=args.threshold_decay,
         phrase_sep=args.phrase_sep,
         output_dir=args.output_dir,
+        num_workers=args.num_workers,
+        max_bigram_occurrences=args.max_bigram_occurrences,
     )
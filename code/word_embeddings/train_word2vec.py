@@ -2,7 +2,8 @@ import argparse
 import os
 import sys
 from datetime import datetime
-from os.path import join
+from os.path import isdir, join
+from typing import Optional, Tuple
 
 from tensorflow.keras.mixed_precision import experimental as tf_mixed_precision
 
@@ -40,7 +41,8 @@ def parse_args() -> argparse.Namespace:
         "--tokenizer_filepath",
         type=str,
         default="",
-        help="Filepath of a built tokenizer",
+        help="Filepath of a built tokenizer, or directory of a memory-mapped "
+        "vocabulary (in which case the vocabulary is not rebuilt)",
     )
     parser.add_argument(
         "--save_to_tokenizer_filepath",
@@ -48,6 +50,29 @@ def parse_args() -> argparse.Namespace:
         default="",
         help="Filepath to use for saving the tokenizer",
     )
+    parser.add_argument(
+        "--save_to_mmap_vocab_dir",
+        type=str,
+        default="",
+        help="Directory to use for saving the vocabulary of the tokenizer as "
+        "memory-mappable files, for fast loading using --tokenizer_filepath",
+    )
+    parser.add_argument(
+        "--shard_counts_cache_dir",
+        type=str,
+        default="",
+        help="Directory to cache the word counts of each shard of the text data in "
+        "when building the tokenizer, such that only shards of new or changed text "
+        "files are counted the next time",
+    )
+    parser.add_argument(
+        "--max_word_occurrences",
+        type=int,
+        default=-1,
+        help="Maximum number of words to keep counts of when building the tokenizer, "
+        "bounding its memory usage. Words that might occur at least min_word_count "
+        "times are recounted exactly. Defaults to no maximum",
+    )
     parser.add_argument(
         "--dataset_name",
         type=str,
@@ -122,6 +147,22 @@ def parse_args() -> argparse.Namespace:
         default=3 / 4,
         help="Which exponent to raise the unigram distribution to when performing negative sampling",
     )
+    parser.add_argument(
+        "--num_shared_negative_samples",
+        type=int,
+        default=0,
+        help="Number of negative samples to share among all target/context pairs "
+        "of a batch, which allows for larger batch sizes. Defaults to sample "
+        "num_negative_samples negative samples for each pair",
+    )
+    parser.add_argument(
+        "--training_mode",
+        type=str,
+        default="skip_gram",
+        choices=["skip_gram", "cbow"],
+        help="Training mode to use. Either skip_gram (default) or cbow (continuous "
+        "bag-of-words, which has fewer training steps per epoch)",
+    )
     parser.add_argument(
         "--output_dir",
         type=str,
@@ -140,6 +181,14 @@ def parse_args() -> argparse.Namespace:
         default=1,
         help="Epoch number to start the training from",
     )
+    parser.add_argument(
+        "--grow_vocab",
+        default=False,
+        action="store_true",
+        help="Whether or not to grow the vocabulary (and embedding matrices) of the "
+        "pretrained word2vec model with the new words of the text data, before "
+        "continuing training on it",
+    )
     parser.add_argument(
         "--train_logs_to_file",
         default=False,
@@ -170,6 +219,88 @@ def parse_args() -> argparse.Namespace:
         default="tensorboard_logs",
         help="TensorBoard logs directory",
     )
+    parser.add_argument(
+        "--compiled_corpus_dir",
+        type=str,
+        default="",
+        help="Directory of a compiled (pre-tokenized) corpus of the text data to "
+        "read texts from during training. The corpus is compiled to the directory "
+        "if it does not exist yet",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="tensorflow",
+        choices=["tensorflow", "hogwild", "tensorflow_data_parallel"],
+        help="Training backend to use. Either tensorflow (default), hogwild "
+        "(multi-process, lock-free training on the CPU) or tensorflow_data_parallel "
+        "(multi-process training of model replicas with periodic averaging)",
+    )
+    parser.add_argument(
+        "--num_workers",
+        type=int,
+        default=-1,
+        help="Number of worker processes to use with the hogwild and "
+        "tensorflow_data_parallel backends. Defaults to use all CPUs",
+    )
+    parser.add_argument(
+        "--steps_per_execution",
+        type=int,
+        default=1,
+        help="Number of training steps to run inside each call to the TensorFlow "
+        "training function. Higher values reduce the per-step Python overhead",
+    )
+    parser.add_argument(
+        "--averaging_interval_steps",
+        type=int,
+        default=100,
+        help="Number of training steps each worker performs between each averaging "
+        "of the embedding matrices, using the tensorflow_data_parallel backend",
+    )
+    parser.add_argument(
+        "--sparse_updates",
+        default=False,
+        action="store_true",
+        help="Whether or not to update the touched rows of the embedding matrices "
+        "in-place (closed-form gradients), bypassing the optimizer",
+    )
+    parser.add_argument(
+        "--async_saves",
+        default=False,
+        action="store_true",
+        help="Whether or not to save intermediate embedding weights and model "
+        "checkpoints in a background thread while training continues",
+    )
+    parser.add_argument(
+        "--max_pending_saves",
+        type=int,
+        default=2,
+        help="Maximum number of pending background saves when using --async_saves",
+    )
+    parser.add_argument(
+        "--embedding_storage_dir",
+        type=str,
+        default="",
+        help="Directory to store the embedding matrices in during training, keeping "
+        "only the rows of the most common words in memory, using the hogwild backend. "
+        "Allows for embedding matrices larger than memory",
+    )
+    parser.add_argument(
+        "--hot_vocab_size",
+        type=int,
+        default=100000,
+        help="Number of rows of the embedding matrices to keep in memory when using "
+        "--embedding_storage_dir",
+    )
+    parser.add_argument(
+        "--profile_steps",
+        type=int,
+        nargs=2,
+        default=None,
+        help="Range of training steps (start and stop) to capture a TensorFlow "
+        "profiler trace of into the TensorBoard logs directory, using the tensorflow "
+        "backend. Defaults to capture no trace",
+    )
     parser.add_argument(
         "--cpu_only",
         default=False,
@@ -184,6 +315,9 @@ def train_word2vec(
     text_data_dir: str,
     tokenizer_filepath: str,
     save_to_tokenizer_filepath: str,
+    save_to_mmap_vocab_dir: str,
+    shard_counts_cache_dir: str,
+    max_word_occurrences: int,
     dataset_name: str,
     batch_size: int,
     n_epochs: int,
@@ -196,14 +330,28 @@ def train_word2vec(
     num_negative_samples: int,
     sampling_factor: float,
     unigram_exponent_negative_sampling: float,
+    num_shared_negative_samples: int,
+    training_mode: str,
     output_dir: str,
     pretrained_model_filepath: str,
     starting_epoch_nr: int,
+    grow_vocab: bool,
     train_logs_to_file: bool,
     intermediate_embedding_weights_saves: int,
     dynamic_gpu_memory: bool,
     mixed_precision: bool,
     tensorboard_logs_dir: str,
+    compiled_corpus_dir: str,
+    backend: str,
+    num_workers: int,
+    steps_per_execution: int,
+    averaging_interval_steps: int,
+    sparse_updates: bool,
+    async_saves: bool,
+    max_pending_saves: int,
+    embedding_storage_dir: str,
+    hot_vocab_size: int,
+    profile_steps: Optional[Tuple[int, int]],
     cpu_only: bool,
 ) -> None:
     """
@@ -216,9 +364,18 @@ def train_word2vec(
     text_data_dir : str
         Directory containing text files we wish to train on.
     tokenizer_filepath : str
-        Filepath of the built Tokenizer.
+        Filepath of the built Tokenizer, or directory of a memory-mapped vocabulary
+        (in which case the vocabulary is not rebuilt).
     save_to_tokenizer_filepath : str
         Filepath to use for saving the tokenizer
+    save_to_mmap_vocab_dir : str
+        Directory to use for saving the vocabulary of the tokenizer as
+        memory-mappable files.
+    shard_counts_cache_dir : str
+        Directory to cache the word counts of each shard of the text data in when
+        building the tokenizer.
+    max_word_occurrences : int
+        Maximum number of words to keep counts of when building the tokenizer.
     dataset_name : str
         Name of the dataset we are training on. Used to denote saved checkpoints
         during training.
@@ -244,12 +401,20 @@ def train_word2vec(
         Sampling factor to use when computing the probability of keeping a word during random subsampling of words.
     unigram_exponent_negative_sampling : float
         Which exponent to raise the unigram distribution to when performing negative sampling.
+    num_shared_negative_samples : int
+        Number of negative samples to share among all target/context pairs of a batch.
+    training_mode : str
+        Training mode to use, either skip_gram or cbow.
     output_dir : str
         Output directory to save metadata files, checkpoints and intermediate model weights.
     pretrained_model_filepath : str
         Load an already trained word2vec model from file.
     starting_epoch_nr : int
         Epoch number to start the training from.
+    grow_vocab : bool
+        Whether or not to grow the vocabulary (and embedding matrices) of the
+        pretrained word2vec model with the new words of the text data, before
+        continuing training on it.
     train_logs_to_file : bool
         Whether or not to save logs from training to file.
     intermediate_embedding_weights_saves : int
@@ -261,6 +426,38 @@ def train_word2vec(
         (requires NVIDIA GPU, e.g., RTX, Titan V, V100).
     tensorboard_logs_dir : str
         TensorBoard logs directory
+    compiled_corpus_dir : str
+        Directory of a compiled (pre-tokenized) corpus of the text data to read texts
+        from during training. The corpus is compiled to the directory if it does not
+        exist yet.
+    backend : str
+        Training backend to use, either tensorflow, hogwild or tensorflow_data_parallel.
+    num_workers : int
+        Number of worker processes to use with the hogwild and
+        tensorflow_data_parallel backends.
+    steps_per_execution : int
+        Number of training steps to run inside each call to the TensorFlow
+        training function.
+    averaging_interval_steps : int
+        Number of training steps each worker performs between each averaging of the
+        embedding matrices, using the tensorflow_data_parallel backend.
+    sparse_updates : bool
+        Whether or not to update the touched rows of the embedding matrices in-place,
+        bypassing the optimizer.
+    async_saves : bool
+        Whether or not to save intermediate embedding weights and model checkpoints
+        in a background thread while training continues.
+    max_pending_saves : int
+        Maximum number of pending background saves when `async_saves` is True.
+    embedding_storage_dir : str
+        Directory to store the embedding matrices in during training, keeping only
+        the rows of the most common words in memory, using the hogwild backend.
+    hot_vocab_size : int
+        Number of rows of the embedding matrices to keep in memory when
+        `embedding_storage_dir` is specified.
+    profile_steps : tuple of int, optional
+        Range of training steps [start, stop) to capture a TensorFlow profiler trace
+        of into the TensorBoard logs directory, using the tensorflow backend.
     cpu_only : bool
         Whether or not to train on the CPU only
     """
@@ -300,6 +497,16 @@ def train_word2vec(
     print("Initializing word2vec model...")
     if pretrained_model_filepath != "":
         word2vec = load_model(pretrained_model_filepath)
+        if grow_vocab:
+            print("Growing vocabulary...")
+            num_new_words = word2vec.grow_vocab(
+                text_data_filepaths=text_data_filepaths,
+                num_texts=num_texts,
+                min_word_count=min_word_count,
+                sampling_factor=sampling_factor,
+                max_vocab_size=max_vocab_size,
+            )
+            print(f"Done! Added {num_new_words} new words.")
     else:
         # Initialize tokenizer (and build its vocabulary if necessary)
         if tokenizer_filepath == "":
@@ -307,19 +514,28 @@ def train_word2vec(
             tokenizer.build_word_occurrences(
                 filepaths=text_data_filepaths,
                 num_texts=num_texts,
+                shard_counts_cache_dir=shard_counts_cache_dir,
+                max_word_occurrences=max_word_occurrences,
+                recount_min_word_count=min_word_count,
             )
         else:
             print("Loading tokenizer...")
             tokenizer = load_tokenizer(tokenizer_filepath)
-        print("Building vocabulary...")
-        tokenizer.build_vocab(
-            max_vocab_size=max_vocab_size,
-            min_word_count=min_word_count,
-            sampling_factor=sampling_factor,
-        )
+        if tokenizer_filepath != "" and isdir(tokenizer_filepath):
+            print("Using memory-mapped vocabulary...")
+        else:
+            print("Building vocabulary...")
+            tokenizer.build_vocab(
+                max_vocab_size=max_vocab_size,
+                min_word_count=min_word_count,
+                sampling_factor=sampling_factor,
+            )
         if save_to_tokenizer_filepath != "":
             print("Done!\nSaving vocabulary...")
             tokenizer.save(save_to_tokenizer_filepath)
+        if save_to_mmap_vocab_dir != "":
+            print("Done!\nSaving memory-mapped vocabulary...")
+            tokenizer.save_mmap_vocab(save_to_mmap_vocab_dir)
         print("Done!")
 
         word2vec = Word2vec(
@@ -332,6 +548,8 @@ def train_word2vec(
             num_negative_samples=num_negative_samples,
             unigram_exponent_negative_sampling=unigram_exponent_negative_sampling,
             mixed_precision=mixed_precision,
+            training_mode=training_mode,
+            num_shared_negative_samples=num_shared_negative_samples,
         )
     print("Done!")
 
@@ -350,6 +568,17 @@ def train_word2vec(
         starting_epoch_nr=starting_epoch_nr,
         train_logs_to_file=train_logs_to_file,
         intermediate_embedding_weights_saves=intermediate_embedding_weights_saves,
+        compiled_corpus_dir=compiled_corpus_dir,
+        backend=backend,
+        num_workers=num_workers,
+        steps_per_execution=steps_per_execution,
+        averaging_interval_steps=averaging_interval_steps,
+        sparse_updates=sparse_updates,
+        async_saves=async_saves,
+        max_pending_saves=max_pending_saves,
+        embedding_storage_dir=embedding_storage_dir,
+        hot_vocab_size=hot_vocab_size,
+        profile_steps=profile_steps,
     )
 
 
@@ -362,6 +591,9 @@ if __name__ == "__main__":
         text_data_dir=args.text_data_dir,
         tokenizer_filepath=args.tokenizer_filepath,
         save_to_tokenizer_filepath=args.save_to_tokenizer_filepath,
+        save_to_mmap_vocab_dir=args.save_to_mmap_vocab_dir,
+        shard_counts_cache_dir=args.shard_counts_cache_dir,
+        max_word_occurrences=args.max_word_occurrences,
         dataset_name=args.dataset_name,
         batch_size=args.batch_size,
         n_epochs=args.n_epochs,
@@ -374,13 +606,27 @@ if __name__ == "__main__":
         num_negative_samples=args.num_negative_samples,
         sampling_factor=args.sampling_factor,
         unigram_exponent_negative_sampling=args.unigram_exponent_negative_sampling,
+        num_shared_negative_samples=args.num_shared_negative_samples,
+        training_mode=args.training_mode,
         output_dir=args.output_dir,
         pretrained_model_filepath=args.pretrained_model_filepath,
         starting_epoch_nr=args.starting_epoch_nr,
+        grow_vocab=args.grow_vocab,
         train_logs_to_file=args.train_logs_to_file,
         intermediate_embedding_weights_saves=args.intermediate_embedding_weights_saves,
         dynamic_gpu_memory=args.dynamic_gpu_memory,
         mixed_precision=args.mixed_precision,
         tensorboard_logs_dir=args.tensorboard_logs_dir,
+        compiled_corpus_dir=args.compiled_corpus_dir,
+        backend=args.backend,
+        num_workers=args.num_workers,
+        steps_per_execution=args.steps_per_execution,
+        averaging_interval_steps=args.averaging_interval_steps,
+        sparse_updates=args.sparse_updates,
+        async_saves=args.async_saves,
+        max_pending_saves=args.max_pending_saves,
+        embedding_storage_dir=args.embedding_storage_dir,
+        hot_vocab_size=args.hot_vocab_size,
+        profile_steps=args.profile_steps,
         cpu_only=args.cpu_only,
     )
@@ -0,0 +1,390 @@
+import argparse
+import os
+import sys
+from datetime import datetime
+from itertools import product
+from os.path import isdir, join
+
+sys.path.append("..")
+
+from utils import get_all_filepaths, text_files_total_line_count  # noqa: E402
+from word_embeddings.tokenizer import Tokenizer, load_tokenizer  # noqa: E402
+from word_embeddings.train_utils import enable_dynamic_gpu_memory  # noqa: E402
+from word_embeddings.word2vec import Word2vec  # noqa: E402
+from word_embeddings.word2vec_sweep import fit_sweep  # noqa: E402
+
+
+def parse_args() -> argparse.Namespace:
+    """
+    Parses arguments sent to the python script.
+
+    Returns
+    -------
+    parsed_args : argparse.Namespace
+        Parsed arguments
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--text_data_filepath",
+        type=str,
+        default="",
+        help="Text filepath containing the text we wish to train on",
+    )
+    parser.add_argument(
+        "--text_data_dir",
+        type=str,
+        default="",
+        help="Directory containing text files we wish to train on",
+    )
+    parser.add_argument(
+        "--tokenizer_filepath",
+        type=str,
+        default="",
+        help="Filepath of a built tokenizer, or directory of a memory-mapped "
+        "vocabulary (in which case the vocabulary is not rebuilt)",
+    )
+    parser.add_argument(
+        "--dataset_name",
+        type=str,
+        default="",
+        help="Name of the dataset we are training on. "
+        "Used to denote saved checkpoints during training",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=256,
+        help="Batch size used for training (shared by all models)",
+    )
+    parser.add_argument(
+        "--n_epochs",
+        type=int,
+        default=5,
+        help="Number of epochs to train our models on",
+    )
+    parser.add_argument(
+        "--learning_rates",
+        type=float,
+        nargs="+",
+        default=[0.025],
+        help="Learning rates to sweep over",
+    )
+    parser.add_argument(
+        "--min_learning_rate",
+        type=float,
+        default=0.0000025,
+        help="Minimum learning rate to use when training",
+    )
+    parser.add_argument(
+        "--max_vocab_size",
+        type=int,
+        default=-1,
+        help="Maximum vocabulary size to use when training. Defaults to use all words",
+    )
+    parser.add_argument(
+        "--min_word_count",
+        type=int,
+        default=5,
+        help="Minimum number of times a word might occur for it to be in the vocabulary",
+    )
+    parser.add_argument(
+        "--embedding_dims",
+        type=int,
+        nargs="+",
+        default=[300],
+        help="Numbers of latent dimensions of the embedding layers to sweep over",
+    )
+    parser.add_argument(
+        "--max_window_size",
+        type=int,
+        default=5,
+        help="Maximum window size to use when generating skip-gram couples "
+        "(shared by all models)",
+    )
+    parser.add_argument(
+        "--num_negative_samples",
+        type=int,
+        nargs="+",
+        default=[10],
+        help="Numbers of negative samples to sweep over",
+    )
+    parser.add_argument(
+        "--sampling_factor",
+        type=float,
+        default=1e-5,
+        help="Sampling factor to use when computing the probability of "
+        "keeping a word during random subsampling of words",
+    )
+    parser.add_argument(
+        "--unigram_exponents_negative_sampling",
+        type=float,
+        nargs="+",
+        default=[3 / 4],
+        help="Exponents to raise the unigram distribution to when performing "
+        "negative sampling to sweep over",
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        default="output",
+        help="Output directory to save the output directory of each model to",
+    )
+    parser.add_argument(
+        "--train_logs_to_file",
+        default=False,
+        action="store_true",
+        help="Whether or not to save logs from training to file",
+    )
+    parser.add_argument(
+        "--intermediate_embedding_weights_saves",
+        type=int,
+        default=0,
+        help="Number of intermediate saves of embedding weights per epoch during training",
+    )
+    parser.add_argument(
+        "--dynamic_gpu_memory",
+        default=False,
+        action="store_true",
+        help="Whether or not to enable dynamic GPU memory",
+    )
+    parser.add_argument(
+        "--compiled_corpus_dir",
+        type=str,
+        default="",
+        help="Directory of a compiled (pre-tokenized) corpus of the text data to "
+        "read texts from during training. The corpus is compiled to the directory "
+        "if it does not exist yet",
+    )
+    parser.add_argument(
+        "--sparse_updates",
+        default=False,
+        action="store_true",
+        help="Whether or not to update the touched rows of the embedding matrices "
+        "in-place (closed-form gradients), bypassing the optimizer",
+    )
+    parser.add_argument(
+        "--cpu_only",
+        default=False,
+        action="store_true",
+        help="Whether or not to train on the CPU only",
+    )
+    return parser.parse_args()
+
+
+def train_word2vec_sweep(
+    text_data_filepath: str,
+    text_data_dir: str,
+    tokenizer_filepath: str,
+    dataset_name: str,
+    batch_size: int,
+    n_epochs: int,
+    learning_rates: list,
+    min_learning_rate: float,
+    max_vocab_size: int,
+    min_word_count: int,
+    embedding_dims: list,
+    max_window_size: int,
+    num_negative_samples: list,
+    sampling_factor: float,
+    unigram_exponents_negative_sampling: list,
+    output_dir: str,
+    train_logs_to_file: bool,
+    intermediate_embedding_weights_saves: int,
+    dynamic_gpu_memory: bool,
+    compiled_corpus_dir: str,
+    sparse_updates: bool,
+    cpu_only: bool,
+) -> None:
+    """
+    Trains word2vec models using skip-gram negative sampling for every combination
+    of the swept hyperparameters, sharing a single input pipeline.
+
+    Parameters
+    ----------
+    text_data_filepath : str
+        Text filepath containing the text we wish to train on.
+    text_data_dir : str
+        Directory containing text files we wish to train on.
+    tokenizer_filepath : str
+        Filepath of a built tokenizer, or directory of a memory-mapped vocabulary (in
+        which case the vocabulary is not rebuilt).
+    dataset_name : str
+        Name of the dataset we are training on. Used to denote saved checkpoints
+        during training.
+    batch_size : int
+        Batch size used for training (shared by all models).
+    n_epochs : int
+        Number of epochs to train our models on.
+    learning_rates : list of float
+        Learning rates to sweep over.
+    min_learning_rate : float
+        Minimum learning rate to use when training.
+    max_vocab_size : int
+        Maximum vocabulary size to use when training.
+    min_word_count : int
+        Minimum number of times a word might occur for it to be in the vocabulary.
+    embedding_dims : list of int
+        Numbers of latent dimensions of the embedding layers to sweep over.
+    max_window_size : int
+        Maximum window size to use when generating skip-gram couples (shared by
+        all models).
+    num_negative_samples : list of int
+        Numbers of negative samples to sweep over.
+    sampling_factor : float
+        Sampling factor to use when computing the probability of keeping a word
+        during random subsampling of words.
+    unigram_exponents_negative_sampling : list of float
+        Exponents to raise the unigram distribution to when performing negative
+        sampling to sweep over.
+    output_dir : str
+        Output directory to save the output directory of each model to.
+    train_logs_to_file : bool
+        Whether or not to save logs from training to file.
+    intermediate_embedding_weights_saves : int
+        Number of intermediate saves of embedding weights per epoch during training.
+    dynamic_gpu_memory : bool
+        Whether or not to enable dynamic GPU memory.
+    compiled_corpus_dir : str
+        Directory of a compiled (pre-tokenized) corpus of the text data to read texts
+        from during training. The corpus is compiled to the directory if it does not
+        exist yet.
+    sparse_updates : bool
+        Whether or not to update the touched rows of the embedding matrices in-place,
+        bypassing the optimizer.
+    cpu_only : bool
+        Whether or not to train on the CPU only
+    """
+    if (
+        text_data_filepath == ""
+        and text_data_dir == ""
+        or (text_data_filepath != "" and text_data_dir != "")
+    ):
+        raise ValueError(
+            "Either text_data_filepath or text_data_dir has to be specified."
+        )
+
+    if text_data_filepath != "":
+        text_data_filepaths = [text_data_filepath]
+    else:
+        text_data_filepaths = get_all_filepaths(text_data_dir, ".txt")
+
+    if cpu_only:
+        os.environ["CUDA_DEVICE_ORDER"] = "PCI_BUS_ID"
+        os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+        print("Only using CPU!")
+
+    # Count number of lines in text data file.
+    print("Counting lines in text data files...")
+    num_texts = text_files_total_line_count(text_data_filepaths)
+    print("Done!")
+
+    if dynamic_gpu_memory and not cpu_only:
+        if enable_dynamic_gpu_memory():
+            print("Enabled dynamic GPU memory!")
+
+    # Initialize tokenizer (and build its vocabulary if necessary)
+    if tokenizer_filepath == "":
+        tokenizer = Tokenizer()
+        tokenizer.build_word_occurrences(
+            filepaths=text_data_filepaths,
+            num_texts=num_texts,
+        )
+    else:
+        print("Loading tokenizer...")
+        tokenizer = load_tokenizer(tokenizer_filepath)
+    if tokenizer_filepath != "" and isdir(tokenizer_filepath):
+        print("Using memory-mapped vocabulary...")
+    else:
+        print("Building vocabulary...")
+        tokenizer.build_vocab(
+            max_vocab_size=max_vocab_size,
+            min_word_count=min_word_count,
+            sampling_factor=sampling_factor,
+        )
+    print("Done!")
+
+    # Append date/time to output directory.
+    output_dir = join(output_dir, datetime.now().strftime("%d-%b-%Y_%H-%M-%S"))
+
+    # Initialize one word2vec instance (and output directory) per combination
+    # of hyperparameters
+    print("Initializing word2vec models...")
+    word2vecs = []
+    output_dirs = []
+    for (
+        embedding_dim,
+        num_negative_samples_value,
+        unigram_exponent_negative_sampling,
+        learning_rate,
+    ) in product(
+        embedding_dims,
+        num_negative_samples,
+        unigram_exponents_negative_sampling,
+        learning_rates,
+    ):
+        word2vecs.append(
+            Word2vec(
+                tokenizer=tokenizer,
+                embedding_dim=embedding_dim,
+                learning_rate=learning_rate,
+                min_learning_rate=min_learning_rate,
+                batch_size=batch_size,
+                max_window_size=max_window_size,
+                num_negative_samples=num_negative_samples_value,
+                unigram_exponent_negative_sampling=unigram_exponent_negative_sampling,
+            )
+        )
+        output_dirs.append(
+            join(
+                output_dir,
+                f"embedding_dim_{embedding_dim}"
+                f"-num_negative_samples_{num_negative_samples_value}"
+                f"-unigram_exponent_negative_sampling_{unigram_exponent_negative_sampling:g}"
+                f"-learning_rate_{learning_rate:g}",
+            )
+        )
+    print(f"Done! Initialized {len(word2vecs)} models.")
+
+    # Train models
+    fit_sweep(
+        word2vecs=word2vecs,
+        output_dirs=output_dirs,
+        text_data_filepaths=text_data_filepaths,
+        num_texts=num_texts,
+        dataset_name=dataset_name,
+        n_epochs=n_epochs,
+        intermediate_embedding_weights_saves=intermediate_embedding_weights_saves,
+        train_logs_to_file=train_logs_to_file,
+        compiled_corpus_dir=compiled_corpus_dir,
+        sparse_updates=sparse_updates,
+    )
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # Perform training
+    train_word2vec_sweep(
+        text_data_filepath=args.text_data_filepath,
+        text_data_dir=args.text_data_dir,
+        tokenizer_filepath=args.tokenizer_filepath,
+        dataset_name=args.dataset_name,
+        batch_size=args.batch_size,
+        n_epochs=args.n_epochs,
+        learning_rates=args.learning_rates,
+        min_learning_rate=args.min_learning_rate,
+        max_vocab_size=args.max_vocab_size,
+        min_word_count=args.min_word_count,
+        embedding_dims=args.embedding_dims,
+        max_window_size=args.max_window_size,
+        num_negative_samples=args.num_negative_samples,
+        sampling_factor=args.sampling_factor,
+        unigram_exponents_negative_sampling=args.unigram_exponents_negative_sampling,
+        output_dir=args.output_dir,
+        train_logs_to_file=args.train_logs_to_file,
+        intermediate_embedding_weights_saves=args.intermediate_embedding_weights_saves,
+        dynamic_gpu_memory=args.dynamic_gpu_memory,
+        compiled_corpus_dir=args.compiled_corpus_dir,
+        sparse_updates=args.sparse_updates,
+        cpu_only=args.cpu_only,
+    )
@@ -1,12 +1,837 @@
-from collections import Counter
-from itertools import chain, tee, zip_longest
+import multiprocessing
+import sys
+from itertools import chain, compress, islice, repeat
+from multiprocessing import cpu_count
 from os import makedirs
-from os.path import basename, join
-from typing import Iterable, Iterator, List, Optional, Union
+from os.path import basename, isfile, join
+from typing import Dict, List, Optional, Tuple
 
-import tensorflow as tf
+import joblib
+import numpy as np
 from tqdm import tqdm
 
+sys.path.append("..")
+
+from utils import get_text_files_shards, read_text_file_shard  # noqa: E402
+
+# Number of bits to shift the word id of the left word of a bigram by when packing
+# a bigram into a 64-bit key, i.e. key = (left word id << 32) | right word id
+BIGRAM_KEY_SHIFT = np.uint64(32)
+BIGRAM_KEY_RIGHT_MASK = np.uint64(0xFFFFFFFF)
+
+# Number of lines to replace phrases in at a time when writing new text data files
+APPLY_PHRASES_BATCH_SIZE = 10000
+
+# Fraction of the maximum number of bigrams to keep when pruning bigram occurrences.
+# Pruning to less than the maximum leaves room for new bigrams, such that pruning
+# is not needed again right away
+BIGRAM_OCCURRENCES_PRUNING_FRACTION = 0.5
+
+# Filename of the phrase model saved by `Word2phrase.fit`
+PHRASE_MODEL_FILENAME = "phrase_model.joblib"
+
+# Multiprocessing variable dict
+mp_var_dict: dict = {}
+
+
+def _add_word_ids(word_to_id: Dict[str, int], words: List[str]) -> np.ndarray:
+    """
+    Maps words to word ids, adding new words to the vocabulary (in order of first
+    occurrence).
+
+    Parameters
+    ----------
+    word_to_id : dict
+        Vocabulary of words to word ids, which is updated in-place.
+    words : list of str
+        Words to map to word ids.
+
+    Returns
+    -------
+    word_ids : np.ndarray
+        Word ids of the words.
+    """
+    new_words = [word for word in dict.fromkeys(words) if word not in word_to_id]
+    word_to_id.update(
+        zip(new_words, range(len(word_to_id), len(word_to_id) + len(new_words)))
+    )
+    return np.fromiter(
+        map(word_to_id.__getitem__, words), dtype=np.int64, count=len(words)
+    )
+
+
+def _bigram_keys(left_word_ids: np.ndarray, right_word_ids: np.ndarray) -> np.ndarray:
+    """
+    Packs bigrams of word ids into 64-bit keys.
+
+    Parameters
+    ----------
+    left_word_ids : np.ndarray
+        Word ids of the left words of the bigrams.
+    right_word_ids : np.ndarray
+        Word ids of the right words of the bigrams.
+
+    Returns
+    -------
+    bigram_keys : np.ndarray
+        Bigram keys (uint64).
+    """
+    return (
+        left_word_ids.astype(np.uint64) << BIGRAM_KEY_SHIFT
+    ) | right_word_ids.astype(np.uint64)
+
+
+def _split_bigram_keys(bigram_keys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Unpacks 64-bit bigram keys into bigrams of word ids (see `_bigram_keys`).
+
+    Parameters
+    ----------
+    bigram_keys : np.ndarray
+        Bigram keys.
+
+    Returns
+    -------
+    result : tuple of np.ndarray
+        Word ids of the left and right words of the bigrams.
+    """
+    return (
+        (bigram_keys >> BIGRAM_KEY_SHIFT).astype(np.int64),
+        (bigram_keys & BIGRAM_KEY_RIGHT_MASK).astype(np.int64),
+    )
+
+
+def _reduce_bigram_counts(
+    bigram_keys: np.ndarray, bigram_counts: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorts bigram keys and sums the counts of equal keys.
+
+    Parameters
+    ----------
+    bigram_keys : np.ndarray
+        Bigram keys (see `_bigram_keys`).
+    bigram_counts : np.ndarray
+        Counts of each bigram key.
+
+    Returns
+    -------
+    result : tuple of np.ndarray
+        Unique (sorted) bigram keys and their summed counts.
+    """
+    if len(bigram_keys) == 0:
+        return bigram_keys.astype(np.uint64), bigram_counts.astype(np.int64)
+    sorted_indices = np.argsort(bigram_keys, kind="stable")
+    bigram_keys = bigram_keys[sorted_indices]
+    is_first_key = np.empty(len(bigram_keys), dtype=bool)
+    is_first_key[0] = True
+    np.not_equal(bigram_keys[1:], bigram_keys[:-1], out=is_first_key[1:])
+    first_key_indices = np.flatnonzero(is_first_key)
+    return (
+        bigram_keys[first_key_indices],
+        np.add.reduceat(bigram_counts[sorted_indices], first_key_indices),
+    )
+
+
+def _lines_bigram_mask(line_lengths: np.ndarray, num_words: int) -> np.ndarray:
+    """
+    Gets a mask of which pairs of consecutive words of a (flat) list of words of
+    multiple lines are bigrams, i.e. do not span two lines.
+
+    Parameters
+    ----------
+    line_lengths : np.ndarray
+        Number of words of each line.
+    num_words : int
+        Total number of words of the lines.
+
+    Returns
+    -------
+    bigram_mask : np.ndarray
+        Mask of length `num_words` - 1, where entry i is True if words i and i + 1
+        are in the same line.
+    """
+    bigram_mask = np.ones(max(num_words - 1, 0), dtype=bool)
+    line_end_indices = np.cumsum(line_lengths) - 1
+    bigram_mask[
+        line_end_indices[(line_end_indices >= 0) & (line_end_indices < num_words - 1)]
+    ] = False
+    return bigram_mask
+
+
+def _greedy_phrase_indices(candidate_indices: np.ndarray) -> List[int]:
+    """
+    Selects the phrases to combine into single words from left to right, skipping
+    the next pair of words of each selected phrase, since the pair is combined into
+    a single word.
+
+    Parameters
+    ----------
+    candidate_indices : np.ndarray
+        Sorted indices of the first words of the candidate phrases.
+
+    Returns
+    -------
+    phrase_indices : list of int
+        Indices of the first words of the phrases to combine.
+    """
+    phrase_indices = []
+    last_phrase_idx = -2
+    for phrase_idx in candidate_indices.tolist():
+        if phrase_idx == last_phrase_idx + 1:
+            continue
+        phrase_indices.append(phrase_idx)
+        last_phrase_idx = phrase_idx
+    return phrase_indices
+
+
+class _BigramCounts:
+    """
+    Bigram occurrences, stored as unique (sorted) bigram keys and their counts (see
+    `_bigram_keys`). Added bigram occurrences are merged lazily, i.e. once they
+    outnumber the merged ones.
+
+    To bound the memory usage, the number of bigrams to keep counts of can be
+    limited. Once the limit is exceeded, the bigrams with a count of at most some
+    threshold are removed, similar to ReduceVocab of word2phrase.c. The threshold is
+    the smallest one that prunes the bigrams to at most `max_bigram_occurrences *
+    BIGRAM_OCCURRENCES_PRUNING_FRACTION` bigrams, but never less than the previous
+    threshold. The count of a bigram that is removed (and possibly counted again
+    later) is thus underestimated by at most the threshold.
+    """
+
+    def __init__(self, max_bigram_occurrences: int = -1) -> None:
+        """
+        Initializes the _BigramCounts class.
+
+        Parameters
+        ----------
+        max_bigram_occurrences : int, optional
+            Maximum number of bigrams to keep counts of (defaults to -1, i.e. no
+            maximum).
+        """
+        self._max_bigram_occurrences = max_bigram_occurrences
+        self._keys = np.zeros(0, dtype=np.uint64)
+        self._counts = np.zeros(0, dtype=np.int64)
+        self._pending_keys: List[np.ndarray] = []
+        self._pending_counts: List[np.ndarray] = []
+        self._num_pending = 0
+
+        # Pruning statistics
+        self.num_prunes = 0
+        self.threshold = 0
+        self.error_bound = 0
+
+    def add(
+        self,
+        keys: np.ndarray,
+        counts: Optional[np.ndarray] = None,
+        other: Optional["_BigramCounts"] = None,
+    ) -> None:
+        """
+        Adds bigram occurrences.
+
+        Parameters
+        ----------
+        keys : np.ndarray
+            Bigram keys.
+        counts : np.ndarray, optional
+            Counts of each bigram key (defaults to None, i.e. one occurrence of each).
+        other : _BigramCounts, optional
+            Bigram occurrences `keys` and `counts` originate from, whose pruning
+            statistics are added (defaults to None).
+        """
+        if counts is None:
+            counts = np.ones(len(keys), dtype=np.int64)
+        self._pending_keys.append(keys)
+        self._pending_counts.append(counts)
+        self._num_pending += len(keys)
+        if other is not None:
+            self.num_prunes += other.num_prunes
+            self.threshold = max(self.threshold, other.threshold)
+            self.error_bound += other.error_bound
+        if self._num_pending >= len(self._keys) or (
+            self._max_bigram_occurrences > 0
+            and len(self._keys) + self._num_pending > self._max_bigram_occurrences
+        ):
+            self._merge()
+
+    def _merge(self) -> None:
+        """
+        Merges the pending bigram occurrences and prunes the bigram occurrences, if
+        they exceed the maximum number of bigrams.
+        """
+        self._keys, self._counts = _reduce_bigram_counts(
+            np.concatenate([self._keys] + self._pending_keys),
+            np.concatenate([self._counts] + self._pending_counts),
+        )
+        self._pending_keys = []
+        self._pending_counts = []
+        self._num_pending = 0
+        if 0 < self._max_bigram_occurrences < len(self._keys):
+
+            # Find the count of the (num_kept_bigrams + 1)-th most occurring bigram
+            num_kept_bigrams = int(
+                self._max_bigram_occurrences * BIGRAM_OCCURRENCES_PRUNING_FRACTION
+            )
+            threshold = int(
+                -np.partition(-self._counts, num_kept_bigrams)[num_kept_bigrams]
+            )
+            self.threshold = max(self.threshold, threshold)
+            keep_bigrams = self._counts > self.threshold
+            self._keys = self._keys[keep_bigrams]
+            self._counts = self._counts[keep_bigrams]
+            self.num_prunes += 1
+            self.error_bound += self.threshold
+
+    def result(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Gets the bigram occurrences.
+
+        Returns
+        -------
+        result : tuple of np.ndarray
+            Unique (sorted) bigram keys and their counts.
+        """
+        if self._num_pending > 0:
+            self._merge()
+        return self._keys, self._counts
+
+    def __getstate__(self):
+        """
+        Gets the internal state of the class, merging pending bigram occurrences
+        first (e.g. before sending the bigram occurrences to another process).
+        """
+        self.result()
+        return self.__dict__
+
+
+def _lines_bigram_keys(
+    lines_words: List[List[str]], word_to_id: Dict[str, int]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Maps the words of lines to word ids (see `_add_word_ids`) and packs the bigrams
+    of each line into bigram keys.
+
+    Parameters
+    ----------
+    lines_words : list of list of str
+        Words of each line.
+    word_to_id : dict
+        Vocabulary of words to word ids, which is updated in-place.
+
+    Returns
+    -------
+    result : tuple of np.ndarray
+        Word ids of the words of the lines and bigram keys of the lines.
+    """
+    words = list(chain.from_iterable(lines_words))
+    word_ids = _add_word_ids(word_to_id, words)
+    line_lengths = np.fromiter(
+        map(len, lines_words), dtype=np.int64, count=len(lines_words)
+    )
+    bigram_mask = _lines_bigram_mask(line_lengths, len(words))
+    return word_ids, _bigram_keys(word_ids[:-1][bigram_mask], word_ids[1:][bigram_mask])
+
+
+def _count_text_file_shard_phrases(
+    shard: Tuple[str, int, int],
+) -> Tuple[List[str], np.ndarray, _BigramCounts, int]:
+    """
+    Counts the unigram and bigram word occurrences of a text file shard (used in
+    `Word2phrase._build_word_occurrences`). The words of the shard are mapped to
+    (shard-local) word ids, such that the bigrams can be counted as 64-bit keys.
+    The bigram occurrences are limited to the maximum number of bigrams of
+    `mp_var_dict` (see `_BigramCounts`).
+
+    Parameters
+    ----------
+    shard : tuple of str, int and int
+        Filepath of text file and start and end byte offsets of the shard (see
+        `get_text_files_shards`).
+
+    Returns
+    -------
+    result : tuple of list of str, np.ndarray, _BigramCounts and int
+        Words of the shard (i.e. word ids to words) ordered by first occurrence,
+        unigram counts of each word id, bigram occurrences of the shard and the
+        number of lines of the shard.
+    """
+    word_to_id: Dict[str, int] = {}
+    unigram_counts = np.zeros(0, dtype=np.int64)
+    bigram_counts = _BigramCounts(mp_var_dict["max_bigram_occurrences"])
+    num_lines = 0
+    for text_block in read_text_file_shard(*shard):
+        word_ids, bigram_keys = _lines_bigram_keys(
+            [line.split() for line in text_block.split("\n")], word_to_id
+        )
+
+        # Count unigram word occurrences
+        unigram_counts = np.pad(
+            unigram_counts, (0, len(word_to_id) - len(unigram_counts))
+        )
+        unigram_counts += np.bincount(word_ids, minlength=len(word_to_id))
+
+        # Count bigram word occurrences
+        bigram_counts.add(bigram_keys)
+        num_lines += text_block.count("\n")
+    return list(word_to_id), unigram_counts, bigram_counts, num_lines
+
+
+def _recount_text_file_shard_bigrams(
+    shard: Tuple[str, int, int],
+) -> Tuple[_BigramCounts, int]:
+    """
+    Counts the occurrences of the candidate bigrams of `mp_var_dict` in a text file
+    shard exactly, using the vocabulary of `mp_var_dict` (used in
+    `Word2phrase._build_word_occurrences`).
+
+    Parameters
+    ----------
+    shard : tuple of str, int and int
+        Filepath of text file and start and end byte offsets of the shard (see
+        `get_text_files_shards`).
+
+    Returns
+    -------
+    result : tuple of _BigramCounts and int
+        Occurrences of the candidate bigrams of the shard and the number of lines of
+        the shard.
+    """
+    word_to_id: Dict[str, int] = mp_var_dict["word_to_id"]
+    candidate_bigram_keys: np.ndarray = mp_var_dict["candidate_bigram_keys"]
+    bigram_counts = _BigramCounts()
+    num_lines = 0
+    for text_block in read_text_file_shard(*shard):
+        _, bigram_keys = _lines_bigram_keys(
+            [line.split() for line in text_block.split("\n")], word_to_id
+        )
+        candidate_indices = np.minimum(
+            np.searchsorted(candidate_bigram_keys, bigram_keys),
+            len(candidate_bigram_keys) - 1,
+        )
+        bigram_counts.add(
+            bigram_keys[candidate_bigram_keys[candidate_indices] == bigram_keys]
+        )
+        num_lines += text_block.count("\n")
+    return bigram_counts, num_lines
+
+
+def _apply_phrase_model_to_text_file_shard(
+    shard: Tuple[str, int, int],
+) -> Tuple[str, int]:
+    """
+    Replaces phrases in a text file shard with single words, using the phrase model
+    of `mp_var_dict` (used in `PhraseModel.apply_file`).
+
+    Parameters
+    ----------
+    shard : tuple of str, int and int
+        Filepath of text file and start and end byte offsets of the shard (see
+        `get_text_files_shards`).
+
+    Returns
+    -------
+    result : tuple of str and int
+        Lines of the shard where phrases have been replaced with single words,
+        separated by newlines, and the number of lines of the shard.
+    """
+    phrase_model: PhraseModel = mp_var_dict["phrase_model"]
+    new_lines = []
+    for text_block in read_text_file_shard(*shard):
+        lines = text_block.split("\n")
+        if text_block.endswith("\n"):
+            lines.pop()
+        new_lines.extend(phrase_model.apply_lines(lines))
+    return "\n".join(new_lines), len(new_lines)
+
+
+class PhraseModel:
+    """
+    Frozen phrase model, consisting of the phrases accepted in each epoch of
+    `Word2phrase.fit`. Applying the phrase model to text replaces the same phrases
+    with single words as `Word2phrase.fit`, without counting any word occurrences.
+
+    The words of the phrases are mapped to word ids, and the phrases of each epoch
+    are stored as sorted 64-bit keys of word ids (see `_bigram_keys`), along with the
+    word id of the combined phrase and its score.
+    """
+
+    def __init__(self, phrase_sep: str) -> None:
+        """
+        Initializes the PhraseModel class.
+
+        Parameters
+        ----------
+        phrase_sep : str
+            Separator to use when combining phrases.
+        """
+        self._phrase_sep = phrase_sep
+        self._words: List[str] = []
+        self._word_to_id: Dict[str, int] = {}
+        self._epoch_phrase_keys: List[np.ndarray] = []
+        self._epoch_phrase_word_ids: List[np.ndarray] = []
+        self._epoch_phrase_scores: List[np.ndarray] = []
+        self._epoch_thresholds: List[float] = []
+
+    @property
+    def phrase_sep(self) -> str:
+        """
+        Gets the separator used when combining phrases.
+
+        Returns
+        -------
+        phrase_sep : str
+            Separator used when combining phrases.
+        """
+        return self._phrase_sep
+
+    @property
+    def num_epochs(self) -> int:
+        """
+        Gets the number of epochs of the phrase model.
+
+        Returns
+        -------
+        num_epochs : int
+            Number of epochs of the phrase model.
+        """
+        return len(self._epoch_phrase_keys)
+
+    def add_phrases(
+        self,
+        left_words: List[str],
+        right_words: List[str],
+        scores: np.ndarray,
+        threshold: float,
+    ) -> None:
+        """
+        Adds the phrases accepted in an epoch.
+
+        Parameters
+        ----------
+        left_words : list of str
+            Left words of the phrases.
+        right_words : list of str
+            Right words of the phrases.
+        scores : np.ndarray
+            Scores of the phrases.
+        threshold : float
+            Threshold used to accept the phrases.
+        """
+        phrase_words = [
+            f"{left_word}{self._phrase_sep}{right_word}"
+            for left_word, right_word in zip(left_words, right_words)
+        ]
+        phrase_keys = _bigram_keys(
+            _add_word_ids(self._word_to_id, left_words),
+            _add_word_ids(self._word_to_id, right_words),
+        )
+        phrase_word_ids = _add_word_ids(self._word_to_id, phrase_words)
+        self._words.extend(islice(self._word_to_id, len(self._words), None))
+        sorted_indices = np.argsort(phrase_keys)
+        self._epoch_phrase_keys.append(phrase_keys[sorted_indices])
+        self._epoch_phrase_word_ids.append(phrase_word_ids[sorted_indices])
+        self._epoch_phrase_scores.append(
+            np.asarray(scores, dtype=np.float32)[sorted_indices]
+        )
+        self._epoch_thresholds.append(threshold)
+
+    def get_phrases(self, epoch: int) -> Dict[Tuple[str, str], float]:
+        """
+        Gets the phrases accepted in an epoch and their scores.
+
+        Parameters
+        ----------
+        epoch : int
+            Epoch number (starting from 1).
+
+        Returns
+        -------
+        phrases : dict
+            Dictionary of phrases (i.e. left and right words) to scores.
+        """
+        left_word_ids, right_word_ids = _split_bigram_keys(
+            self._epoch_phrase_keys[epoch - 1]
+        )
+        return {
+            (self._words[left_word_id], self._words[right_word_id]): score
+            for left_word_id, right_word_id, score in zip(
+                left_word_ids.tolist(),
+                right_word_ids.tolist(),
+                self._epoch_phrase_scores[epoch - 1].tolist(),
+            )
+        }
+
+    def apply_lines(self, lines: List[str]) -> List[str]:
+        """
+        Replaces phrases in lines of text with single words.
+
+        Parameters
+        ----------
+        lines : list of str
+            Lines of text, where each word is separated by whitespace.
+
+        Returns
+        -------
+        new_lines : list of str
+            Lines of text where phrases have been replaced with single words.
+        """
+        lines_words = [line.split() for line in lines]
+        words = list(chain.from_iterable(lines_words))
+        word_ids = np.fromiter(
+            map(self._word_to_id.get, words, repeat(-1)),
+            dtype=np.int64,
+            count=len(words),
+        )
+        line_lengths = np.fromiter(
+            map(len, lines_words), dtype=np.int64, count=len(lines_words)
+        )
+
+        # Unknown words keep their index into `words`, such that they can be
+        # written as they are
+        word_indices = np.arange(len(words))
+        for phrase_keys, phrase_word_ids in zip(
+            self._epoch_phrase_keys, self._epoch_phrase_word_ids
+        ):
+            if len(phrase_keys) == 0 or len(word_ids) < 2:
+                continue
+
+            # Look up bigrams of known words within lines
+            bigram_mask = _lines_bigram_mask(line_lengths, len(word_ids))
+            bigram_mask &= (word_ids[:-1] >= 0) & (word_ids[1:] >= 0)
+            bigram_indices = np.flatnonzero(bigram_mask)
+            bigram_keys = _bigram_keys(
+                word_ids[bigram_indices], word_ids[bigram_indices + 1]
+            )
+            phrase_indices = np.minimum(
+                np.searchsorted(phrase_keys, bigram_keys), len(phrase_keys) - 1
+            )
+            known_phrases = phrase_keys[phrase_indices] == bigram_keys
+            phrase_indices = phrase_indices[known_phrases]
+            candidate_indices = bigram_indices[known_phrases]
+
+            # Combine each phrase into a single word
+            selected = np.isin(
+                candidate_indices, _greedy_phrase_indices(candidate_indices)
+            )
+            candidate_indices = candidate_indices[selected]
+            if len(candidate_indices) == 0:
+                continue
+            word_ids[candidate_indices] = phrase_word_ids[phrase_indices[selected]]
+            keep_words = np.ones(len(word_ids), dtype=bool)
+            keep_words[candidate_indices + 1] = False
+            line_lengths = line_lengths - np.bincount(
+                np.searchsorted(
+                    np.cumsum(line_lengths), candidate_indices, side="right"
+                ),
+                minlength=len(line_lengths),
+            )
+            word_ids = word_ids[keep_words]
+            word_indices = word_indices[keep_words]
+
+        # Join words of each line
+        new_words = [
+            self._words[word_id] if word_id >= 0 else words[word_idx]
+            for word_id, word_idx in zip(word_ids.tolist(), word_indices.tolist())
+        ]
+        new_lines = []
+        line_start = 0
+        for line_length in line_lengths.tolist():
+            new_lines.append(" ".join(new_words[line_start : line_start + line_length]))
+            line_start += line_length
+        return new_lines
+
+    def apply(self, tokens: List[str]) -> List[str]:
+        """
+        Replaces phrases in a sequence of tokens with single words.
+
+        Parameters
+        ----------
+        tokens : list of str
+            Tokens (words) of a text.
+
+        Returns
+        -------
+        new_tokens : list of str
+            Tokens where phrases have been replaced with single words.
+        """
+        return self.apply_lines([" ".join(tokens)])[0].split()
+
+    def apply_file(
+        self,
+        input_filepath: str,
+        output_filepath: str,
+        num_workers: int = -1,
+        shard_size: int = 64 * 1024 * 1024,
+    ) -> int:
+        """
+        Writes a text file where phrases have been replaced with single words. The
+        text file is split into byte-range shards, which are processed in separate
+        processes and written in order.
+
+        Parameters
+        ----------
+        input_filepath : str
+            Filepath of the text file to replace phrases in.
+        output_filepath : str
+            Filepath of the new text file.
+        num_workers : int, optional
+            Number of processes to replace phrases in (defaults to -1, i.e. use all
+            CPUs).
+        shard_size : int, optional
+            Size of each shard of the text file in bytes (defaults to 64 MiB).
+
+        Returns
+        -------
+        num_lines : int
+            Number of lines written.
+        """
+        if num_workers == -1:
+            num_workers = cpu_count()
+        shards = get_text_files_shards([input_filepath], shard_size)
+        num_lines = 0
+        mp_var_dict["phrase_model"] = self
+        try:
+            with open(output_filepath, "w") as output_file:
+                with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+                    for text, shard_num_lines in tqdm(
+                        pool.imap(_apply_phrase_model_to_text_file_shard, shards),
+                        desc="- Replacing phrases",
+                        total=len(shards),
+                    ):
+                        if shard_num_lines == 0:
+                            continue
+                        if num_lines > 0:
+                            output_file.write("\n")
+                        output_file.write(text)
+                        num_lines += shard_num_lines
+        finally:
+            del mp_var_dict["phrase_model"]
+        return num_lines
+
+    def save(self, destination_filepath: str) -> None:
+        """
+        Saves the phrase model to file.
+
+        Parameters
+        ----------
+        destination_filepath : str
+            Where to save the phrase model to.
+        """
+        joblib.dump(self, destination_filepath, protocol=4)
+
+    def __getstate__(self):
+        """
+        Gets the internal state of the class, excluding the words to word ids
+        dictionary, which is rebuilt from the list of words when loading.
+        """
+        state = self.__dict__.copy()
+        del state["_word_to_id"]
+        return state
+
+    def __setstate__(self, state) -> None:
+        """
+        Sets the internal state of the class, rebuilding the words to word ids
+        dictionary.
+        """
+        self.__dict__.update(state)
+        self._word_to_id = {word: word_id for word_id, word in enumerate(self._words)}
+
+
+def load_phrase_model(phrase_model_filepath: str) -> PhraseModel:
+    """
+    Loads a phrase model from file (see `PhraseModel.save`).
+
+    Parameters
+    ----------
+    phrase_model_filepath : str
+        Filepath of the phrase model.
+
+    Returns
+    -------
+    phrase_model : PhraseModel
+        Phrase model instance.
+    """
+    return joblib.load(phrase_model_filepath)
+
+
+def _apply_phrases_to_text_file(
+    filepaths: Tuple[str, str],
+) -> Tuple[int, Optional[Tuple[List[str], np.ndarray, _BigramCounts]]]:
+    """
+    Writes a text file where phrases have been replaced with single words, using the
+    Word2phrase instance and threshold of `mp_var_dict` (used in `Word2phrase.fit`).
+
+    If `count_deltas` of `mp_var_dict` is set, the changes in word occurrences due to
+    replacing phrases are counted as well, i.e. the word occurrences of the new lines
+    minus the word occurrences of the old lines, for each line that changed. Adding
+    these to the word occurrences of the input text file yields the word occurrences
+    of the output text file, without reading it again.
+
+    Parameters
+    ----------
+    filepaths : tuple of str
+        Filepaths of the input and output text files.
+
+    Returns
+    -------
+    result : tuple of int and tuple of list of str, np.ndarray and _BigramCounts
+        Number of lines written and, if `count_deltas` is set, the words of the
+        changed lines (i.e. word ids to words), the unigram count deltas of each word
+        id and the bigram count deltas of the changed lines (otherwise None).
+    """
+    word2phrase: Word2phrase = mp_var_dict["word2phrase"]
+    threshold: float = mp_var_dict["threshold"]
+    count_deltas: bool = mp_var_dict["count_deltas"]
+    input_filepath, output_filepath = filepaths
+    num_lines = 0
+    word_to_id: Dict[str, int] = {}
+    unigram_count_deltas = np.zeros(0, dtype=np.int64)
+    bigram_count_deltas = _BigramCounts()
+    with open(input_filepath, "r") as input_file:
+        with open(output_filepath, "w") as output_file:
+            while True:
+                lines = [
+                    line for _, line in zip(range(APPLY_PHRASES_BATCH_SIZE), input_file)
+                ]
+                if not lines:
+                    break
+                new_lines, changed_lines = word2phrase._apply_phrases(lines, threshold)
+
+                # Write lines to output file
+                if num_lines > 0:
+                    output_file.write("\n")
+                output_file.write("\n".join(new_lines))
+                num_lines += len(lines)
+
+                # Count changes in word occurrences of changed lines
+                if count_deltas and len(changed_lines) > 0:
+                    old_word_ids, old_bigram_keys = _lines_bigram_keys(
+                        [lines[i].split() for i in changed_lines], word_to_id
+                    )
+                    new_word_ids, new_bigram_keys = _lines_bigram_keys(
+                        [new_lines[i].split() for i in changed_lines], word_to_id
+                    )
+                    unigram_count_deltas = np.pad(
+                        unigram_count_deltas,
+                        (0, len(word_to_id) - len(unigram_count_deltas)),
+                    )
+                    unigram_count_deltas += np.bincount(
+                        new_word_ids, minlength=len(word_to_id)
+                    )
+                    unigram_count_deltas -= np.bincount(
+                        old_word_ids, minlength=len(word_to_id)
+                    )
+                    bigram_count_deltas.add(new_bigram_keys)
+                    bigram_count_deltas.add(
+                        old_bigram_keys,
+                        np.full(len(old_bigram_keys), -1, dtype=np.int64),
+                    )
+    if not count_deltas:
+        return num_lines, None
+    return num_lines, (list(word_to_id), unigram_count_deltas, bigram_count_deltas)
+
 
 class Word2phrase:
     """
@@ -45,36 +870,60 @@ class Word2phrase:
         self._threshold_decay = threshold_decay
         self._phrase_sep = phrase_sep
 
-        self._word_occurrences_counter: Optional[Counter] = None
+        # Unigram vocabulary (words to word ids) and counts, and bigram vocabulary
+        # (sorted 64-bit keys of word ids, see `_bigram_keys`) and counts
+        self._word_to_id: Optional[Dict[str, int]] = None
+        self._unigram_counts: Optional[np.ndarray] = None
+        self._bigram_keys: Optional[np.ndarray] = None
+        self._bigram_counts: Optional[np.ndarray] = None
         self._total_unigram_words = 0
 
-    @staticmethod
-    def _pairwise_grouping_iter(iterable: Iterable) -> Iterator:
-        """
-        Groups elements of an iterable with pairwise tuples.
+        # Word occurrences counted in the text data files, i.e. before filtering the
+        # vocabulary. These are kept between epochs, such that they can be updated
+        # using the changes made when replacing phrases (see `_update_word_occurrences`)
+        # instead of counting the new text data files again. Only exact word
+        # occurrences (i.e. without pruning bigrams) can be updated.
+        self._counted_word_to_id: Optional[Dict[str, int]] = None
+        self._counted_unigram_counts: Optional[np.ndarray] = None
+        self._counted_bigram_keys: Optional[np.ndarray] = None
+        self._counted_bigram_counts: Optional[np.ndarray] = None
+        self._exact_word_occurrences = False
 
-        Parameters
-        ----------
-        iterable : Iterable
-            Iterable to apply pairwise grouping to.
+        # Phrases accepted in each epoch
+        self._phrase_model = PhraseModel(phrase_sep)
+
+    @property
+    def phrase_model(self) -> PhraseModel:
+        """
+        Gets the phrase model, i.e. the phrases accepted in each epoch of `fit`.
 
         Returns
         -------
-        pairwise_iterable : Iterator
-            Pairwise iterable
+        phrase_model : PhraseModel
+            Phrase model.
         """
-        left, right = tee(iterable)
-        try:
-            next(right)
-        except StopIteration:
-            pass
-        return zip_longest(left, right)
+        return self._phrase_model
 
     def _build_word_occurrences(
-        self, filepaths: List[str], num_texts: int, max_vocab_size: int
+        self,
+        filepaths: List[str],
+        num_texts: int,
+        max_vocab_size: int,
+        num_workers: int = -1,
+        shard_size: int = 64 * 1024 * 1024,
+        max_bigram_occurrences: int = -1,
     ) -> None:
         """
-        Builds the internal vocabulary using text data files.
+        Builds the internal vocabulary using text data files. The text data files are
+        split into byte-range shards, which are counted in separate processes.
+
+        To bound the memory usage, the number of bigrams to keep counts of can be
+        limited using `max_bigram_occurrences`, which prunes the least occurring
+        bigrams once the limit is exceeded (see `_BigramCounts`). If bigrams were
+        pruned, the bigrams which might occur at least `min_word_count` times are
+        counted exactly in a second pass over the text data files. If the bigram
+        counts are underestimated by less than `min_word_count` due to pruning, the
+        vocabulary is the same as without limiting the number of bigrams.
 
         Parameters
         ----------
@@ -87,59 +936,323 @@ class Word2phrase:
 
             In other words, only the top `max_vocab_size` words will be taken into
             account when counting word occurrences.
+        num_workers : int, optional
+            Number of processes to count word occurrences in (defaults to -1, i.e.
+            use all CPUs).
+        shard_size : int, optional
+            Size of each shard of the text data files in bytes (defaults to 64 MiB).
+        max_bigram_occurrences : int, optional
+            Maximum number of bigrams to keep counts of in each process (defaults to
+            -1, i.e. no maximum).
         """
-        # Read file content and split into words
-        lines = []
-        for filepath in filepaths:
-            with tf.io.gfile.GFile(filepath) as f:
-                lines.append(f)
-        lines_iter = chain(*lines)
+        shards = get_text_files_shards(filepaths, shard_size)
+        if num_workers == -1:
+            num_workers = cpu_count()
+        num_workers = max(min(num_workers, len(shards)), 1)
 
-        self._total_unigram_words = 0
-        word_occurrences_counter: Counter = Counter()
-        for line in tqdm(
-            lines_iter,
-            desc="- Building word occurrences",
-            total=num_texts,
-        ):
-            words = line.strip().split()
-            pairwise_words = [
-                f"{a}{self._phrase_sep}{b}" for a, b in zip(words, words[1:])
+        # Count word occurrences of shards in parallel and merge them in order, such
+        # that the word ids are ordered by first occurrence
+        word_to_id: Dict[str, int] = {}
+        unigram_counts = np.zeros(0, dtype=np.int64)
+        bigram_occurrences = _BigramCounts(max_bigram_occurrences)
+        mp_var_dict["max_bigram_occurrences"] = max_bigram_occurrences
+        try:
+            with tqdm(
+                desc="- Building word occurrences", total=num_texts
+            ) as progressbar:
+                with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+                    for (
+                        shard_words,
+                        shard_unigram_counts,
+                        shard_bigram_counts,
+                        shard_num_lines,
+                    ) in pool.imap(_count_text_file_shard_phrases, shards):
+
+                        # Map shard-local word ids to word ids
+                        shard_word_ids = _add_word_ids(word_to_id, shard_words)
+                        unigram_counts = np.pad(
+                            unigram_counts, (0, len(word_to_id) - len(unigram_counts))
+                        )
+                        unigram_counts[shard_word_ids] += shard_unigram_counts
+                        shard_bigram_keys, shard_bigram_key_counts = (
+                            shard_bigram_counts.result()
+                        )
+                        shard_left_word_ids, shard_right_word_ids = _split_bigram_keys(
+                            shard_bigram_keys
+                        )
+                        bigram_occurrences.add(
+                            _bigram_keys(
+                                shard_word_ids[shard_left_word_ids],
+                                shard_word_ids[shard_right_word_ids],
+                            ),
+                            shard_bigram_key_counts,
+                            shard_bigram_counts,
+                        )
+                        progressbar.update(shard_num_lines)
+        finally:
+            del mp_var_dict["max_bigram_occurrences"]
+        bigram_keys, bigram_counts = bigram_occurrences.result()
+
+        if bigram_occurrences.num_prunes > 0:
+            print(
+                f"Bigram occurrences were pruned {bigram_occurrences.num_prunes} times "
+                f"(final threshold {bigram_occurrences.threshold}); bigram counts are "
+                f"underestimated by at most {bigram_occurrences.error_bound}"
+            )
+
+            # Count candidate bigrams exactly, i.e. bigrams which might occur at least
+            # `self._min_word_count` times
+            mp_var_dict["word_to_id"] = word_to_id
+            mp_var_dict["candidate_bigram_keys"] = bigram_keys[
+                bigram_counts + bigram_occurrences.error_bound >= self._min_word_count
             ]
+            recounted_bigram_counts = _BigramCounts()
+            try:
+                with tqdm(
+                    desc="- Recounting bigram occurrences", total=num_texts
+                ) as progressbar:
+                    with multiprocessing.get_context("fork").Pool(num_workers) as pool:
+                        for shard_bigram_counts, shard_num_lines in pool.imap(
+                            _recount_text_file_shard_bigrams, shards
+                        ):
+                            recounted_bigram_counts.add(*shard_bigram_counts.result())
+                            progressbar.update(shard_num_lines)
+            finally:
+                del mp_var_dict["word_to_id"]
+                del mp_var_dict["candidate_bigram_keys"]
+            bigram_keys, bigram_counts = recounted_bigram_counts.result()
+            if bigram_occurrences.error_bound < self._min_word_count:
+                print(
+                    "Recounted bigram occurrences exactly for bigrams occurring at "
+                    f"least {self._min_word_count} times"
+                )
+            else:
+                print(
+                    "Recounted bigram occurrences, but bigrams occurring at least "
+                    f"{self._min_word_count} times might be missing; increase "
+                    "max_bigram_occurrences for exact bigram counts"
+                )
 
-            # Count unigram word occurrences
-            word_occurrences_counter.update(words)
-            self._total_unigram_words += len(words)
+        self._counted_word_to_id = word_to_id
+        self._counted_unigram_counts = unigram_counts
+        self._counted_bigram_keys = bigram_keys
+        self._counted_bigram_counts = bigram_counts
+        self._exact_word_occurrences = bigram_occurrences.num_prunes == 0
+        self._filter_word_occurrences(max_vocab_size)
 
-            # Count bigram word occurrences
-            word_occurrences_counter.update(pairwise_words)
+    def _update_word_occurrences(
+        self,
+        word_occurrences_deltas: List[Tuple[List[str], np.ndarray, _BigramCounts]],
+        max_vocab_size: int,
+    ) -> None:
+        """
+        Updates the internal vocabulary using the changes in word occurrences due to
+        replacing phrases (see `_apply_phrases_to_text_file`), such that it equals
+        the vocabulary built from the new text data files, without counting them.
 
-        print(f"Initial vocabulary size: {len(word_occurrences_counter)}")
+        Parameters
+        ----------
+        word_occurrences_deltas : list of tuple of list of str, np.ndarray and
+        _BigramCounts
+            Words (i.e. word ids to words), unigram count deltas of each word id and
+            bigram count deltas of each new text data file.
+        max_vocab_size : int
+            Maximum vocabulary size to use (-1 indicates all words in vocabulary).
+        """
+        word_to_id = self._counted_word_to_id
+        unigram_counts = self._counted_unigram_counts
+        bigram_occurrences = _BigramCounts()
+        bigram_occurrences.add(self._counted_bigram_keys, self._counted_bigram_counts)
+        for words, unigram_count_deltas, bigram_count_deltas in word_occurrences_deltas:
 
-        # Only use most common words
-        if max_vocab_size == -1:
-            word_occurrences_counter = word_occurrences_counter.most_common()
-            print("Using all words in vocabulary!")
-        elif 0 <= max_vocab_size < len(word_occurrences_counter):
-            word_occurrences_counter = word_occurrences_counter.most_common(
-                max_vocab_size
+            # Map word ids of the deltas to word ids, adding the new phrases
+            delta_word_ids = _add_word_ids(word_to_id, words)
+            unigram_counts = np.pad(
+                unigram_counts, (0, len(word_to_id) - len(unigram_counts))
             )
-            print(
-                f"New vocabulary size after maximization: {len(word_occurrences_counter)}"
+            unigram_counts[delta_word_ids] += unigram_count_deltas
+            delta_bigram_keys, delta_bigram_counts = bigram_count_deltas.result()
+            delta_left_word_ids, delta_right_word_ids = _split_bigram_keys(
+                delta_bigram_keys
             )
-
-        # Exclude words with less than `self._min_word_count` occurrences
-        word_occurrences_counter: dict = {
-            word: word_count
-            for word, word_count in tqdm(
-                word_occurrences_counter, desc="- Filtering word occurrences"
+            bigram_occurrences.add(
+                _bigram_keys(
+                    delta_word_ids[delta_left_word_ids],
+                    delta_word_ids[delta_right_word_ids],
+                ),
+                delta_bigram_counts,
             )
-            if word_count >= self._min_word_count
-        }
+        bigram_keys, bigram_counts = bigram_occurrences.result()
+
+        # Remove bigrams which no longer occur (e.g. since they were combined into
+        # phrases)
+        occurring_bigrams = bigram_counts > 0
+        self._counted_word_to_id = word_to_id
+        self._counted_unigram_counts = unigram_counts
+        self._counted_bigram_keys = bigram_keys[occurring_bigrams]
+        self._counted_bigram_counts = bigram_counts[occurring_bigrams]
+        self._filter_word_occurrences(max_vocab_size)
+
+    def _filter_word_occurrences(self, max_vocab_size: int) -> None:
+        """
+        Builds the internal vocabulary from the counted word occurrences, i.e. only
+        keeps the most common words occurring at least `min_word_count` times.
+
+        Parameters
+        ----------
+        max_vocab_size : int
+            Maximum vocabulary size to use (-1 indicates all words in vocabulary).
+        """
+        word_to_id = self._counted_word_to_id
+        unigram_counts = self._counted_unigram_counts
+        bigram_keys = self._counted_bigram_keys
+        bigram_counts = self._counted_bigram_counts
+
+        # Words which no longer occur (e.g. since they were always combined into
+        # phrases) are not part of the vocabulary
+        occurring_unigrams = unigram_counts > 0
+        self._total_unigram_words = int(unigram_counts.sum())
+        num_unigrams = len(unigram_counts)
+        num_occurring_unigrams = int(occurring_unigrams.sum())
+        print(f"Initial vocabulary size: {num_occurring_unigrams + len(bigram_keys)}")
+
+        # Only use most common words (unigrams and bigrams)
+        keep_unigrams = np.ones(num_unigrams, dtype=bool)
+        keep_bigrams = np.ones(len(bigram_keys), dtype=bool)
+        if max_vocab_size == -1:
+            print("Using all words in vocabulary!")
+        elif 0 <= max_vocab_size < num_occurring_unigrams + len(bigram_keys):
+            word_counts = np.concatenate((unigram_counts, bigram_counts))
+            keep_words = np.zeros(len(word_counts), dtype=bool)
+            keep_words[np.argsort(-word_counts, kind="stable")[:max_vocab_size]] = True
+            keep_unigrams = keep_words[:num_unigrams]
+            keep_bigrams = keep_words[num_unigrams:]
+            print(f"New vocabulary size after maximization: {max_vocab_size}")
+
+        # Exclude words with less than `self._min_word_count` occurrences. Bigrams of
+        # excluded unigrams can not be phrases, and are excluded as well.
+        keep_unigrams &= occurring_unigrams & (unigram_counts >= self._min_word_count)
+        keep_bigrams &= bigram_counts >= self._min_word_count
+        left_word_ids, right_word_ids = _split_bigram_keys(bigram_keys)
+        keep_bigrams &= keep_unigrams[left_word_ids] & keep_unigrams[right_word_ids]
         print(
-            f"Final vocabulary size after filtering on minimum word count: {len(word_occurrences_counter)}"
+            "Final vocabulary size after filtering on minimum word count: "
+            f"{keep_unigrams.sum() + keep_bigrams.sum()}"
         )
-        self._word_occurrences_counter = word_occurrences_counter
+
+        # Assign new (consecutive) word ids to the remaining unigrams. The order of the
+        # bigram keys is preserved, as the new word ids are increasing.
+        new_word_ids = np.cumsum(keep_unigrams) - 1
+        self._word_to_id = {
+            word: word_id
+            for word_id, word in enumerate(compress(word_to_id, keep_unigrams))
+        }
+        self._unigram_counts = unigram_counts[keep_unigrams]
+        self._bigram_keys = _bigram_keys(
+            new_word_ids[left_word_ids[keep_bigrams]],
+            new_word_ids[right_word_ids[keep_bigrams]],
+        )
+        self._bigram_counts = bigram_counts[keep_bigrams]
+
+    def _bigram_scores(
+        self, left_word_ids: np.ndarray, right_word_ids: np.ndarray
+    ) -> np.ndarray:
+        """
+        Computes the scores of bigrams of word ids, i.e. how likely the bigrams are
+        phrases.
+
+        Parameters
+        ----------
+        left_word_ids : np.ndarray
+            Word ids of the left words of the bigrams (-1 for unknown words).
+        right_word_ids : np.ndarray
+            Word ids of the right words of the bigrams (-1 for unknown words).
+
+        Returns
+        -------
+        scores : np.ndarray
+            Scores of the bigrams (0 for bigrams not in the vocabulary).
+        """
+        scores = np.zeros(len(left_word_ids), dtype=np.float64)
+        known_words = (left_word_ids >= 0) & (right_word_ids >= 0)
+        left_word_ids = left_word_ids[known_words]
+        right_word_ids = right_word_ids[known_words]
+        if len(self._bigram_keys) == 0:
+            return scores
+
+        # Look up bigram counts
+        bigram_keys = _bigram_keys(left_word_ids, right_word_ids)
+        bigram_indices = np.minimum(
+            np.searchsorted(self._bigram_keys, bigram_keys), len(self._bigram_keys) - 1
+        )
+        known_bigrams = self._bigram_keys[bigram_indices] == bigram_keys
+
+        # Compute scores
+        pa = self._unigram_counts[left_word_ids[known_bigrams]]
+        pb = self._unigram_counts[right_word_ids[known_bigrams]]
+        pab = self._bigram_counts[bigram_indices[known_bigrams]]
+        known_scores = np.zeros(len(bigram_keys), dtype=np.float64)
+        known_scores[known_bigrams] = (
+            (pab - self._min_word_count) / pa / pb * self._total_unigram_words
+        )
+        scores[known_words] = known_scores
+        return scores
+
+    def _apply_phrases(
+        self, lines: List[str], threshold: float
+    ) -> Tuple[List[str], np.ndarray]:
+        """
+        Replaces phrases in lines of text with single words. The bigrams of all lines
+        are scored at once, and then merged greedily from left to right.
+
+        Parameters
+        ----------
+        lines : list of str
+            Lines of text, where each word is separated by whitespace.
+        threshold : float
+            Threshold for determining whether a given phrase should be included.
+
+        Returns
+        -------
+        result : tuple of list of str and np.ndarray
+            Lines of text where phrases have been replaced with single words and the
+            indices of the lines where phrases were replaced.
+        """
+        lines_words = [line.split() for line in lines]
+        words: List[Optional[str]] = list(chain.from_iterable(lines_words))
+        word_ids = np.fromiter(
+            map(self._word_to_id.get, words, repeat(-1)),
+            dtype=np.int64,
+            count=len(words),
+        )
+        line_lengths = np.fromiter(
+            map(len, lines_words), dtype=np.int64, count=len(lines_words)
+        )
+
+        # Score bigrams within lines
+        scores = self._bigram_scores(word_ids[:-1], word_ids[1:])
+        scores[~_lines_bigram_mask(line_lengths, len(words))] = 0.0
+
+        # Combine each phrase into a single word, skipping the next pair of words
+        # since the current pair is combined into a single word
+        phrase_indices = _greedy_phrase_indices(np.flatnonzero(scores > threshold))
+        for phrase_idx in phrase_indices:
+            words[phrase_idx] = (
+                f"{words[phrase_idx]}{self._phrase_sep}{words[phrase_idx + 1]}"
+            )
+            words[phrase_idx + 1] = None
+        changed_lines = np.unique(
+            np.searchsorted(np.cumsum(line_lengths), phrase_indices, side="right")
+        )
+
+        # Join words of each line
+        new_lines = []
+        line_start = 0
+        for line_length in line_lengths.tolist():
+            line_words = words[line_start : line_start + line_length]
+            new_lines.append(" ".join(filter(None, line_words)))
+            line_start += line_length
+        return new_lines, changed_lines
 
     def fit(
         self,
@@ -150,10 +1263,21 @@ class Word2phrase:
         num_texts: int,
         max_vocab_size: int,
         output_dir: str,
+        num_workers: int = -1,
+        max_bigram_occurrences: int = -1,
     ) -> None:
         """
         Trains/fits the word2phrase instance and saves new text data files
-        where phrases have been replaced with single words.
+        where phrases have been replaced with single words. The phrases accepted
+        in each epoch are saved as a phrase model (see `PhraseModel`) to
+        `PHRASE_MODEL_FILENAME` in the output directory of the dataset, which can
+        be applied to new text without fitting again.
+
+        The word occurrences are only counted in the first epoch. In later epochs,
+        they are updated using the changes made when replacing phrases in the
+        previous epoch, which yields the same word occurrences as counting the new
+        text data files. If bigram occurrences had to be pruned (see
+        `max_bigram_occurrences`), the word occurrences are counted in every epoch.
 
         Parameters
         ----------
@@ -175,8 +1299,40 @@ class Word2phrase:
             account when counting word occurrences.
         output_dir : str
             Output directory to save the new text data files.
+        num_workers : int, optional
+            Number of processes to count word occurrences and write the new text data
+            files in (defaults to -1, i.e. use all CPUs). Each text data file is
+            written by a single process.
+        max_bigram_occurrences : int, optional
+            Maximum number of bigrams to keep counts of in each process when counting
+            word occurrences (defaults to -1, i.e. no maximum). Limiting the number of
+            bigrams bounds the memory usage, at the cost of a second pass over the
+            text data files to recount the remaining bigrams exactly.
         """
+        if num_workers == -1:
+            num_workers = cpu_count()
+        word_occurrences_deltas: Optional[
+            List[Tuple[List[str], np.ndarray, _BigramCounts]]
+        ] = None
         end_epoch_nr = n_epochs + starting_epoch_nr - 1
+
+        # Continue the phrase model of the previous epochs. The phrase model is not
+        # saved if the phrases of the previous epochs are unknown, as it would not
+        # replace the same phrases as the previous epochs.
+        phrase_model_filepath = join(
+            output_dir, f"{dataset_name}_phrases", PHRASE_MODEL_FILENAME
+        )
+        self._phrase_model = PhraseModel(self._phrase_sep)
+        save_phrase_model = True
+        if starting_epoch_nr > 1:
+            if isfile(phrase_model_filepath):
+                self._phrase_model = load_phrase_model(phrase_model_filepath)
+            if self._phrase_model.num_epochs != starting_epoch_nr - 1:
+                print(
+                    f"Phrase model of epochs 1-{starting_epoch_nr - 1} not found at "
+                    f"{phrase_model_filepath}, not saving phrase model."
+                )
+                save_phrase_model = False
         for epoch in range(starting_epoch_nr, end_epoch_nr + 1):
             print(f"Epoch {epoch}/{end_epoch_nr}")
 
@@ -189,12 +1345,37 @@ class Word2phrase:
             # Compute threshold
             threshold = self._threshold * (1 - self._threshold_decay) ** (epoch - 1)
 
-            # Builds vocabulary using text data files
-            self._build_word_occurrences(
-                filepaths=text_data_filepaths,
-                num_texts=num_texts,
-                max_vocab_size=max_vocab_size,
+            # Builds vocabulary using text data files in the first epoch. In later
+            # epochs, the vocabulary is updated using the changes in word occurrences
+            # of the previous epoch, unless bigram occurrences were pruned.
+            if word_occurrences_deltas is not None:
+                print("Updating word occurrences using changes of previous epoch...")
+                self._update_word_occurrences(
+                    word_occurrences_deltas=word_occurrences_deltas,
+                    max_vocab_size=max_vocab_size,
+                )
+            else:
+                self._build_word_occurrences(
+                    filepaths=text_data_filepaths,
+                    num_texts=num_texts,
+                    max_vocab_size=max_vocab_size,
+                    num_workers=num_workers,
+                    max_bigram_occurrences=max_bigram_occurrences,
+                )
+            count_deltas = epoch < end_epoch_nr and self._exact_word_occurrences
+
+            # Add phrases of current epoch to the phrase model
+            left_word_ids, right_word_ids = _split_bigram_keys(self._bigram_keys)
+            phrase_scores = self._bigram_scores(left_word_ids, right_word_ids)
+            accepted_phrases = phrase_scores > threshold
+            words = list(self._word_to_id)
+            self._phrase_model.add_phrases(
+                left_words=[words[i] for i in left_word_ids[accepted_phrases]],
+                right_words=[words[i] for i in right_word_ids[accepted_phrases]],
+                scores=phrase_scores[accepted_phrases],
+                threshold=threshold,
             )
+            print(f"Number of phrases: {accepted_phrases.sum()}")
 
             # Iterate over all texts/sentences for each text data file.
             new_filepaths = [
@@ -204,58 +1385,38 @@ class Word2phrase:
             print(
                 f"Example input/output: {text_data_filepaths[0]} --> {new_filepaths[0]}"
             )
-            progressbar = tqdm(
-                total=num_texts, desc="- Computing scores for each text data file"
-            )
-            for input_filepath, output_filepath in zip(
-                text_data_filepaths, new_filepaths
-            ):
-                with open(input_filepath, "r") as input_file:
-                    with open(output_filepath, "w") as output_file:
-                        i = 0
-                        for line in input_file:
-                            new_line = []
-                            words = line.strip().split()
-                            pairwise_words = self._pairwise_grouping_iter(words)
-                            for pair in pairwise_words:
-                                left_word, right_word = pair
-                                bigram_word = (
-                                    f"{left_word}{self._phrase_sep}{right_word}"
+
+            # Write new text data files in parallel, sharing the word occurrences
+            # with the worker processes through fork
+            mp_var_dict["word2phrase"] = self
+            mp_var_dict["threshold"] = threshold
+            mp_var_dict["count_deltas"] = count_deltas
+            word_occurrences_deltas = [] if count_deltas else None
+            try:
+                with tqdm(
+                    total=num_texts, desc="- Computing scores for each text data file"
+                ) as progressbar:
+                    with multiprocessing.get_context("fork").Pool(
+                        max(min(num_workers, len(text_data_filepaths)), 1)
+                    ) as pool:
+                        for num_lines, file_word_occurrences_deltas in pool.imap(
+                            _apply_phrases_to_text_file,
+                            zip(text_data_filepaths, new_filepaths),
+                        ):
+                            if count_deltas:
+                                word_occurrences_deltas.append(
+                                    file_word_occurrences_deltas
                                 )
-                                pa = self._word_occurrences_counter.get(left_word)
-                                pb = self._word_occurrences_counter.get(right_word)
-                                pab = self._word_occurrences_counter.get(bigram_word)
-                                all_words_in_vocab = pa and pb and pab
-
-                                # Compute score
-                                if all_words_in_vocab:
-                                    score = (
-                                        (pab - self._min_word_count)
-                                        / pa
-                                        / pb
-                                        * self._total_unigram_words
-                                    )
-                                else:
-                                    score = 0.0
-
-                                if score > threshold:
-                                    try:
-                                        # Skip next pair of words, since we combined current pair into
-                                        # a single word.
-                                        next(pairwise_words)
-                                    except StopIteration:
-                                        pass
-                                    new_line.append(bigram_word)
-                                else:
-                                    new_line.append(left_word)
-
-                            # Write line to output file
-                            if i > 0:
-                                output_file.write("\n")
-                            output_file.write(" ".join(new_line))
-                            progressbar.update(1)
-                            i += 1
+                            progressbar.update(num_lines)
+            finally:
+                del mp_var_dict["word2phrase"]
+                del mp_var_dict["threshold"]
+                del mp_var_dict["count_deltas"]
             print()
 
             # Change text data filepaths to the newly saved text filepaths
             text_data_filepaths = new_filepaths.copy()
+
+            # Save phrase model of the epochs so far
+            if save_phrase_model:
+                self._phrase_model.save(phrase_model_filepath)
@@ -1,12 +1,16 @@
+import json
 import os
+import shutil
 import sys
 from configparser import ConfigParser
-from os.path import isfile
+from functools import partial
+from os.path import isdir, isfile, join
 from time import time
-from typing import List, Optional, TextIO
+from typing import BinaryIO, Callable, List, Optional, TextIO, Tuple, Union
 
 import joblib
 import numpy as np
+import sharedmem
 import tensorflow as tf
 from tensorflow.keras.callbacks import TensorBoard
 from tensorflow.keras.models import Model
@@ -16,15 +20,166 @@ sys.path.append("..")
 
 from approx_nn import ApproxNN  # noqa: E402
 from utils import get_model_checkpoint_filepaths  # noqa: E402
-from word_embeddings.dataset import create_dataset  # noqa: E402
-from word_embeddings.tokenizer import Tokenizer  # noqa: E402
+from word_embeddings.background_writer import (  # noqa: E402
+    BackgroundWriter,
+    write_dir_atomic,
+    write_file_atomic,
+)
+from word_embeddings.dataset import (  # noqa: E402
+    compile_corpus,
+    compiled_corpus_exists,
+    create_dataset,
+    load_compiled_corpus,
+    vocab_fingerprint,
+)
+from word_embeddings.tokenizer import Tokenizer, load_tokenizer  # noqa: E402
 from word_embeddings.train_utils import (  # noqa: E402
+    PROFILING_STATS_NAMES,
+    EpochProfiler,
+    ProfilerTrace,
     create_model_checkpoint_filepath,
     create_model_intermediate_embedding_weights_filepath,
     create_model_train_logs_filepath,
 )
+from word_embeddings.word2vec_data_parallel import (  # noqa: E402
+    create_shared_memmap,
+    create_shared_memory_dir,
+    train_epoch_data_parallel,
+)
+from word_embeddings.word2vec_hogwild import (  # noqa: E402
+    TieredEmbedding,
+    create_negative_sampling_table,
+    create_tiered_embedding,
+    train_epoch_hogwild,
+)
 from word_embeddings.word2vec_model import Word2VecSGNSModel  # noqa: E402
 
+# Filenames of the files in a model checkpoint directory
+MODEL_CONFIG_FILENAME = "config.json"
+MODEL_VOCAB_DIRNAME = "vocab"
+MODEL_TOKENIZER_FILENAME = "tokenizer.joblib"
+MODEL_WEIGHTS_FILENAMES = ["target_embedding.npy", "context_embedding.npy"]
+
+# Number of rows to copy (or cast) at a time when saving weights, such that
+# memory-mapped weights are never held in memory in full
+WEIGHTS_CHUNK_SIZE = 100000
+
+
+def _write_weights(target_file: BinaryIO, weights: np.ndarray, dtype: type) -> None:
+    """
+    Writes weights to a Numpy (.npy) file in chunks of rows, casting each chunk to
+    the given data type.
+
+    Parameters
+    ----------
+    target_file : BinaryIO
+        Binary file object to write the weights to.
+    weights : np.ndarray
+        Weights to write (possibly memory-mapped).
+    dtype : type
+        Data type to save the weights as.
+    """
+    np.lib.format.write_array_header_1_0(
+        target_file,
+        {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": weights.shape,
+        },
+    )
+    for start in range(0, len(weights), WEIGHTS_CHUNK_SIZE):
+        target_file.write(
+            np.ascontiguousarray(
+                weights[start : start + WEIGHTS_CHUNK_SIZE], dtype=dtype
+            ).tobytes()
+        )
+
+
+def _snapshot_weights(weights: np.ndarray, snapshot_filepath: str) -> np.ndarray:
+    """
+    Takes a (float32) snapshot of weights, such that training can continue while
+    the snapshot is being written. Weights memory-mapped from file are copied to a
+    snapshot file in chunks of rows, rather than into memory.
+
+    Parameters
+    ----------
+    weights : np.ndarray
+        Weights to snapshot.
+    snapshot_filepath : str
+        Filepath of the snapshot file, used if `weights` is memory-mapped from file. The
+        snapshot file should be removed once the snapshot has been written.
+
+    Returns
+    -------
+    snapshot : np.ndarray
+        Snapshot of the weights (memory-mapped if `weights` is memory-mapped from
+        file).
+    """
+    if getattr(weights, "filename", None) is None:
+        return np.array(weights, dtype=np.float32, copy=True)
+    snapshot = np.lib.format.open_memmap(
+        snapshot_filepath, mode="w+", dtype=np.float32, shape=weights.shape
+    )
+    for start in range(0, len(weights), WEIGHTS_CHUNK_SIZE):
+        snapshot[start : start + WEIGHTS_CHUNK_SIZE] = weights[
+            start : start + WEIGHTS_CHUNK_SIZE
+        ]
+    snapshot.flush()
+    return snapshot
+
+
+def prepare_compiled_corpus(
+    compiled_corpus_dir: str,
+    text_data_filepaths: List[str],
+    num_texts: int,
+    tokenizer: Tokenizer,
+    verbose: int = 1,
+) -> None:
+    """
+    Compiles the corpus of `text_data_filepaths` (if it is not compiled already) and
+    validates that it is compiled from the same text data files and number of texts,
+    using the vocabulary of the tokenizer.
+
+    Parameters
+    ----------
+    compiled_corpus_dir : str
+        Directory of the compiled corpus.
+    text_data_filepaths : list
+        Paths of text data to compile.
+    num_texts : int
+        Number of texts (or sentences) of the contents of `text_data_filepaths`.
+    tokenizer : Tokenizer
+        Tokenizer instance for tokenizing individual texts.
+    verbose : int, optional
+        Verbosity mode, 0 (silent), 1 (verbose), 2 (semi-verbose).
+        Defaults to 1 (verbose).
+    """
+    if not compiled_corpus_exists(compiled_corpus_dir):
+        if verbose == 1:
+            print("Compiling corpus...")
+        compile_corpus(
+            text_data_filepaths,
+            num_texts,
+            tokenizer,
+            compiled_corpus_dir,
+        )
+        if verbose == 1:
+            print("Done!")
+    _, _, compiled_corpus_info = load_compiled_corpus(compiled_corpus_dir)
+    expected_compiled_corpus_info = {
+        "vocab_size": tokenizer.vocab_size,
+        "vocab_fingerprint": vocab_fingerprint(tokenizer),
+        "text_data_filepaths": list(text_data_filepaths),
+        "text_data_num_texts": num_texts,
+    }
+    for key, expected_value in expected_compiled_corpus_info.items():
+        if compiled_corpus_info.get(key) != expected_value:
+            raise ValueError(
+                f"Compiled corpus in {compiled_corpus_dir} is stale: it was compiled "
+                f"with {key} {compiled_corpus_info.get(key)}, while {expected_value} "
+                "is used for training. Remove the compiled corpus to recompile it."
+            )
+
 
 class Word2vec:
     """
@@ -44,6 +199,8 @@ class Word2vec:
         model_name: str = "word2vec",
         target_embedding_layer_name: str = "target_embedding",
         mixed_precision: bool = False,
+        training_mode: str = "skip_gram",
+        num_shared_negative_samples: int = 0,
     ) -> None:
         """
         Initializes a word2vec instance.
@@ -72,7 +229,26 @@ class Word2vec:
         mixed_precision : bool
             Whether or not to use mixed float16 precision while training
             (requires NVIDIA GPU, e.g., RTX, Titan V, V100).
+        training_mode : str, optional
+            Training mode to use (defaults to "skip_gram"). Must be one of:
+            - "skip_gram": Trains on one example per target/context pair, i.e. the
+              target word predicts each context word in its window.
+            - "cbow": Trains on one example per target word, i.e. the average of the
+              context words in its window predicts the target word (continuous
+              bag-of-words). Has fewer training steps per epoch than skip-gram.
+        num_shared_negative_samples : int, optional
+            Number of negative samples to sample once per batch and share among all
+            target/context pairs of the batch (defaults to 0, i.e. sample
+            `num_negative_samples` negative samples for each pair). Sharing negative
+            samples turns the scoring of negative samples into a single matrix
+            multiplication, which allows for larger batch sizes. The loss of each
+            shared negative sample is weighted by `num_negative_samples /
+            num_shared_negative_samples`.
         """
+        if training_mode not in ("skip_gram", "cbow"):
+            raise ValueError(f"Unknown training mode: {training_mode}")
+        if num_shared_negative_samples < 0:
+            raise ValueError("num_shared_negative_samples must be non-negative.")
         self._tokenizer = tokenizer
         self._embedding_dim = embedding_dim
         self._learning_rate = learning_rate
@@ -84,13 +260,20 @@ class Word2vec:
         self._model_name = model_name
         self._target_embedding_layer_name = target_embedding_layer_name
         self._mixed_precision = mixed_precision
+        self._training_mode = training_mode
+        self._num_shared_negative_samples = num_shared_negative_samples
 
         # Initialize model
         self._init_model()
 
         # Set train step signature
         inputs_spec = tf.TensorSpec(shape=(self._batch_size,), dtype="int64")
-        labels_spec = tf.TensorSpec(shape=(self._batch_size,), dtype="int64")
+        if self._training_mode == "cbow":
+            labels_spec = tf.TensorSpec(
+                shape=(self._batch_size, 2 * self._max_window_size), dtype="int64"
+            )
+        else:
+            labels_spec = tf.TensorSpec(shape=(self._batch_size,), dtype="int64")
         progress_spec = tf.TensorSpec(shape=(1,), dtype="float32")
         self._train_step_signature = [inputs_spec, labels_spec, progress_spec]
 
@@ -100,12 +283,13 @@ class Word2vec:
         """
         state = self.__dict__.copy()
 
-        # Remove unpickable static vocabulary table
+        # Remove unpickable model
         del state["_model"]
+        del state["_model_weights"]
 
         # Extract model weights, if they exist, and create
         # new modified state
-        model_weights = self._model.get_weights() if self._model is not None else None
+        model_weights = self._get_model_weights()
         modified_state = {"state": state, "model_weights": model_weights}
 
         return modified_state
@@ -115,22 +299,31 @@ class Word2vec:
         Sets the internal state of the class.
         """
         self.__dict__.update(modified_state["state"])
+        self.__dict__.setdefault("_training_mode", "skip_gram")
+        self.__dict__.setdefault("_num_shared_negative_samples", 0)
 
         # Initialize model with weights from file
         self._init_model(modified_state["model_weights"])
 
     def _init_model(self, weights: List[np.ndarray] = None) -> None:
         """
-        Initializes the word2vec model.
+        Initializes the word2vec model. The internal Keras model is built lazily,
+        i.e. once it is needed (see `get_model`).
 
         Parameters
         ----------
         weights : list of np.ndarray
             List of Numpy arrays containing weights to initialize model with (defaults to None).
         """
-        if self._tokenizer is None:
-            self._model: Optional[Model] = None
-        else:
+        self._model: Optional[Model] = None
+        self._model_weights = weights
+
+    def _build_model(self) -> None:
+        """
+        Builds the internal Keras model, initialized with the weights given
+        to `_init_model` (if any).
+        """
+        if self._tokenizer is not None:
             self._model = Word2VecSGNSModel(
                 word_counts=self._tokenizer.word_counts,
                 embedding_dim=self._embedding_dim,
@@ -141,22 +334,43 @@ class Word2vec:
                 min_learning_rate=self._min_learning_rate,
                 name=self._model_name,
                 target_embedding_layer_name=self._target_embedding_layer_name,
+                training_mode=self._training_mode,
+                num_shared_negative_samples=self._num_shared_negative_samples,
             )
 
-            if weights is not None:
-                self._model.set_weights(weights)
+            if self._model_weights is not None:
+                self._model.set_weights(self._model_weights)
+                self._model_weights = None
 
     def get_model(self) -> Optional[Model]:
         """
-        Gets the internal word2vec Keras model.
+        Gets the internal word2vec Keras model, building it if it has not
+        been built yet.
 
         Returns
         -------
         model : Model
             Word2vec Keras model
         """
+        if self._model is None:
+            self._build_model()
         return self._model
 
+    def _get_model_weights(self) -> Optional[List[np.ndarray]]:
+        """
+        Gets the weights of the word2vec model, without building the internal
+        Keras model.
+
+        Returns
+        -------
+        model_weights : list of np.ndarray
+            Weights of the word2vec model (target and context embedding matrices),
+            or None if the model has no weights.
+        """
+        if self._model is not None:
+            return self._model.get_weights()
+        return self._model_weights
+
     @property
     def tokenizer(self) -> Tokenizer:
         """
@@ -181,19 +395,109 @@ class Word2vec:
         """
         self._tokenizer = tokenizer
 
-    @property
-    def embedding_weights(self) -> np.ndarray:
+    def grow_vocab(
+        self,
+        text_data_filepaths: List[str],
+        num_texts: int,
+        min_word_count: int = 5,
+        sampling_factor: float = 1e-5,
+        max_vocab_size: int = -1,
+    ) -> int:
         """
-        Gets the embedding weights of the target embedding layer of the internal Keras model.
+        Grows the vocabulary of the tokenizer with the words of new text files (see
+        `Tokenizer.grow_vocab`) and the embedding matrices with freshly initialized
+        rows for the new words, such that training can be continued on the new text
+        files (e.g. using `fit` with `starting_epoch_nr`).
+
+        Parameters
+        ----------
+        text_data_filepaths : list of str
+            Filepaths of new text files.
+        num_texts : int
+            Number of texts (or sentences) of the content of `text_data_filepaths`.
+        min_word_count : int, optional
+            Minimum word count of new words (defaults to 5).
+        sampling_factor : float, optional
+            Sampling factor to use when computing the probability
+            of keeping a word during random subsampling of words (defaults to 1e-5).
+        max_vocab_size : int, optional
+            Maximum vocabulary size after growing it (defaults to -1, i.e. add all
+            new words).
 
         Returns
         -------
-        embedding_weights : np.ndarray
+        num_new_words : int
+            Number of words added to the vocabulary.
+        """
+        if self._tokenizer is None:
+            raise TypeError("Tokenizer is None. Did you forget to set it?")
+        num_new_words = self._tokenizer.grow_vocab(
+            filepaths=text_data_filepaths,
+            num_texts=num_texts,
+            min_word_count=min_word_count,
+            sampling_factor=sampling_factor,
+            max_vocab_size=max_vocab_size,
+        )
+
+        # Append rows for the new words to the embedding matrices, initialized like
+        # the embedding matrices of the internal Keras model. The Keras model is
+        # rebuilt once it is needed.
+        model_weights = self._get_model_weights()
+        if model_weights is not None:
+            target_embedding_weights, context_embedding_weights = model_weights
+            new_target_embedding_weights = np.random.uniform(
+                low=-0.5 / self._embedding_dim,
+                high=0.5 / self._embedding_dim,
+                size=(num_new_words, self._embedding_dim),
+            )
+            new_context_embedding_weights = np.random.uniform(
+                low=-0.1, high=0.1, size=(num_new_words, self._embedding_dim)
+            )
+            self._init_model(
+                [
+                    np.concatenate(
+                        (
+                            target_embedding_weights,
+                            new_target_embedding_weights.astype(
+                                target_embedding_weights.dtype
+                            ),
+                        )
+                    ),
+                    np.concatenate(
+                        (
+                            context_embedding_weights,
+                            new_context_embedding_weights.astype(
+                                context_embedding_weights.dtype
+                            ),
+                        )
+                    ),
+                ]
+            )
+
+        return num_new_words
+
+    def _get_target_embedding_weights(self, copy: bool = True) -> np.ndarray:
+        """
+        Gets the embedding weights of the target embedding layer of the internal
+        Keras model, in the precision of the model.
+
+        Parameters
+        ----------
+        copy : bool, optional
+            Whether or not to copy the embedding weights (defaults to True). If False,
+            the embedding weights of a model which has not been built yet (e.g.
+            memory-mapped weights) are returned as is.
+
+        Returns
+        -------
+        target_embedding_weights : np.ndarray
             Embedding weights of the target embedding layer.
         """
-        if self._model is None:
+        if self._model is None and self._model_weights is not None:
+            return np.array(self._model_weights[0], copy=copy)
+        if self.get_model() is None:
             raise TypeError(
-                "Model has not been built yet. Did you forget to call `build_model`?"
+                "Model has not been built yet. Did you forget to set the tokenizer?"
             )
 
         # Get target embedding weights
@@ -203,7 +507,213 @@ class Word2vec:
             if weight.name.startswith(self._target_embedding_layer_name)
         ][0].numpy()
 
-        return target_embedding_weights.astype(np.float64)
+        return np.array(target_embedding_weights, copy=copy)
+
+    @property
+    def embedding_weights(self) -> np.ndarray:
+        """
+        Gets the embedding weights of the target embedding layer of the internal Keras model.
+
+        Returns
+        -------
+        embedding_weights : np.ndarray
+            Embedding weights of the target embedding layer.
+        """
+        return self._get_target_embedding_weights().astype(np.float64)
+
+    def _create_optimizer(self) -> tf.keras.optimizers.Optimizer:
+        """
+        Creates the optimizer (SGD) with maximal learning rate, used by `_train_step`
+        to apply a decaying learning rate.
+
+        Returns
+        -------
+        optimizer : tf.keras.optimizers.Optimizer
+            Optimizer to train the internal Keras model with.
+        """
+        optimizer = tf.keras.optimizers.SGD(1.0)
+        if self._mixed_precision:
+            optimizer = tf.keras.mixed_precision.experimental.LossScaleOptimizer(
+                optimizer, loss_scale="dynamic"
+            )
+        return optimizer
+
+    def _train_step(
+        self,
+        input_targets: tf.Tensor,
+        input_contexts: tf.Tensor,
+        progress: tf.Tensor,
+        optimizer: tf.keras.optimizers.Optimizer,
+        sparse_updates: bool = False,
+    ) -> Tuple[tf.Tensor, tf.Tensor]:
+        """
+        Performs a single training step of the internal Keras model on a batch of
+        target/context pairs. Meant to be called inside a `tf.function`.
+
+        Parameters
+        ----------
+        input_targets : tf.Tensor
+            Input targets to train on
+        input_contexts : tf.Tensor
+            Input contexts to train on
+        progress : tf.Tensor
+            Current training progress
+        optimizer : tf.keras.optimizers.Optimizer
+            Optimizer created using `_create_optimizer`.
+        sparse_updates : bool, optional
+            Whether or not to update the embedding matrices in-place (defaults to False).
+
+        Returns
+        -------
+        payload : tuple
+            Tuple consisting of computed loss and learning rate
+        """
+        decaying_learning_rate = tf.maximum(
+            self._learning_rate * (1 - progress) + self._min_learning_rate * progress,
+            self._min_learning_rate,
+        )
+
+        # Update embedding matrices in-place
+        if sparse_updates:
+            skip_gram_loss = self._model.sparse_sgd_step(
+                input_targets, input_contexts, decaying_learning_rate
+            )
+            return skip_gram_loss, decaying_learning_rate
+
+        skip_gram_loss = self._model(input_targets, input_contexts)
+
+        # Scale loss and unscale gradients if mixed precision, as specified here:
+        # https://www.tensorflow.org/guide/mixed_precision#training_the_model_with_a_custom_training_loop
+        if self._mixed_precision:
+            skip_gram_loss_scaled = optimizer.get_scaled_loss(skip_gram_loss)
+            scaled_gradients = tf.gradients(
+                skip_gram_loss_scaled, self._model.trainable_variables
+            )
+            gradients = optimizer.get_unscaled_gradients(scaled_gradients)
+        else:
+            gradients = tf.gradients(skip_gram_loss, self._model.trainable_variables)
+
+        # Apply learning rate to gradients of embedding matrix
+        if hasattr(gradients[0], "_values"):
+            gradients[0]._values *= decaying_learning_rate
+        else:
+            gradients[0] *= decaying_learning_rate
+
+        if hasattr(gradients[1], "_values"):
+            gradients[1]._values *= decaying_learning_rate
+        else:
+            gradients[1] *= decaying_learning_rate
+
+        optimizer.apply_gradients(zip(gradients, self._model.trainable_variables))
+        return skip_gram_loss, decaying_learning_rate
+
+    def _save_training_metadata(
+        self, output_dir: str, dataset_name: str, n_epochs: int, verbose: int = 1
+    ) -> None:
+        """
+        Saves words, word counts and the model training configuration to the
+        output directory before training.
+
+        Parameters
+        ----------
+        output_dir : str
+            Output directory to save the files to.
+        dataset_name : str
+            Name of the dataset we are fitting/training on.
+        n_epochs : int
+            Number of epochs to fit/train.
+        verbose : int, optional
+            Verbosity mode, 0 (silent), 1 (verbose), 2 (semi-verbose).
+            Defaults to 1 (verbose).
+        """
+        # Save words to file for later reference
+        words_filepath = os.path.join(
+            output_dir,
+            f"{self._model_name}_{dataset_name}_words.txt",
+        )
+        self.save_words(words_filepath)
+        if verbose == 1:
+            print("Saved words to file!")
+
+        # Save word counts
+        word_counts_filepath = os.path.join(
+            output_dir,
+            f"{self._model_name}_{dataset_name}_word_counts.txt",
+        )
+        self.save_word_counts(word_counts_filepath)
+        if verbose == 1:
+            print("Saved word counts to file!")
+
+        # Save model training configuration to file
+        model_training_conf_filepath = os.path.join(
+            output_dir,
+            f"{self._model_name}_{dataset_name}.conf",
+        )
+        self.save_model_training_conf(model_training_conf_filepath, n_epochs)
+
+    def _open_train_logs_file(
+        self, output_dir: str, dataset_name: str, starting_epoch_nr: int
+    ) -> TextIO:
+        """
+        Opens the train logs file in the output directory, appending to it when
+        training is resumed. If the existing train logs file has a different header,
+        it is rewritten with the current header and the missing columns of its rows
+        are left empty.
+
+        Parameters
+        ----------
+        output_dir : str
+            Output directory of the train logs file.
+        dataset_name : str
+            Name of the dataset we are fitting/training on.
+        starting_epoch_nr : int
+            Starting epoch number.
+
+        Returns
+        -------
+        train_logs_file : TextIO
+            Opened train logs file.
+
+        Raises
+        ------
+        ValueError
+            If the existing train logs file has columns which are not in the current
+            header.
+        """
+        train_logs_filepath = create_model_train_logs_filepath(
+            output_dir,
+            self._model_name,
+            dataset_name,
+        )
+        header = ["epoch_nr", "train_loss", "time_spent"] + PROFILING_STATS_NAMES
+        rows = []
+        if isfile(train_logs_filepath) and starting_epoch_nr > 1:
+            with open(train_logs_filepath, "r") as file:
+                existing_lines = file.read().splitlines()
+            existing_header = existing_lines[0].split(",") if existing_lines else []
+            if existing_header == header:
+                return open(train_logs_filepath, "a")
+
+            # Rewrite train logs written with a different header (e.g. by an older
+            # version), leaving the columns missing in the existing rows empty
+            unknown_columns = set(existing_header) - set(header)
+            if len(unknown_columns) > 0:
+                raise ValueError(
+                    f"Train logs file {train_logs_filepath} has unknown columns "
+                    f"{sorted(unknown_columns)} and cannot be resumed. Move it to "
+                    "another location to resume training."
+                )
+            for line in existing_lines[1:]:
+                if line == "":
+                    continue
+                row = dict(zip(existing_header, line.split(",")))
+                rows.append(",".join(row.get(name, "") for name in header))
+        train_logs_file = open(train_logs_filepath, "w")
+        train_logs_file.write(",".join(header))
+        for row in rows:
+            train_logs_file.write(f"\n{row}")
+        train_logs_file.flush()
+        return train_logs_file
 
     def fit(
         self,
@@ -216,11 +726,29 @@ class Word2vec:
         starting_epoch_nr: int = 1,
         intermediate_embedding_weights_saves: int = 0,
         train_logs_to_file: bool = True,
+        compiled_corpus_dir: str = "",
+        backend: str = "tensorflow",
+        num_workers: int = -1,
+        steps_per_execution: int = 1,
+        averaging_interval_steps: int = 100,
+        sparse_updates: bool = False,
+        async_saves: bool = False,
+        max_pending_saves: int = 2,
+        embedding_storage_dir: str = "",
+        hot_vocab_size: int = 100000,
+        profile_steps: Optional[Tuple[int, int]] = None,
         verbose: int = 1,
     ) -> None:
         """
         Fits/trains the word2vec model.
 
+        The wall time spent per training stage (waiting for input, training steps,
+        syncing results to the host and updating the progressbar, and saving), the
+        throughput (batches and target/context pairs per second) and the peak memory
+        usage of each epoch are written to the train logs and TensorBoard. The time
+        spent waiting for input is only measured using the "tensorflow" backend, as the
+        other backends read their input in the worker processes.
+
         Parameters
         ----------
         text_data_filepaths : list
@@ -242,115 +770,92 @@ class Word2vec:
             (defaults to 0).
         train_logs_to_file : bool, optional
             Whether or not to save logs from training to file.
+        compiled_corpus_dir : str, optional
+            Directory of a compiled (pre-tokenized) corpus of `text_data_filepaths`
+            to read the texts from during training (defaults to "", i.e. read and
+            tokenize the text data files every epoch). If the compiled corpus does
+            not exist yet, it is compiled before training.
+        backend : str, optional
+            Training backend to use (defaults to "tensorflow"). Must be one of:
+            - "tensorflow": Trains the internal Keras model using TensorFlow.
+            - "hogwild": Trains the embedding matrices using skip-gram negative
+              sampling in `num_workers` processes, which update the embedding
+              matrices in shared memory without locking (Hogwild), similar to the
+              original word2vec.c implementation. Requires a compiled corpus; if
+              `compiled_corpus_dir` is not specified, the corpus is compiled into
+              `output_dir`.
+            - "tensorflow_data_parallel": Trains replicas of the internal Keras model
+              using TensorFlow in `num_workers` processes, each on a shard of the
+              texts, and averages the embedding matrices of the replicas through
+              shared memory every `averaging_interval_steps` steps. The replicas
+              update their embedding matrices in-place (see `sparse_updates`).
+        num_workers : int, optional
+            Number of worker processes to use with the "hogwild" and
+            "tensorflow_data_parallel" backends (defaults to -1, i.e. use all CPUs).
+        steps_per_execution : int, optional
+            Number of training steps to run inside each call to the TensorFlow
+            training function, using the "tensorflow" backend (defaults to 1).
+            The loss is accumulated on the device, and the progressbar, average
+            loss and intermediate saves of embedding weights are only synced every
+            `steps_per_execution` steps, which reduces the per-step Python overhead.
+        averaging_interval_steps : int, optional
+            Number of training steps each worker performs between each averaging of
+            the embedding matrices, using the "tensorflow_data_parallel" backend
+            (defaults to 100).
+        sparse_updates : bool, optional
+            Whether or not to update the embedding matrices in-place using the
+            "tensorflow" backend (defaults to False). If True, the gradients of the
+            rows touched by each batch are computed in closed form and subtracted
+            from the embedding matrices directly, bypassing the gradient tape and
+            the Keras optimizer.
+        async_saves : bool, optional
+            Whether or not to write intermediate embedding weights and model
+            checkpoints to file in a background thread (defaults to False). If True,
+            a snapshot of the weights is taken and training continues while the
+            snapshot is written (atomically) to file. All pending writes are finished
+            before `fit` returns.
+        max_pending_saves : int, optional
+            Maximum number of pending background writes when `async_saves` is True
+            (defaults to 2). Training blocks if the limit is reached.
+        embedding_storage_dir : str, optional
+            Directory to store the embedding matrices in during training, using the
+            "hogwild" backend (defaults to "", i.e. keep the embedding matrices in
+            shared memory). If specified, only the rows of the `hot_vocab_size` most
+            common words are kept in shared memory, while the remaining rows are
+            memory-mapped from file and paged in/out by the OS as they are used,
+            allowing for vocabularies with embedding matrices larger than memory.
+            The internal Keras model is not built during training; the embedding
+            matrices are memory-mapped from `embedding_storage_dir` after training.
+        hot_vocab_size : int, optional
+            Number of rows of the embedding matrices to keep in shared memory when
+            `embedding_storage_dir` is specified (defaults to 100000).
+        profile_steps : tuple of int, optional
+            Range of training steps [start, stop), counted from the start of
+            training, to capture a TensorFlow profiler trace of into
+            `tensorboard_logs_dir`, using the "tensorflow" backend (defaults to None,
+            i.e. no trace). Steps are counted `steps_per_execution` at a time.
         verbose : int, optional
             Verbosity mode, 0 (silent), 1 (verbose), 2 (semi-verbose).
             Defaults to 1 (verbose).
         """
+        if backend == "hogwild" and compiled_corpus_dir == "":
+            compiled_corpus_dir = join(output_dir, "compiled_corpus")
+        self._check_fit_args(
+            backend, embedding_storage_dir, profile_steps, tensorboard_logs_dir
+        )
 
         # Ensure output directory exists before training
         os.makedirs(output_dir, exist_ok=True)
 
         # Enable TensorBoard
-        if tensorboard_logs_dir != "":
-            tb_callback = TensorBoard(tensorboard_logs_dir)
-            tb_callback.set_model(self._model)
-
-        # Set up optimizer (SGD) with maximal learning rate.
-        # The idea here is that `perform_train_step` will apply a decaying learning rate.
-        optimizer = tf.keras.optimizers.SGD(1.0)
-        if self._mixed_precision:
-            optimizer = tf.keras.mixed_precision.experimental.LossScaleOptimizer(
-                optimizer, loss_scale="dynamic"
-            )
-
-        @tf.function(input_signature=self._train_step_signature)
-        def perform_train_step(
-            input_targets: tf.Tensor,
-            input_contexts: tf.Tensor,
-            progress: float,
-        ):
-            """
-            Performs a single training step on a batch of target/context pairs.
-
-            Parameters
-            ----------
-            input_targets : tf.Tensor
-                Input targets to train on
-            input_contexts : tf.Tensor
-                Input contexts to train on
-            progress : float
-                Current training progress
-            Returns
-            -------
-            payload : tuple
-                Tuple consisting of computed loss and learning rate
-            """
-            skip_gram_loss = self._model(input_targets, input_contexts)
-
-            # Scale loss and unscale gradients if mixed precision, as specified here:
-            # https://www.tensorflow.org/guide/mixed_precision#training_the_model_with_a_custom_training_loop
-            if self._mixed_precision:
-                skip_gram_loss_scaled = optimizer.get_scaled_loss(skip_gram_loss)
-                scaled_gradients = tf.gradients(
-                    skip_gram_loss_scaled, self._model.trainable_variables
-                )
-                gradients = optimizer.get_unscaled_gradients(scaled_gradients)
-            else:
-                gradients = tf.gradients(
-                    skip_gram_loss, self._model.trainable_variables
-                )
-
-            decaying_learning_rate = tf.maximum(
-                self._learning_rate * (1 - progress)
-                + self._min_learning_rate * progress,
-                self._min_learning_rate,
-            )
-
-            # Apply learning rate to gradients of embedding matrix
-            if hasattr(gradients[0], "_values"):
-                gradients[0]._values *= decaying_learning_rate
-            else:
-                gradients[0] *= decaying_learning_rate
+        summary_writer = self._create_summary_writer(tensorboard_logs_dir)
 
-            if hasattr(gradients[1], "_values"):
-                gradients[1]._values *= decaying_learning_rate
-            else:
-                gradients[1] *= decaying_learning_rate
-
-            optimizer.apply_gradients(zip(gradients, self._model.trainable_variables))
-
-            return skip_gram_loss, decaying_learning_rate
-
-        # Save words to file for later reference
-        words_filepath = os.path.join(
-            output_dir,
-            f"{self._model_name}_{dataset_name}_words.txt",
-        )
-        self.save_words(words_filepath)
-        if verbose == 1:
-            print("Saved words to file!")
-
-        # Save word counts
-        word_counts_filepath = os.path.join(
-            output_dir,
-            f"{self._model_name}_{dataset_name}_word_counts.txt",
+        # Set up the TensorFlow training function
+        perform_train_steps = self._create_train_steps_function(
+            sparse_updates, steps_per_execution
         )
-        self.save_word_counts(word_counts_filepath)
-        if verbose == 1:
-            print("Saved word counts to file!")
-
-        intermediate_saving_thresholds: Optional[float] = None
-        if intermediate_embedding_weights_saves > 0:
-
-            # Set up thresholds for saving intermediate embedding weights
-            intermediate_saving_thresholds = 1 / intermediate_embedding_weights_saves
 
-        # Save model training configuration to file
-        model_training_conf_filepath = os.path.join(
-            output_dir,
-            f"{self._model_name}_{dataset_name}.conf",
-        )
-        self.save_model_training_conf(model_training_conf_filepath, n_epochs)
+        self._save_training_metadata(output_dir, dataset_name, n_epochs, verbose)
 
         # Train model
         if verbose == 1:
@@ -365,179 +870,1043 @@ class Word2vec:
                 f"- learning_rate={self._learning_rate}\n"
                 f"- min_learning_rate={self._min_learning_rate}\n"
                 f"- max_window_size={self._max_window_size}\n"
-                f"- num_negative_samples={self._num_negative_samples}"
+                f"- num_negative_samples={self._num_negative_samples}\n"
+                f"- backend={backend}\n"
+                f"- sparse_updates={sparse_updates}"
             )
             print("---")
         end_epoch_nr = n_epochs + starting_epoch_nr - 1
 
-        # Initialize train logs file
-        train_logs_file: Optional[TextIO] = None
-        train_logs_filepath = create_model_train_logs_filepath(
-            output_dir,
-            self._model_name,
-            dataset_name,
-        )
-        if train_logs_to_file:
-            if isfile(train_logs_filepath) and starting_epoch_nr > 1:
-                train_logs_file = open(train_logs_filepath, "a")
-            else:
-                train_logs_file = open(train_logs_filepath, "w")
-                train_logs_file.write("epoch_nr,train_loss,time_spent")
-                train_logs_file.flush()
-
-        for epoch_nr in range(starting_epoch_nr, end_epoch_nr + 1):
-            if verbose >= 1:
-                print(f"Epoch {epoch_nr}/{end_epoch_nr}")
-
-            # Initialize progressbar
-            progressbar = Progbar(
-                num_texts,
-                verbose=verbose,
-                stateful_metrics=["learning_rate"],
-            )
-            progressbar.update(0)
-
-            # Initialize new dataset per epoch
-            train_dataset = create_dataset(
+        # Compile corpus once, such that texts are only read and tokenized once
+        if compiled_corpus_dir != "":
+            prepare_compiled_corpus(
+                compiled_corpus_dir,
                 text_data_filepaths,
                 num_texts,
                 self._tokenizer,
-                self._max_window_size,
-                self._batch_size,
+                verbose,
             )
 
-            # Measure time spent per epoch
-            time_epoch_start = time()
+        # Initialize background writer for saving weights while training continues
+        background_writer: Optional[BackgroundWriter] = None
+        if async_saves:
+            background_writer = BackgroundWriter(max_pending_saves)
 
-            # Iterate over batches of data and perform training
-            avg_loss = 0.0
-            steps = 0
-            intermediate_embedding_progress = 0
-            for (
-                input_targets_batch,
-                input_contexts_batch,
-                epoch_progress,
-            ) in train_dataset:
-
-                # Perform intermediate saves of embedding weights to file
-                if intermediate_embedding_weights_saves > 0:
-                    should_save = (
-                        epoch_progress / intermediate_saving_thresholds
-                        - intermediate_embedding_progress
-                        >= 1
+        # Initialize profiling of the training stages and profiler trace
+        profiler = EpochProfiler()
+        profiler_trace = ProfilerTrace(profile_steps, tensorboard_logs_dir)
+
+        # Initialize train logs file
+        train_logs_file: Optional[TextIO] = None
+        if train_logs_to_file:
+            train_logs_file = self._open_train_logs_file(
+                output_dir, dataset_name, starting_epoch_nr
+            )
+
+        save_intermediate_embedding_weights = partial(
+            self._save_intermediate_embedding_weights,
+            output_dir=output_dir,
+            dataset_name=dataset_name,
+            intermediate_embedding_weights_saves=intermediate_embedding_weights_saves,
+            background_writer=background_writer,
+            profiler=profiler,
+        )
+
+        # Train, cleaning up (finishing pending writes, removing shared memory and
+        # closing the train logs file) also if training is interrupted
+        train_state: dict = {}
+        try:
+            if backend != "tensorflow":
+                self._init_workers_train_state(
+                    train_state,
+                    backend,
+                    compiled_corpus_dir,
+                    embedding_storage_dir,
+                    hot_vocab_size,
+                )
+
+            for epoch_nr in range(starting_epoch_nr, end_epoch_nr + 1):
+                if verbose >= 1:
+                    print(f"Epoch {epoch_nr}/{end_epoch_nr}")
+
+                # Initialize progressbar
+                progressbar = Progbar(
+                    num_texts,
+                    verbose=verbose,
+                    stateful_metrics=["learning_rate"],
+                )
+                progressbar.update(0)
+
+                # Measure time spent per epoch
+                time_epoch_start = time()
+                profiler.reset()
+
+                if backend == "tensorflow":
+                    avg_loss, num_steps, num_pairs = self._train_epoch_tensorflow(
+                        perform_train_steps=perform_train_steps,
+                        text_data_filepaths=text_data_filepaths,
+                        num_texts=num_texts,
+                        compiled_corpus_dir=compiled_corpus_dir,
+                        epoch_nr=epoch_nr,
+                        end_epoch_nr=end_epoch_nr,
+                        progressbar=progressbar,
+                        profiler=profiler,
+                        profiler_trace=profiler_trace,
+                        save_intermediate_embedding_weights=save_intermediate_embedding_weights,
                     )
-                    is_not_last = (
-                        intermediate_embedding_progress
-                        < intermediate_embedding_weights_saves - 1
+                else:
+                    avg_loss, num_steps, num_pairs = self._train_epoch_workers(
+                        train_state=train_state,
+                        backend=backend,
+                        text_data_filepaths=text_data_filepaths,
+                        num_texts=num_texts,
+                        compiled_corpus_dir=compiled_corpus_dir,
+                        epoch_nr=epoch_nr,
+                        end_epoch_nr=end_epoch_nr,
+                        num_workers=num_workers,
+                        averaging_interval_steps=averaging_interval_steps,
+                        progressbar=progressbar,
+                        profiler=profiler,
+                        save_intermediate_embedding_weights=save_intermediate_embedding_weights,
                     )
-                    if should_save and is_not_last:
-
-                        # Save to file
-                        self.save_embedding_weights(
-                            create_model_intermediate_embedding_weights_filepath(
-                                output_dir,
-                                self._model_name,
-                                dataset_name,
-                                epoch_nr,
-                                intermediate_embedding_progress + 1,
-                            )
-                        )
-                        intermediate_embedding_progress += 1
+                print()
+
+                # Compute time spent on epoch
+                time_spent_epoch = time() - time_epoch_start
+                if verbose == 1:
+                    print(f"Spent {time_spent_epoch:.2f} seconds!")
+
+                with profiler.measure("save"):
+                    self._save_epoch(
+                        output_dir,
+                        dataset_name,
+                        epoch_nr,
+                        intermediate_embedding_weights_saves,
+                        background_writer,
+                        verbose,
+                    )
+                epoch_stats = profiler.stats(time_spent_epoch, num_steps, num_pairs)
+                self._write_epoch_logs(
+                    train_logs_file,
+                    summary_writer,
+                    epoch_nr,
+                    avg_loss,
+                    time_spent_epoch,
+                    epoch_stats,
+                )
+        finally:
+            self._finish_fit(
+                train_state,
+                profiler_trace,
+                background_writer,
+                train_logs_file,
+                verbose,
+            )
+
+    def _check_fit_args(
+        self,
+        backend: str,
+        embedding_storage_dir: str,
+        profile_steps: Optional[Tuple[int, int]],
+        tensorboard_logs_dir: str,
+    ) -> None:
+        """
+        Checks that the arguments of `fit` are supported by the training backend and
+        that the model can be trained (see `fit` for a description of the
+        parameters).
+        """
+        if backend not in ("tensorflow", "hogwild", "tensorflow_data_parallel"):
+            raise ValueError(f"Unknown training backend: {backend}")
+        if backend != "tensorflow" and self._mixed_precision:
+            raise ValueError(
+                f"Mixed precision is not supported by the {backend} backend."
+            )
+        if backend == "hogwild" and self._training_mode != "skip_gram":
+            raise ValueError(
+                f"The {self._training_mode} training mode is not supported by the "
+                "hogwild backend."
+            )
+        if backend == "hogwild" and self._num_shared_negative_samples > 0:
+            raise ValueError(
+                "Shared negative samples are not supported by the hogwild backend."
+            )
+        if backend != "hogwild" and embedding_storage_dir != "":
+            raise ValueError(
+                f"Tiered embedding storage is not supported by the {backend} backend."
+            )
+        if profile_steps is not None:
+            if backend != "tensorflow":
+                raise ValueError(
+                    f"Profiler traces are not supported by the {backend} backend."
+                )
+            if tensorboard_logs_dir == "":
+                raise ValueError(
+                    "Profiler traces require a TensorBoard logs directory."
+                )
+
+        # Build model (if not built already, e.g. when resuming training). With tiered
+        # embedding storage, the embedding matrices are initialized in
+        # `embedding_storage_dir` instead.
+        if embedding_storage_dir != "":
+            if self._tokenizer is None:
+                raise TypeError("Tokenizer is None. Did you forget to set it?")
+        elif self.get_model() is None:
+            raise TypeError(
+                "Model has not been built yet. Did you forget to set the tokenizer?"
+            )
+
+    def _create_summary_writer(
+        self, tensorboard_logs_dir: str
+    ) -> Optional[tf.summary.SummaryWriter]:
+        """
+        Enables TensorBoard for the internal Keras model and creates a summary writer
+        for the train logs.
+
+        Parameters
+        ----------
+        tensorboard_logs_dir : str
+            TensorBoard logs directory ("" to disable TensorBoard).
+
+        Returns
+        -------
+        summary_writer : tf.summary.SummaryWriter
+            Summary writer, or None if TensorBoard is disabled.
+        """
+        if tensorboard_logs_dir == "":
+            return None
+        tb_callback = TensorBoard(tensorboard_logs_dir)
+        if self._model is not None:
+            tb_callback.set_model(self._model)
+        return tf.summary.create_file_writer(join(tensorboard_logs_dir, "train"))
+
+    def _create_train_steps_function(
+        self, sparse_updates: bool, steps_per_execution: int
+    ) -> Callable:
+        """
+        Creates the TensorFlow function which performs (up to) `steps_per_execution`
+        training steps of the internal Keras model, used by the "tensorflow" backend.
+
+        Parameters
+        ----------
+        sparse_updates : bool
+            Whether or not to update the embedding matrices in-place.
+        steps_per_execution : int
+            Number of training steps to perform per call.
+
+        Returns
+        -------
+        perform_train_steps : Callable
+            TensorFlow function performing the training steps.
+        """
+        # Set up optimizer (SGD) with maximal learning rate.
+        # The idea here is that `perform_train_step` will apply a decaying learning rate.
+        optimizer = self._create_optimizer()
+
+        @tf.function(input_signature=self._train_step_signature)
+        def perform_train_step(
+            input_targets: tf.Tensor,
+            input_contexts: tf.Tensor,
+            progress: float,
+        ):
+            """
+            Performs a single training step on a batch of target/context pairs.
+
+            Parameters
+            ----------
+            input_targets : tf.Tensor
+                Input targets to train on
+            input_contexts : tf.Tensor
+                Input contexts to train on
+            progress : float
+                Current training progress
+            Returns
+            -------
+            payload : tuple
+                Tuple consisting of computed loss and learning rate
+            """
+            return self._train_step(
+                input_targets, input_contexts, progress, optimizer, sparse_updates
+            )
+
+        @tf.function
+        def perform_train_steps(
+            train_iterator: tf.data.Iterator,
+            epoch_nr: tf.Tensor,
+            end_epoch_nr: tf.Tensor,
+        ):
+            """
+            Performs (up to) `steps_per_execution` training steps on batches of
+            target/context pairs from a dataset iterator.
+
+            Parameters
+            ----------
+            train_iterator : tf.data.Iterator
+                Iterator of the training dataset.
+            epoch_nr : tf.Tensor
+                Current epoch number.
+            end_epoch_nr : tf.Tensor
+                Last epoch number.
+
+            Returns
+            -------
+            payload : tuple
+                Tuple consisting of the sum of (mean) losses, number of steps performed,
+                last learning rate, last epoch progress, number of target/context pairs
+                trained on and time spent waiting for batches (in seconds).
+            """
+            loss_sum = tf.constant(0.0, dtype=tf.float32)
+            num_steps = tf.constant(0, dtype=tf.int64)
+            learning_rate = tf.zeros(shape=(1,), dtype=tf.float32)
+            epoch_progress = tf.constant(0.0, dtype=tf.float32)
+            num_pairs = tf.constant(0, dtype=tf.int64)
+            input_wait_time = tf.constant(0.0, dtype=tf.float64)
+            for _ in tf.range(steps_per_execution):
+                fetch_start_time = tf.timestamp()
+                optional_batch = train_iterator.get_next_as_optional()
+                input_wait_time += tf.timestamp() - fetch_start_time
+                if not optional_batch.has_value():
+                    break
+                input_targets, input_contexts, epoch_progress = (
+                    optional_batch.get_value()
+                )
+                num_pairs += tf.shape(input_targets, out_type=tf.int64)[0]
 
                 # Compute overall progress (over all epochs)
-                overall_progress = tf.constant(
-                    (epoch_nr - 1 + epoch_progress) / end_epoch_nr,
-                    shape=(1,),
-                    dtype=tf.float32,
+                overall_progress = tf.reshape(
+                    (epoch_nr - 1 + epoch_progress) / end_epoch_nr, shape=(1,)
                 )
 
                 # Train on batch
                 loss, learning_rate = perform_train_step(
-                    input_targets_batch, input_contexts_batch, overall_progress
+                    input_targets, input_contexts, overall_progress
                 )
+                loss_sum += tf.cast(self._model.mean_loss(loss), tf.float32)
+                num_steps += 1
 
-                # Add to average loss
-                loss_np = loss.numpy().mean()
-                avg_loss += loss_np
-                steps += 1
+            return (
+                loss_sum,
+                num_steps,
+                learning_rate,
+                epoch_progress,
+                num_pairs,
+                input_wait_time,
+            )
 
-                # Update progressbar
-                sent_nr = int(epoch_progress.numpy() * num_texts)
-                progressbar.update(
-                    sent_nr,
-                    values=[
-                        ("loss", loss_np),
-                        ("learning_rate", learning_rate),
-                    ],
-                )
-            print()
+        return perform_train_steps
 
-            # Compute time spent on epoch
-            time_spent_epoch = time() - time_epoch_start
-            if verbose == 1:
-                print(f"Spent {time_spent_epoch:.2f} seconds!")
+    def _save_intermediate_embedding_weights(
+        self,
+        epoch_nr: int,
+        epoch_progress: float,
+        intermediate_embedding_progress: int,
+        output_dir: str,
+        dataset_name: str,
+        intermediate_embedding_weights_saves: int,
+        background_writer: Optional[BackgroundWriter],
+        profiler: EpochProfiler,
+        embedding_weights: Optional[Union[np.ndarray, TieredEmbedding]] = None,
+    ) -> int:
+        """
+        Performs an intermediate save of embedding weights to file during `fit`, if
+        the epoch progress has reached the next saving threshold.
 
-            # Compute average loss
-            avg_loss /= steps
+        Parameters
+        ----------
+        epoch_nr : int
+            Current epoch number.
+        epoch_progress : float
+            Current epoch progress.
+        intermediate_embedding_progress : int
+            Number of intermediate saves performed so far in the epoch.
+        output_dir : str
+            Output directory to save the embedding weights to.
+        dataset_name : str
+            Name of the dataset we are fitting/training on.
+        intermediate_embedding_weights_saves : int
+            Number of intermediate saves of embedding weights per epoch.
+        background_writer : BackgroundWriter
+            Background writer to save the embedding weights with (None to save the
+            embedding weights before returning).
+        profiler : EpochProfiler
+            Profiler to measure the time spent saving with.
+        embedding_weights : np.ndarray or TieredEmbedding, optional
+            Embedding weights to save (defaults to None, i.e. the target embedding
+            weights of the model). Tiered embedding weights are synced to file
+            before saving.
 
-            # Save last intermediate save of embedding weights to file
-            if intermediate_embedding_weights_saves > 0:
+        Returns
+        -------
+        intermediate_embedding_progress : int
+            Number of intermediate saves performed so far in the epoch,
+            including the current one.
+        """
+        if intermediate_embedding_weights_saves == 0:
+            return intermediate_embedding_progress
+
+        # Save once for each saving threshold reached (except for the last one,
+        # which is saved at the end of the epoch)
+        intermediate_saving_thresholds = 1 / intermediate_embedding_weights_saves
+        while (
+            epoch_progress / intermediate_saving_thresholds
+            - intermediate_embedding_progress
+            >= 1
+            and intermediate_embedding_progress
+            < intermediate_embedding_weights_saves - 1
+        ):
+
+            # Save to file
+            with profiler.measure("save"):
+                if isinstance(embedding_weights, TieredEmbedding):
+                    embedding_weights = embedding_weights.sync()
                 self.save_embedding_weights(
                     create_model_intermediate_embedding_weights_filepath(
                         output_dir,
                         self._model_name,
                         dataset_name,
                         epoch_nr,
-                        intermediate_embedding_weights_saves,
-                    )
+                        intermediate_embedding_progress + 1,
+                    ),
+                    embedding_weights,
+                    background_writer,
                 )
+            intermediate_embedding_progress += 1
+        return intermediate_embedding_progress
 
-            # Write to train logs
-            if train_logs_to_file:
-                train_logs_file.write(f"\n{epoch_nr},{avg_loss},{time_spent_epoch}")
-                train_logs_file.flush()
-
-            # Save intermediate model to file
-            if verbose == 1:
-                print("Saving model to file...")
-            checkpoint_path = create_model_checkpoint_filepath(
-                output_dir,
-                self._model_name,
-                dataset_name,
-                epoch_nr,
+    def _init_workers_train_state(
+        self,
+        train_state: dict,
+        backend: str,
+        compiled_corpus_dir: str,
+        embedding_storage_dir: str,
+        hot_vocab_size: int,
+    ) -> None:
+        """
+        Moves the embedding matrices into shared memory (or tiered embedding
+        storage) and prepares the inputs of the "hogwild" and
+        "tensorflow_data_parallel" backends (see `fit` for a description of the
+        parameters).
+
+        Parameters
+        ----------
+        train_state : dict
+            Dictionary to store the shared embedding matrices and backend inputs in.
+            The shared memory directory is stored as soon as it is created, such that
+            it can be cleaned up even if the setup fails.
+        """
+        if backend == "hogwild" and embedding_storage_dir != "":
+
+            # Store embedding matrices in files, keeping the rows of the most common
+            # words in shared memory
+            os.makedirs(embedding_storage_dir, exist_ok=True)
+            vocab_size = self._tokenizer.vocab_size
+            model_weights = self._get_model_weights()
+            (
+                train_state["target_embedding"],
+                train_state["context_embedding"],
+            ) = (
+                create_tiered_embedding(
+                    filepath=join(embedding_storage_dir, weights_filename),
+                    num_hot_rows=hot_vocab_size,
+                    shape=(vocab_size, self._embedding_dim),
+                    init_range=init_range,
+                    weights=None if model_weights is None else model_weights[i],
+                    word_counts=self._tokenizer.word_counts,
+                )
+                for i, (weights_filename, init_range) in enumerate(
+                    zip(MODEL_WEIGHTS_FILENAMES, (0.5 / self._embedding_dim, 0.1))
+                )
             )
-            self.save_model(checkpoint_path)
-            if verbose == 1:
-                print("Done!")
+            self._model = None
+            self._model_weights = None
+        elif backend == "hogwild":
+
+            # Move embedding matrices into shared memory
+            (
+                train_state["target_embedding"],
+                train_state["context_embedding"],
+            ) = (sharedmem.copy(weights) for weights in self._model.get_weights())
+        else:
 
-        # Close train logs file handler
-        if train_logs_to_file:
-            train_logs_file.close()
+            # Move embedding matrices into (file-backed) shared memory, such that
+            # they can be opened by spawned worker processes
+            shared_memory_dir = create_shared_memory_dir()
+            train_state["shared_memory_dir"] = shared_memory_dir
+            (
+                train_state["target_embedding"],
+                train_state["context_embedding"],
+            ) = (
+                create_shared_memmap(join(shared_memory_dir, weights_filename), weights)
+                for weights_filename, weights in zip(
+                    MODEL_WEIGHTS_FILENAMES, self._model.get_weights()
+                )
+            )
+            train_state["model_config"] = {
+                "embedding_dim": self._embedding_dim,
+                "batch_size": self._batch_size,
+                "num_negative_samples": self._num_negative_samples,
+                "unigram_exponent_negative_sampling": self._unigram_exponent_negative_sampling,
+                "learning_rate": self._learning_rate,
+                "min_learning_rate": self._min_learning_rate,
+                "name": self._model_name,
+                "target_embedding_layer_name": self._target_embedding_layer_name,
+                "training_mode": self._training_mode,
+                "num_shared_negative_samples": self._num_shared_negative_samples,
+            }
+        if backend == "hogwild":
+            train_state["negative_sampling_table"] = create_negative_sampling_table(
+                self._tokenizer.word_counts, self._unigram_exponent_negative_sampling
+            )
+            (
+                train_state["corpus_tokens"],
+                train_state["corpus_offsets"],
+                _,
+            ) = load_compiled_corpus(compiled_corpus_dir)
+
+    def _train_epoch_tensorflow(
+        self,
+        perform_train_steps: Callable,
+        text_data_filepaths: List[str],
+        num_texts: int,
+        compiled_corpus_dir: str,
+        epoch_nr: int,
+        end_epoch_nr: int,
+        progressbar: Progbar,
+        profiler: EpochProfiler,
+        profiler_trace: ProfilerTrace,
+        save_intermediate_embedding_weights: Callable,
+    ) -> Tuple[float, int, int]:
+        """
+        Trains the internal Keras model for an epoch using the "tensorflow" backend
+        (see `fit` for a description of the parameters).
+
+        Parameters
+        ----------
+        perform_train_steps : Callable
+            TensorFlow training function (see `_create_train_steps_function`).
+        progressbar : Progbar
+            Progressbar of the epoch.
+        profiler : EpochProfiler
+            Profiler of the epoch.
+        profiler_trace : ProfilerTrace
+            Profiler trace of the training.
+        save_intermediate_embedding_weights : Callable
+            Function performing intermediate saves of embedding weights (see
+            `_save_intermediate_embedding_weights`).
+
+        Returns
+        -------
+        result : tuple of float and int
+            Average loss, number of training steps and number of target/context pairs
+            trained on in the epoch.
+        """
+        # Initialize new dataset per epoch
+        train_dataset = create_dataset(
+            text_data_filepaths,
+            num_texts,
+            self._tokenizer,
+            self._max_window_size,
+            self._batch_size,
+            compiled_corpus_dir,
+            training_mode=self._training_mode,
+        )
+
+        # Iterate over batches of data and perform training,
+        # `steps_per_execution` steps at a time
+        avg_loss = 0.0
+        steps = 0
+        pairs = 0
+        intermediate_embedding_progress = 0
+        train_iterator = iter(train_dataset)
+        epoch_nr_tf = tf.constant(epoch_nr, dtype=tf.float32)
+        end_epoch_nr_tf = tf.constant(end_epoch_nr, dtype=tf.float32)
+        while True:
+            profiler_trace.update()
+            with profiler.measure("train_step"):
+                (
+                    loss_sum,
+                    num_steps,
+                    learning_rate,
+                    epoch_progress,
+                    num_pairs,
+                    input_wait_time,
+                ) = perform_train_steps(train_iterator, epoch_nr_tf, end_epoch_nr_tf)
+
+                # Wait for the training steps to finish
+                num_steps_np = int(num_steps.numpy())
+                profiler.add("input_wait", float(input_wait_time.numpy()))
+            if num_steps_np == 0:
+                break
+            profiler_trace.add_steps(num_steps_np)
+
+            # Add to average loss
+            with profiler.measure("sync"):
+                loss_sum_np = loss_sum.numpy()
+                epoch_progress_np = epoch_progress.numpy()
+                pairs += int(num_pairs.numpy())
+            avg_loss += loss_sum_np
+            steps += num_steps_np
+
+            # Perform intermediate saves of embedding weights to file
+            intermediate_embedding_progress = save_intermediate_embedding_weights(
+                epoch_nr=epoch_nr,
+                epoch_progress=epoch_progress_np,
+                intermediate_embedding_progress=intermediate_embedding_progress,
+            )
+
+            # Update progressbar
+            sent_nr = int(epoch_progress_np * num_texts)
+            with profiler.measure("sync"):
+                progressbar.update(
+                    sent_nr,
+                    values=[
+                        ("loss", loss_sum_np / num_steps_np),
+                        ("learning_rate", learning_rate),
+                    ],
+                )
+
+        # Compute average loss
+        avg_loss /= steps
+        return avg_loss, steps, pairs
+
+    def _train_epoch_workers(
+        self,
+        train_state: dict,
+        backend: str,
+        text_data_filepaths: List[str],
+        num_texts: int,
+        compiled_corpus_dir: str,
+        epoch_nr: int,
+        end_epoch_nr: int,
+        num_workers: int,
+        averaging_interval_steps: int,
+        progressbar: Progbar,
+        profiler: EpochProfiler,
+        save_intermediate_embedding_weights: Callable,
+    ) -> Tuple[float, float, int]:
+        """
+        Trains the embedding matrices for an epoch in worker processes, using the
+        "hogwild" or "tensorflow_data_parallel" backend, and copies the trained
+        embedding matrices back into the model (see `fit` for a description of the
+        parameters).
+
+        Parameters
+        ----------
+        train_state : dict
+            Shared embedding matrices and backend inputs (see
+            `_init_workers_train_state`).
+        progressbar : Progbar
+            Progressbar of the epoch.
+        profiler : EpochProfiler
+            Profiler of the epoch.
+        save_intermediate_embedding_weights : Callable
+            Function performing intermediate saves of embedding weights (see
+            `_save_intermediate_embedding_weights`).
+
+        Returns
+        -------
+        result : tuple of float, float and int
+            Average loss, number of training steps (NaN for the "hogwild" backend,
+            which does not train in batches) and number of target/context pairs
+            trained on in the epoch.
+        """
+        target_embedding_shared = train_state["target_embedding"]
+        context_embedding_shared = train_state["context_embedding"]
+        intermediate_embedding_progress = 0
+
+        def on_workers_progress(
+            epoch_progress: float, loss: float, learning_rate: float
+        ) -> None:
+            """
+            Performs intermediate saves and updates the progressbar during
+            training in worker processes.
+
+            Parameters
+            ----------
+            epoch_progress : float
+                Current epoch progress.
+            loss : float
+                Average loss so far in the epoch.
+            learning_rate : float
+                Current learning rate.
+            """
+            nonlocal intermediate_embedding_progress
+            intermediate_embedding_progress = save_intermediate_embedding_weights(
+                epoch_nr=epoch_nr,
+                epoch_progress=epoch_progress,
+                intermediate_embedding_progress=intermediate_embedding_progress,
+                embedding_weights=target_embedding_shared,
+            )
+            with profiler.measure("sync"):
+                progressbar.update(
+                    int(epoch_progress * num_texts),
+                    values=[("loss", loss), ("learning_rate", learning_rate)],
+                )
+
+        if backend == "hogwild":
+
+            # Train on all texts of the compiled corpus
+            with profiler.measure("train_step"):
+                avg_loss, num_pairs = train_epoch_hogwild(
+                    target_embedding=target_embedding_shared,
+                    context_embedding=context_embedding_shared,
+                    corpus_tokens=train_state["corpus_tokens"],
+                    corpus_offsets=train_state["corpus_offsets"],
+                    word_keep_probs=self._tokenizer.word_keep_probs,
+                    negative_sampling_table=train_state["negative_sampling_table"],
+                    max_window_size=self._max_window_size,
+                    num_negative_samples=self._num_negative_samples,
+                    learning_rate=self._learning_rate,
+                    min_learning_rate=self._min_learning_rate,
+                    epoch_nr=epoch_nr,
+                    end_epoch_nr=end_epoch_nr,
+                    num_workers=num_workers,
+                    progress_callback=on_workers_progress,
+                    seed=epoch_nr,
+                )
+
+            # Hogwild updates the embedding matrices one pair at a time, not in
+            # batches
+            num_steps = np.nan
+        else:
+
+            # Train on shards of the texts in parallel
+            with profiler.measure("train_step"):
+                avg_loss, num_steps, num_pairs = train_epoch_data_parallel(
+                    target_embedding=target_embedding_shared,
+                    context_embedding=context_embedding_shared,
+                    text_data_filepaths=text_data_filepaths,
+                    num_texts=num_texts,
+                    tokenizer=self._tokenizer,
+                    model_config=train_state["model_config"],
+                    max_window_size=self._max_window_size,
+                    learning_rate=self._learning_rate,
+                    min_learning_rate=self._min_learning_rate,
+                    epoch_nr=epoch_nr,
+                    end_epoch_nr=end_epoch_nr,
+                    compiled_corpus_dir=compiled_corpus_dir,
+                    num_workers=num_workers,
+                    averaging_interval_steps=averaging_interval_steps,
+                    progress_callback=on_workers_progress,
+                    seed=epoch_nr,
+                )
+
+        with profiler.measure("sync"):
+            if isinstance(target_embedding_shared, TieredEmbedding):
+
+                # Write trained rows in shared memory back to file and use the
+                # memory-mapped embedding matrices as the weights of the model
+                self._init_model(
+                    [target_embedding_shared.sync(), context_embedding_shared.sync()]
+                )
+            else:
+
+                # Copy trained embedding matrices back into the model
+                self._model.set_weights(
+                    [target_embedding_shared, context_embedding_shared]
+                )
+        return avg_loss, num_steps, num_pairs
+
+    def _save_epoch(
+        self,
+        output_dir: str,
+        dataset_name: str,
+        epoch_nr: int,
+        intermediate_embedding_weights_saves: int,
+        background_writer: Optional[BackgroundWriter],
+        verbose: int,
+    ) -> None:
+        """
+        Saves the last intermediate save of embedding weights and the model
+        checkpoint at the end of an epoch of `fit` (see `fit` for a description of
+        the parameters).
+
+        Parameters
+        ----------
+        epoch_nr : int
+            Current epoch number.
+        background_writer : BackgroundWriter
+            Background writer to save with (None to save before returning).
+        """
+        # Save last intermediate save of embedding weights to file
+        if intermediate_embedding_weights_saves > 0:
+            self.save_embedding_weights(
+                create_model_intermediate_embedding_weights_filepath(
+                    output_dir,
+                    self._model_name,
+                    dataset_name,
+                    epoch_nr,
+                    intermediate_embedding_weights_saves,
+                ),
+                background_writer=background_writer,
+            )
 
-    def save_model(self, target_filepath: str) -> None:
+        # Save intermediate model to file
+        if verbose == 1:
+            print("Saving model to file...")
+        checkpoint_path = create_model_checkpoint_filepath(
+            output_dir,
+            self._model_name,
+            dataset_name,
+            epoch_nr,
+        )
+        self.save_model(checkpoint_path, background_writer)
+        if verbose == 1:
+            print("Done!")
+
+    def _write_epoch_logs(
+        self,
+        train_logs_file: Optional[TextIO],
+        summary_writer: Optional[tf.summary.SummaryWriter],
+        epoch_nr: int,
+        avg_loss: float,
+        time_spent_epoch: float,
+        epoch_stats: dict,
+    ) -> None:
         """
-        Saves the word2vec instance to a file.
+        Writes the loss, time spent and profiling statistics of an epoch of `fit` to
+        the train logs file and TensorBoard.
+
+        Parameters
+        ----------
+        train_logs_file : TextIO
+            Train logs file (None to not write to file).
+        summary_writer : tf.summary.SummaryWriter
+            TensorBoard summary writer (None to not write to TensorBoard).
+        epoch_nr : int
+            Current epoch number.
+        avg_loss : float
+            Average loss of the epoch.
+        time_spent_epoch : float
+            Wall time (in seconds) spent on the epoch.
+        epoch_stats : dict
+            Profiling statistics of the epoch (see `EpochProfiler.stats`).
+        """
+        # Write to train logs
+        if train_logs_file is not None:
+            train_logs_file.write(
+                f"\n{epoch_nr},{avg_loss},{time_spent_epoch},"
+                + ",".join(str(epoch_stats[name]) for name in PROFILING_STATS_NAMES)
+            )
+            train_logs_file.flush()
+
+        # Write to TensorBoard
+        if summary_writer is not None:
+            with summary_writer.as_default():
+                tf.summary.scalar("epoch_loss", avg_loss, step=epoch_nr)
+                for name in PROFILING_STATS_NAMES:
+                    if not np.isnan(epoch_stats[name]):
+                        tf.summary.scalar(
+                            f"profiling/{name}", epoch_stats[name], step=epoch_nr
+                        )
+            summary_writer.flush()
+
+    def _finish_fit(
+        self,
+        train_state: dict,
+        profiler_trace: ProfilerTrace,
+        background_writer: Optional[BackgroundWriter],
+        train_logs_file: Optional[TextIO],
+        verbose: int,
+    ) -> None:
+        """
+        Cleans up after `fit`, also if training was interrupted: stops the profiler
+        trace, removes shared memory, finishes pending writes and closes the train
+        logs file.
+
+        Parameters
+        ----------
+        train_state : dict
+            Shared embedding matrices and backend inputs (see
+            `_init_workers_train_state`).
+        profiler_trace : ProfilerTrace
+            Profiler trace of the training.
+        background_writer : BackgroundWriter
+            Background writer used to save (None if not used).
+        train_logs_file : TextIO
+            Train logs file (None if not used).
+        verbose : int
+            Verbosity mode, 0 (silent), 1 (verbose), 2 (semi-verbose).
+        """
+        try:
+
+            # Stop capturing profiler trace, if the step range exceeded the training
+            profiler_trace.stop()
+
+            # Clean up shared memory
+            shared_memory_dir = train_state.pop("shared_memory_dir", None)
+            train_state.clear()
+            if shared_memory_dir is not None:
+                shutil.rmtree(shared_memory_dir)
+
+            # Wait for pending writes to finish
+            if background_writer is not None:
+                if verbose == 1:
+                    print("Waiting for pending saves to finish...")
+                background_writer.close()
+                if verbose == 1:
+                    print("Done!")
+        finally:
+
+            # Close train logs file handler
+            if train_logs_file is not None:
+                train_logs_file.close()
+
+    def get_config(self) -> dict:
+        """
+        Gets the configuration of the word2vec instance, i.e. the arguments used to
+        initialize it (except for the tokenizer).
+
+        Returns
+        -------
+        config : dict
+            Configuration of the word2vec instance.
+        """
+        return {
+            "embedding_dim": self._embedding_dim,
+            "learning_rate": self._learning_rate,
+            "min_learning_rate": self._min_learning_rate,
+            "batch_size": self._batch_size,
+            "max_window_size": self._max_window_size,
+            "num_negative_samples": self._num_negative_samples,
+            "unigram_exponent_negative_sampling": self._unigram_exponent_negative_sampling,
+            "model_name": self._model_name,
+            "target_embedding_layer_name": self._target_embedding_layer_name,
+            "mixed_precision": self._mixed_precision,
+            "training_mode": self._training_mode,
+            "num_shared_negative_samples": self._num_shared_negative_samples,
+        }
+
+    def save_model(
+        self,
+        target_filepath: str,
+        background_writer: Optional[BackgroundWriter] = None,
+    ) -> None:
+        """
+        Saves the word2vec instance to a checkpoint directory, containing its
+        configuration (JSON), the vocabulary of its tokenizer (see
+        `Tokenizer.save_mmap_vocab`) and one (float32) Numpy file per weight matrix,
+        such that the vocabulary and weights can be memory-mapped when loading.
 
         Parameters
         ----------
         target_filepath : str
-            Where to save the model.
+            Where to save the model (checkpoint directory).
+        background_writer : BackgroundWriter, optional
+            Background writer to save the model with (defaults to None, i.e. save
+            the model before returning). If specified, a snapshot of the weights
+            is written to file in the background.
         """
-        # Save model to file
-        joblib.dump(
-            self, target_filepath, protocol=4
-        )  # protocol=4 for saving big files
+        config = self.get_config()
+        tokenizer = self._tokenizer
+        model_weights = self._get_model_weights()
+        if model_weights is not None and background_writer is not None:
+
+            # Snapshot the weights, such that training can continue while
+            # the snapshot is being written.
+            model_weights = [
+                _snapshot_weights(
+                    weights, f"{target_filepath}.{weights_filename}.snapshot"
+                )
+                for weights_filename, weights in zip(
+                    MODEL_WEIGHTS_FILENAMES, model_weights
+                )
+            ]
+
+        def write_checkpoint(checkpoint_dir: str) -> None:
+            """
+            Writes the files of the checkpoint to a directory.
+
+            Parameters
+            ----------
+            checkpoint_dir : str
+                Directory to write the files to.
+            """
+            with open(join(checkpoint_dir, MODEL_CONFIG_FILENAME), "w") as config_file:
+                json.dump(config, config_file, indent=2)
+            if tokenizer is not None:
+                tokenizer.save_mmap_vocab(
+                    join(checkpoint_dir, MODEL_VOCAB_DIRNAME),
+                    save_word_occurrences=True,
+                )
+            if model_weights is not None:
+                for weights_filename, weights in zip(
+                    MODEL_WEIGHTS_FILENAMES, model_weights
+                ):
+                    with open(
+                        join(checkpoint_dir, weights_filename), "wb"
+                    ) as weights_file:
+                        _write_weights(weights_file, weights, np.float32)
+
+        def write_checkpoint_snapshot() -> None:
+            """
+            Writes the checkpoint directory and removes the snapshot files, if any.
+            """
+            try:
+                write_dir_atomic(target_filepath, write_checkpoint)
+            finally:
+                for weights_filename in MODEL_WEIGHTS_FILENAMES:
+                    snapshot_filepath = f"{target_filepath}.{weights_filename}.snapshot"
+                    if isfile(snapshot_filepath):
+                        os.remove(snapshot_filepath)
+
+        if background_writer is None:
+            write_dir_atomic(target_filepath, write_checkpoint)
+        else:
+            background_writer.submit_task(write_checkpoint_snapshot)
 
-    def save_embedding_weights(self, target_filepath: str) -> None:
+    def save_embedding_weights(
+        self,
+        target_filepath: str,
+        embedding_weights: Optional[np.ndarray] = None,
+        background_writer: Optional[BackgroundWriter] = None,
+    ) -> None:
         """
-        Saves (target) embedding weights to file using Numpy.
+        Saves (target) embedding weights to file using Numpy. The embedding weights
+        are saved (as float64) in chunks of rows, such that memory-mapped embedding
+        weights are never held in memory in full.
 
         Parameters
         ----------
         target_filepath : str
             Where to save the (target) embedding weights to.
+        embedding_weights : np.ndarray, optional
+            Embedding weights to save (defaults to None, i.e. the target embedding
+            weights of the internal Keras model).
+        background_writer : BackgroundWriter, optional
+            Background writer to save the embedding weights with (defaults to None,
+            i.e. save the embedding weights before returning). If specified, a
+            snapshot of the embedding weights is written to file in the background.
         """
-        np.save(target_filepath, self.embedding_weights)
+        if embedding_weights is None:
+            embedding_weights = self._get_target_embedding_weights(copy=False)
+        if background_writer is None:
+            with open(target_filepath, "wb") as target_file:
+                _write_weights(target_file, embedding_weights, np.float64)
+        else:
+
+            # Snapshot the embedding weights and cast them in the background
+            snapshot_filepath = f"{target_filepath}.snapshot"
+            embedding_weights_snapshot = _snapshot_weights(
+                embedding_weights, snapshot_filepath
+            )
+
+            def write_embedding_weights() -> None:
+                """
+                Writes the snapshot of the embedding weights to file and removes the
+                snapshot file, if any.
+                """
+                try:
+                    write_file_atomic(
+                        target_filepath,
+                        lambda target_file: _write_weights(
+                            target_file, embedding_weights_snapshot, np.float64
+                        ),
+                    )
+                finally:
+                    if isfile(snapshot_filepath):
+                        os.remove(snapshot_filepath)
+
+            background_writer.submit_task(write_embedding_weights)
 
     def save_words(self, target_filepath: str) -> None:
         """
@@ -600,6 +1969,8 @@ class Word2vec:
             "min_learning_rate": str(self._min_learning_rate),
             "max_window_size": str(self._max_window_size),
             "num_negative_samples": str(self._num_negative_samples),
+            "training_mode": self._training_mode,
+            "num_shared_negative_samples": str(self._num_shared_negative_samples),
         }
 
         # Save to file
@@ -607,22 +1978,88 @@ class Word2vec:
             model_train_config.write(file)
 
 
-def load_model(model_filepath: str) -> Word2vec:
+def load_model(model_filepath: str, mmap_mode: Optional[str] = "r") -> Word2vec:
     """
     Loads and returns a word2vec instance from file.
 
+    The vocabulary and weights of a checkpoint directory (see
+    `Word2vec.save_model`) are memory-mapped from the directory and the internal
+    Keras model is only built once it is needed, e.g. when resuming training.
+    Models saved as a single (joblib) file are loaded entirely.
+
     Parameters
     ----------
     model_filepath : str
         Where to load the model from.
+    mmap_mode : str, optional
+        Memmap mode to use when loading the weights of a checkpoint directory
+        (defaults to "r", or read). If None, the weights are read into memory.
 
     Returns
     -------
     word2vec : Word2vec
         Word2vec instance.
     """
-    # Read saved model dictionary from file
-    return joblib.load(model_filepath)
+    if not isdir(model_filepath):
+
+        # Read saved model dictionary from file
+        return joblib.load(model_filepath)
+
+    with open(join(model_filepath, MODEL_CONFIG_FILENAME), "r") as config_file:
+        config = json.load(config_file)
+
+    # Memory-map vocabulary (or load the tokenizer of older checkpoints)
+    vocab_dir = join(model_filepath, MODEL_VOCAB_DIRNAME)
+    tokenizer_filepath = join(model_filepath, MODEL_TOKENIZER_FILENAME)
+    tokenizer: Optional[Tokenizer] = None
+    if isdir(vocab_dir):
+        tokenizer = load_tokenizer(vocab_dir)
+    elif isfile(tokenizer_filepath):
+        tokenizer = load_tokenizer(tokenizer_filepath)
+    word2vec = Word2vec(tokenizer=tokenizer, **config)
+
+    # Memory-map weights
+    weights_filepaths = [
+        join(model_filepath, weights_filename)
+        for weights_filename in MODEL_WEIGHTS_FILENAMES
+    ]
+    if all(isfile(weights_filepath) for weights_filepath in weights_filepaths):
+        word2vec._init_model(
+            [
+                np.load(weights_filepath, mmap_mode=mmap_mode)
+                for weights_filepath in weights_filepaths
+            ]
+        )
+
+    return word2vec
+
+
+def load_model_embedding_weights(
+    model_filepath: str, mmap_mode: Optional[str] = "r"
+) -> np.ndarray:
+    """
+    Loads and returns the (target) embedding weights of a word2vec model from file,
+    without building its internal Keras model.
+
+    Parameters
+    ----------
+    model_filepath : str
+        Where to load the model from.
+    mmap_mode : str, optional
+        Memmap mode to use when loading the embedding weights of a checkpoint
+        directory (defaults to "r", or read). If None, the embedding weights are
+        read into memory.
+
+    Returns
+    -------
+    embedding_weights : np.ndarray
+        (Target) embedding weights of the model.
+    """
+    if not isdir(model_filepath):
+        return load_model(model_filepath).embedding_weights
+    return np.load(
+        join(model_filepath, MODEL_WEIGHTS_FILENAMES[0]), mmap_mode=mmap_mode
+    )
 
 
 def load_model_training_output(
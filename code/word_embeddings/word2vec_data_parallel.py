@@ -0,0 +1,456 @@
+import multiprocessing
+import os
+import tempfile
+from multiprocessing import cpu_count
+from os.path import dirname, isdir, join
+from threading import BrokenBarrierError
+from time import sleep
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# Number of row chunks of the shared embedding matrices, each guarded by a lock
+NUM_LOCK_CHUNKS = 64
+
+# Filenames of the shared training state arrays (stored next to the embedding matrices)
+WORKER_PROGRESS_FILENAME = "worker_progress.npy"
+WORKER_LOSS_SUMS_FILENAME = "worker_loss_sums.npy"
+WORKER_STEPS_FILENAME = "worker_steps.npy"
+WORKER_PAIRS_FILENAME = "worker_pairs.npy"
+WORKER_DONE_FILENAME = "worker_done.npy"
+TOUCHED_ROWS_FILENAME = "touched_rows.npy"
+TOKENIZER_FILENAME = "tokenizer.joblib"
+
+
+def create_shared_memory_dir() -> str:
+    """
+    Creates a temporary directory for file-backed shared memory, preferably
+    in /dev/shm (i.e. in RAM).
+
+    Returns
+    -------
+    shared_memory_dir : str
+        Path of the created directory.
+    """
+    return tempfile.mkdtemp(
+        prefix="word2vec_", dir="/dev/shm" if isdir("/dev/shm") else None
+    )
+
+
+def create_shared_memmap(filepath: str, array: np.ndarray) -> np.memmap:
+    """
+    Creates a file-backed shared memory copy of an array, which can be opened
+    by spawned processes.
+
+    Parameters
+    ----------
+    filepath : str
+        Where to store the array (.npy file).
+    array : np.ndarray
+        Array to copy into shared memory.
+
+    Returns
+    -------
+    shared_array : np.memmap
+        Memory-mapped copy of the array.
+    """
+    shared_array = np.lib.format.open_memmap(
+        filepath, mode="w+", dtype=array.dtype, shape=array.shape
+    )
+    shared_array[:] = array
+    return shared_array
+
+
+def _train_data_parallel_worker(
+    worker_idx: int,
+    num_workers: int,
+    worker_args: dict,
+    barrier: multiprocessing.Barrier,
+    chunk_locks: List[multiprocessing.Lock],
+) -> None:
+    """
+    Trains a replica of the word2vec model on a shard of the texts, averaging
+    the embedding matrices with the other workers every `averaging_interval_steps`
+    steps.
+
+    Parameters
+    ----------
+    worker_idx : int
+        Index of the worker (and the shard of the texts to train on).
+    num_workers : int
+        Number of worker processes.
+    worker_args : dict
+        Arguments of the worker (see `train_epoch_data_parallel`).
+    barrier : multiprocessing.Barrier
+        Barrier shared by all workers, used to synchronize averaging.
+    chunk_locks : list of multiprocessing.Lock
+        Locks guarding the row chunks of the shared embedding matrices.
+    """
+    import tensorflow as tf
+
+    from word_embeddings.dataset import create_dataset
+    from word_embeddings.tokenizer import load_tokenizer
+    from word_embeddings.word2vec_model import Word2VecSGNSModel
+
+    # Share the CPUs among the workers
+    tf.config.threading.set_intra_op_parallelism_threads(
+        max(cpu_count() // num_workers, 1)
+    )
+    tf.config.threading.set_inter_op_parallelism_threads(
+        max(cpu_count() // num_workers, 1)
+    )
+    tf.random.set_seed(worker_args["seed"] + worker_idx)
+
+    # Open shared memory
+    shared_embeddings = [
+        np.load(embedding_filepath, mmap_mode="r+")
+        for embedding_filepath in worker_args["embedding_filepaths"]
+    ]
+    shared_memory_dir = dirname(worker_args["embedding_filepaths"][0])
+    worker_progress = np.load(
+        join(shared_memory_dir, WORKER_PROGRESS_FILENAME), mmap_mode="r+"
+    )
+    worker_loss_sums = np.load(
+        join(shared_memory_dir, WORKER_LOSS_SUMS_FILENAME), mmap_mode="r+"
+    )
+    worker_steps = np.load(
+        join(shared_memory_dir, WORKER_STEPS_FILENAME), mmap_mode="r+"
+    )
+    worker_pairs = np.load(
+        join(shared_memory_dir, WORKER_PAIRS_FILENAME), mmap_mode="r+"
+    )
+    worker_done = np.load(join(shared_memory_dir, WORKER_DONE_FILENAME), mmap_mode="r+")
+    shared_touched_rows = np.load(
+        join(shared_memory_dir, TOUCHED_ROWS_FILENAME), mmap_mode="r+"
+    )
+
+    # Initialize model replica from the shared embedding matrices
+    tokenizer = load_tokenizer(join(shared_memory_dir, TOKENIZER_FILENAME))
+    model = Word2VecSGNSModel(
+        word_counts=tokenizer.word_counts, **worker_args["model_config"]
+    )
+    synced_embeddings = [
+        np.array(shared_embedding) for shared_embedding in shared_embeddings
+    ]
+    model.set_weights(synced_embeddings)
+
+    # Rows of the embedding matrices updated by the worker since the last averaging
+    touched_rows = tuple(
+        tf.Variable(tf.zeros(len(synced_embedding), tf.bool), trainable=False)
+        for synced_embedding in synced_embeddings
+    )
+
+    learning_rate = worker_args["learning_rate"]
+    min_learning_rate = worker_args["min_learning_rate"]
+
+    @tf.function
+    def perform_train_step(
+        input_targets: tf.Tensor, input_contexts: tf.Tensor, progress: tf.Tensor
+    ) -> tf.Tensor:
+        """
+        Performs a single (in-place) training step on a batch of target/context pairs.
+
+        Parameters
+        ----------
+        input_targets : tf.Tensor
+            Input targets to train on.
+        input_contexts : tf.Tensor
+            Input contexts to train on.
+        progress : tf.Tensor
+            Current (global) training progress.
+
+        Returns
+        -------
+        loss : tf.Tensor
+            Mean loss of the batch.
+        """
+        decaying_learning_rate = tf.maximum(
+            learning_rate * (1 - progress) + min_learning_rate * progress,
+            min_learning_rate,
+        )
+        loss = model.sparse_sgd_step(
+            input_targets, input_contexts, decaying_learning_rate, touched_rows
+        )
+        return model.mean_loss(loss)
+
+    train_dataset = create_dataset(
+        worker_args["text_data_filepaths"],
+        worker_args["num_texts"],
+        tokenizer,
+        worker_args["max_window_size"],
+        worker_args["model_config"]["batch_size"],
+        worker_args["compiled_corpus_dir"],
+        num_shards=num_workers,
+        shard_index=worker_idx,
+        training_mode=worker_args["model_config"]["training_mode"],
+    )
+    train_iterator = iter(train_dataset)
+    epoch_nr = worker_args["epoch_nr"]
+    end_epoch_nr = worker_args["end_epoch_nr"]
+    chunk_bounds = np.linspace(
+        0, len(synced_embeddings[0]), NUM_LOCK_CHUNKS + 1
+    ).astype(int)
+    done = False
+    averaging_round = 0
+    try:
+        while True:
+
+            # Train on (up to) `averaging_interval_steps` batches
+            if not done:
+                for _ in range(worker_args["averaging_interval_steps"]):
+                    batch = next(train_iterator, None)
+                    if batch is None:
+                        done = True
+                        break
+                    input_targets, input_contexts, shard_progress = batch
+                    worker_progress[worker_idx] = float(shard_progress)
+
+                    # Compute overall progress (over all epochs) from all workers
+                    epoch_progress = worker_progress.mean()
+                    progress = (epoch_nr - 1 + epoch_progress) / end_epoch_nr
+                    loss = perform_train_step(
+                        input_targets,
+                        input_contexts,
+                        tf.constant([progress], dtype=tf.float32),
+                    )
+                    worker_loss_sums[worker_idx] += float(loss)
+                    worker_steps[worker_idx] += 1
+                    worker_pairs[worker_idx] += len(input_targets)
+                if done:
+                    worker_progress[worker_idx] = 1.0
+                    worker_done[worker_idx] = True
+
+            # Add the (averaged) parameter updates since the last averaging to the
+            # shared embedding matrices, one row chunk at a time. Only the rows updated
+            # by the worker are read, and they are marked as touched in one of two
+            # alternating buffers (such that the buffer of the previous averaging can
+            # be cleared in the meantime). Finished workers keep joining the averaging
+            # until all workers are finished.
+            round_touched_rows = shared_touched_rows[averaging_round % 2]
+            for embedding_idx, weights in enumerate(model.weights):
+                rows = np.flatnonzero(touched_rows[embedding_idx].numpy())
+                touched_rows[embedding_idx].assign(
+                    tf.zeros_like(touched_rows[embedding_idx])
+                )
+                round_touched_rows[embedding_idx, rows] = True
+                rows_delta = (
+                    tf.gather(weights, rows).numpy()
+                    - synced_embeddings[embedding_idx][rows]
+                ) / num_workers
+                rows_chunk_bounds = np.searchsorted(rows, chunk_bounds)
+                for i in range(NUM_LOCK_CHUNKS):
+                    chunk_idx = (worker_idx + i) % NUM_LOCK_CHUNKS
+                    chunk_start = rows_chunk_bounds[chunk_idx]
+                    chunk_end = rows_chunk_bounds[chunk_idx + 1]
+                    if chunk_start == chunk_end:
+                        continue
+                    with chunk_locks[chunk_idx]:
+                        shared_embeddings[embedding_idx][
+                            rows[chunk_start:chunk_end]
+                        ] += rows_delta[chunk_start:chunk_end]
+            barrier.wait()
+
+            # Continue training from the averaged embedding matrices, by updating the
+            # rows touched by any of the workers in place
+            all_done = bool(worker_done.all())
+            for embedding_idx, weights in enumerate(model.weights):
+                rows = np.flatnonzero(round_touched_rows[embedding_idx])
+                rows_embedding = shared_embeddings[embedding_idx][rows]
+                synced_embeddings[embedding_idx][rows] = rows_embedding
+                weights.scatter_nd_update(np.expand_dims(rows, 1), rows_embedding)
+            barrier.wait()
+            if worker_idx == 0:
+                round_touched_rows[:] = False
+            averaging_round += 1
+            if all_done:
+                break
+    except BrokenBarrierError:
+        # Another worker failed
+        return
+
+
+def train_epoch_data_parallel(
+    target_embedding: np.memmap,
+    context_embedding: np.memmap,
+    text_data_filepaths: List[str],
+    num_texts: int,
+    tokenizer,
+    model_config: dict,
+    max_window_size: int,
+    learning_rate: float,
+    min_learning_rate: float,
+    epoch_nr: int,
+    end_epoch_nr: int,
+    compiled_corpus_dir: str = "",
+    num_workers: int = -1,
+    averaging_interval_steps: int = 100,
+    progress_callback: Optional[Callable[[float, float, float], None]] = None,
+    progress_interval: float = 1.0,
+    seed: int = 0,
+) -> Tuple[float, int, int]:
+    """
+    Trains word embeddings for a single epoch using skip-gram negative sampling in
+    multiple (spawned) worker processes. Each worker trains its own replica of the
+    word2vec model on a shard of the texts, and the embedding matrices of the replicas
+    are averaged through shared memory every `averaging_interval_steps` steps. The
+    decaying learning rate is computed from the global training progress.
+
+    Parameters
+    ----------
+    target_embedding : np.memmap
+        Target embedding matrix in file-backed shared memory (see `create_shared_memmap`),
+        of shape [vocab_size, embedding_dim].
+    context_embedding : np.memmap
+        Context embedding matrix in file-backed shared memory, stored in the same
+        directory as `target_embedding`, of shape [vocab_size, embedding_dim].
+    text_data_filepaths : list
+        Paths of text data to generate skip-gram target/context pairs from.
+    num_texts : int
+        Number of texts (or sentences) of the contents of `text_data_filepaths`.
+    tokenizer : Tokenizer
+        Tokenizer instance for tokenizing individual texts.
+    model_config : dict
+        Keyword arguments to initialize each `Word2VecSGNSModel` replica with
+        (except for `word_counts`).
+    max_window_size : int
+        Maximum number of words to the left and right of a target word.
+    learning_rate : float
+        Initial learning rate.
+    min_learning_rate : float
+        Minimum learning rate.
+    epoch_nr : int
+        Current epoch number.
+    end_epoch_nr : int
+        Last epoch number.
+    compiled_corpus_dir : str, optional
+        Directory of a compiled corpus of `text_data_filepaths` to read the texts
+        from (defaults to "").
+    num_workers : int, optional
+        Number of worker processes to use (defaults to -1, i.e. use all CPUs).
+    averaging_interval_steps : int, optional
+        Number of training steps each worker performs between each averaging of
+        the embedding matrices (defaults to 100).
+    progress_callback : Callable[[float, float, float], None], optional
+        Function called periodically with the epoch progress, average loss so far and
+        current learning rate, from the main process (defaults to None).
+    progress_interval : float, optional
+        Number of seconds between each call to `progress_callback` (defaults to 1).
+    seed : int, optional
+        Random seed of the first worker (defaults to 0).
+
+    Returns
+    -------
+    avg_loss : float
+        Average loss of the epoch.
+    num_steps : int
+        Number of training steps performed by all workers in the epoch.
+    num_pairs : int
+        Number of target/context pairs trained on by all workers in the epoch.
+    """
+    if num_workers == -1:
+        num_workers = cpu_count()
+
+    # Prepare shared training state for worker processes
+    shared_memory_dir = dirname(target_embedding.filename)
+    worker_progress = create_shared_memmap(
+        join(shared_memory_dir, WORKER_PROGRESS_FILENAME),
+        np.zeros(num_workers, dtype=np.float64),
+    )
+    worker_loss_sums = create_shared_memmap(
+        join(shared_memory_dir, WORKER_LOSS_SUMS_FILENAME),
+        np.zeros(num_workers, dtype=np.float64),
+    )
+    worker_steps = create_shared_memmap(
+        join(shared_memory_dir, WORKER_STEPS_FILENAME),
+        np.zeros(num_workers, dtype=np.int64),
+    )
+    worker_pairs = create_shared_memmap(
+        join(shared_memory_dir, WORKER_PAIRS_FILENAME),
+        np.zeros(num_workers, dtype=np.int64),
+    )
+    create_shared_memmap(
+        join(shared_memory_dir, WORKER_DONE_FILENAME),
+        np.zeros(num_workers, dtype=bool),
+    )
+    create_shared_memmap(
+        join(shared_memory_dir, TOUCHED_ROWS_FILENAME),
+        np.zeros((2, 2, len(target_embedding)), dtype=bool),
+    )
+    target_embedding.flush()
+    context_embedding.flush()
+
+    # The tokenizer is loaded from file by the workers, as unpickling it initializes
+    # TensorFlow (which has to be configured first)
+    tokenizer.save(join(shared_memory_dir, TOKENIZER_FILENAME))
+    worker_args = {
+        "embedding_filepaths": [target_embedding.filename, context_embedding.filename],
+        "text_data_filepaths": text_data_filepaths,
+        "num_texts": num_texts,
+        "model_config": model_config,
+        "max_window_size": max_window_size,
+        "learning_rate": learning_rate,
+        "min_learning_rate": min_learning_rate,
+        "epoch_nr": epoch_nr,
+        "end_epoch_nr": end_epoch_nr,
+        "compiled_corpus_dir": compiled_corpus_dir,
+        "averaging_interval_steps": averaging_interval_steps,
+        "seed": seed,
+    }
+
+    def report_progress() -> None:
+        """
+        Reports the current training progress to `progress_callback`.
+        """
+        if progress_callback is None:
+            return
+        epoch_progress = float(worker_progress.mean())
+        progress = (epoch_nr - 1 + epoch_progress) / end_epoch_nr
+        current_learning_rate = max(
+            learning_rate * (1 - progress) + min_learning_rate * progress,
+            min_learning_rate,
+        )
+        avg_loss = worker_loss_sums.sum() / max(worker_steps.sum(), 1)
+        progress_callback(epoch_progress, avg_loss, current_learning_rate)
+
+    # Start one (spawned) worker process per shard of the texts. TensorFlow is not
+    # fork-safe, so the workers cannot inherit the state of the main process.
+    mp_context = multiprocessing.get_context("spawn")
+    barrier = mp_context.Barrier(num_workers)
+    chunk_locks = [mp_context.Lock() for _ in range(NUM_LOCK_CHUNKS)]
+    workers = [
+        mp_context.Process(
+            target=_train_data_parallel_worker,
+            args=(worker_idx, num_workers, worker_args, barrier, chunk_locks),
+        )
+        for worker_idx in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # Wait for workers to finish and periodically report progress
+    while any(worker.is_alive() for worker in workers):
+        if any(worker.exitcode not in (None, 0) for worker in workers):
+            barrier.abort()
+            break
+        report_progress()
+        sleep(progress_interval)
+    for worker in workers:
+        worker.join()
+    if any(worker.exitcode != 0 for worker in workers) or barrier.broken:
+        raise RuntimeError("One or more data-parallel worker processes failed.")
+    report_progress()
+
+    # Clean up shared training state
+    for filename in [
+        WORKER_PROGRESS_FILENAME,
+        WORKER_LOSS_SUMS_FILENAME,
+        WORKER_STEPS_FILENAME,
+        WORKER_PAIRS_FILENAME,
+        WORKER_DONE_FILENAME,
+        TOUCHED_ROWS_FILENAME,
+        TOKENIZER_FILENAME,
+    ]:
+        os.remove(join(shared_memory_dir, filename))
+
+    avg_loss = worker_loss_sums.sum() / max(worker_steps.sum(), 1)
+    return avg_loss, int(worker_steps.sum()), int(worker_pairs.sum())
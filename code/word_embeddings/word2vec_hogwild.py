@@ -0,0 +1,628 @@
+import multiprocessing
+from multiprocessing import cpu_count
+from os.path import abspath
+from time import sleep
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+import sharedmem
+from numba import njit
+
+# Gradients are clipped for logits outside [-MAX_EXP, MAX_EXP], as in word2vec.c
+MAX_EXP = 6.0
+
+# Number of words a worker processes before refreshing the global training progress
+# (and thus the learning rate), as in word2vec.c
+PROGRESS_UPDATE_INTERVAL = 10000
+
+# Number of rows to initialize (or copy) at a time when creating a tiered embedding
+# matrix, such that the full matrix is never held in memory
+TIERED_EMBEDDING_CHUNK_SIZE = 100000
+
+# Multiprocessing variable dict
+mp_var_dict: dict = {}
+
+
+class TieredEmbedding:
+    """
+    Embedding matrix stored in two tiers: the rows of the most common words are kept
+    in shared memory, while the remaining rows are memory-mapped from file.
+
+    As word counts follow Zipf's law, the rows in shared memory receive most of the
+    updates during training. The memory-mapped rows are paged in when they are used
+    and written back to file by the OS (using its page cache as a write-back cache),
+    such that the memory usage is bounded by the shared memory rows, rather than by
+    the vocabulary size.
+    """
+
+    def __init__(self, filepath: str, hot_rows: np.ndarray) -> None:
+        """
+        Initializes the TieredEmbedding class.
+
+        Parameters
+        ----------
+        filepath : str
+            Filepath of the (Numpy) file of the embedding matrix
+            (see `create_tiered_embedding`).
+        hot_rows : np.ndarray
+            Indices of the rows to keep in shared memory.
+        """
+        self._matrix = np.load(filepath, mmap_mode="r+")
+        self._hot_rows = np.asarray(hot_rows, dtype=np.int64)
+        self._num_hot_rows = len(self._hot_rows)
+        self.hot = sharedmem.copy(self._matrix[self._hot_rows])
+        self.cold = self._matrix
+
+        # Index of the row in shared memory of each row, or -1 if memory-mapped
+        self.hot_row_idxs = np.full(len(self._matrix), -1, dtype=np.int64)
+        self.hot_row_idxs[self._hot_rows] = np.arange(self._num_hot_rows)
+
+    @property
+    def num_hot_rows(self) -> int:
+        """
+        Gets the number of rows kept in shared memory.
+
+        Returns
+        -------
+        num_hot_rows : int
+            Number of rows kept in shared memory.
+        """
+        return self._num_hot_rows
+
+    def sync(self) -> np.ndarray:
+        """
+        Writes the rows in shared memory back to file and flushes the file.
+
+        Returns
+        -------
+        matrix : np.ndarray
+            Memory-mapped (full) embedding matrix.
+        """
+        self._matrix[self._hot_rows] = self.hot
+        self._matrix.flush()
+        return self._matrix
+
+
+def create_tiered_embedding(
+    filepath: str,
+    num_hot_rows: int,
+    shape: Tuple[int, int],
+    init_range: float,
+    weights: Optional[np.ndarray] = None,
+    word_counts: Optional[List[int]] = None,
+) -> TieredEmbedding:
+    """
+    Creates a tiered embedding matrix (see `TieredEmbedding`), saving the embedding
+    matrix to file in chunks.
+
+    Parameters
+    ----------
+    filepath : str
+        Filepath of the (Numpy) file to save the embedding matrix to. If `weights` is
+        memory-mapped from this file already, the file is used as is.
+    num_hot_rows : int
+        Number of rows to keep in shared memory, i.e. the rows of the `num_hot_rows`
+        most common words.
+    shape : tuple of int
+        Shape of the embedding matrix, i.e. [vocab_size, embedding_dim].
+    init_range : float
+        Range to initialize the embedding matrix uniformly within, i.e.
+        [-init_range, init_range], if `weights` is None.
+    weights : np.ndarray, optional
+        Weights to initialize the embedding matrix with (defaults to None).
+    word_counts : list of int, optional
+        Word count of each row, used to select the rows of the most common words
+        (defaults to None, i.e. the first rows, as the vocabulary is sorted by word
+        counts unless it has been grown).
+
+    Returns
+    -------
+    tiered_embedding : TieredEmbedding
+        Tiered embedding matrix.
+    """
+    if getattr(weights, "filename", None) != abspath(filepath):
+        matrix = np.lib.format.open_memmap(
+            filepath, mode="w+", dtype=np.float32, shape=shape
+        )
+        for start in range(0, shape[0], TIERED_EMBEDDING_CHUNK_SIZE):
+            end = min(start + TIERED_EMBEDDING_CHUNK_SIZE, shape[0])
+            if weights is None:
+                matrix[start:end] = np.random.uniform(
+                    low=-init_range, high=init_range, size=(end - start, shape[1])
+                )
+            else:
+                matrix[start:end] = weights[start:end]
+        matrix.flush()
+        del matrix
+
+    num_hot_rows = min(num_hot_rows, shape[0])
+    if word_counts is None:
+        hot_rows = np.arange(num_hot_rows)
+    else:
+        hot_rows = np.sort(
+            np.argsort(-np.asarray(word_counts), kind="stable")[:num_hot_rows]
+        )
+    return TieredEmbedding(filepath, hot_rows)
+
+
+def _embedding_tiers(
+    embedding: Union[np.ndarray, TieredEmbedding],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Gets the tiers of an embedding matrix, i.e. the rows in shared memory and the
+    memory-mapped rows.
+
+    Parameters
+    ----------
+    embedding : np.ndarray or TieredEmbedding
+        Embedding matrix in shared memory or tiered embedding matrix.
+
+    Returns
+    -------
+    result : tuple of np.ndarray
+        Rows in shared memory, memory-mapped rows and the index of the row in shared
+        memory of each row (-1 if memory-mapped).
+    """
+    if isinstance(embedding, TieredEmbedding):
+        return embedding.hot, embedding.cold, embedding.hot_row_idxs
+    return embedding, embedding[:0], np.arange(len(embedding))
+
+
+def create_negative_sampling_table(
+    word_counts: List[int],
+    unigram_exponent_negative_sampling: float,
+    table_size: int = int(1e8),
+) -> np.ndarray:
+    """
+    Creates a table for drawing negative samples from the unigram distribution
+    raised to the power of `unigram_exponent_negative_sampling`, as in word2vec.c.
+
+    Parameters
+    ----------
+    word_counts : list of int
+        Word counts sorted by the most occurring word.
+    unigram_exponent_negative_sampling : float
+        Which exponent to raise the unigram distribution to.
+    table_size : int, optional
+        Size of the table (defaults to 1e8).
+
+    Returns
+    -------
+    negative_sampling_table : np.ndarray
+        Table of word integers, where each word occurs proportionally to its
+        probability of being drawn as a negative sample.
+    """
+    word_probs = np.power(
+        np.asarray(word_counts, dtype=np.float64), unigram_exponent_negative_sampling
+    )
+    word_probs /= word_probs.sum()
+    word_table_counts = np.round(word_probs * table_size).astype(np.int64)
+    word_table_counts = np.maximum(word_table_counts, 1)
+    negative_sampling_table = np.repeat(
+        np.arange(len(word_counts), dtype=np.int32), word_table_counts
+    )
+    return negative_sampling_table
+
+
+@njit
+def _embedding_row(
+    embedding_hot: np.ndarray,
+    embedding_cold: np.ndarray,
+    hot_row_idxs: np.ndarray,
+    word_int: int,
+) -> np.ndarray:
+    """
+    Gets a row of an embedding matrix given as two tiers (see `_train_sgns_texts`).
+
+    Parameters
+    ----------
+    embedding_hot : np.ndarray
+        Rows of the embedding matrix in shared memory.
+    embedding_cold : np.ndarray
+        Memory-mapped rows of the embedding matrix.
+    hot_row_idxs : np.ndarray
+        Index into `embedding_hot` of each row, or -1 if memory-mapped.
+    word_int : int
+        Word integer (i.e. row index) to get row for.
+
+    Returns
+    -------
+    row : np.ndarray
+        Row (view) of the embedding matrix.
+    """
+    hot_row_idx = hot_row_idxs[word_int]
+    if hot_row_idx >= 0:
+        return embedding_hot[hot_row_idx]
+    return embedding_cold[word_int]
+
+
+@njit(fastmath=True)
+def _train_sgns_texts(
+    target_embedding_hot: np.ndarray,
+    target_embedding_cold: np.ndarray,
+    context_embedding_hot: np.ndarray,
+    context_embedding_cold: np.ndarray,
+    hot_row_idxs: np.ndarray,
+    corpus_tokens: np.ndarray,
+    corpus_offsets: np.ndarray,
+    text_start: int,
+    text_end: int,
+    word_keep_probs: np.ndarray,
+    negative_sampling_table: np.ndarray,
+    max_window_size: int,
+    num_negative_samples: int,
+    learning_rate: float,
+    min_learning_rate: float,
+    epoch_nr: int,
+    end_epoch_nr: int,
+    worker_idx: int,
+    worker_words: np.ndarray,
+    worker_losses: np.ndarray,
+    worker_pairs: np.ndarray,
+    seed: int,
+) -> None:
+    """
+    Trains word embeddings using skip-gram negative sampling on a range of texts,
+    updating the embedding matrices in place without any locking (Hogwild).
+
+    The embedding matrices are given as two tiers (see `TieredEmbedding`), i.e. row
+    i is row `hot_row_idxs[i]` of the first tier if `hot_row_idxs[i]` >= 0, and row
+    i of the second tier otherwise.
+
+    Parameters
+    ----------
+    target_embedding_hot : np.ndarray
+        Rows of the target embedding matrix in shared memory, of shape
+        [num_hot_rows, embedding_dim].
+    target_embedding_cold : np.ndarray
+        Memory-mapped target embedding matrix, of shape [vocab_size, embedding_dim]
+        (or empty if all rows are in shared memory).
+    context_embedding_hot : np.ndarray
+        Rows of the context embedding matrix in shared memory, of shape
+        [num_hot_rows, embedding_dim].
+    context_embedding_cold : np.ndarray
+        Memory-mapped context embedding matrix, of shape [vocab_size, embedding_dim]
+        (or empty if all rows are in shared memory).
+    hot_row_idxs : np.ndarray
+        Index of the row in the first tier of the embedding matrices of each row, or
+        -1 if the row is in the second tier.
+    corpus_tokens : np.ndarray
+        Word integers of all texts in the compiled corpus.
+    corpus_offsets : np.ndarray
+        Offsets of each text into `corpus_tokens`.
+    text_start : int
+        Index of the first text to train on.
+    text_end : int
+        Index of the last text to train on (exclusive).
+    word_keep_probs : np.ndarray
+        Probabilities of keeping a word during subsampling.
+    negative_sampling_table : np.ndarray
+        Table to draw negative samples from.
+    max_window_size : int
+        Maximum number of words to the left and right of a target word.
+    num_negative_samples : int
+        Number of negative samples per target/context pair.
+    learning_rate : float
+        Initial learning rate.
+    min_learning_rate : float
+        Minimum learning rate.
+    epoch_nr : int
+        Current epoch number.
+    end_epoch_nr : int
+        Last epoch number.
+    worker_idx : int
+        Index of the worker.
+    worker_words : np.ndarray
+        Number of words processed by each worker in the current epoch (shared).
+    worker_losses : np.ndarray
+        Sum of losses of each worker in the current epoch (shared).
+    worker_pairs : np.ndarray
+        Number of target/context pairs trained on by each worker in the
+        current epoch (shared).
+    seed : int
+        Random seed of the worker.
+    """
+    np.random.seed(seed)
+    embedding_dim = target_embedding_hot.shape[1]
+    negative_sampling_table_size = negative_sampling_table.shape[0]
+    epoch_num_words = corpus_offsets[-1] - corpus_offsets[0]
+    neu1e = np.zeros(embedding_dim, dtype=np.float32)
+
+    # Buffer for subsampled texts
+    max_text_len = 0
+    for text_idx in range(text_start, text_end):
+        text_len = corpus_offsets[text_idx + 1] - corpus_offsets[text_idx]
+        if text_len > max_text_len:
+            max_text_len = text_len
+    text = np.empty(max_text_len, dtype=np.int64)
+
+    alpha = learning_rate
+    words_since_update = PROGRESS_UPDATE_INTERVAL
+    loss_sum = 0.0
+    num_pairs = 0
+    for text_idx in range(text_start, text_end):
+
+        # Update learning rate using the global training progress
+        if words_since_update >= PROGRESS_UPDATE_INTERVAL:
+            worker_losses[worker_idx] = loss_sum
+            worker_pairs[worker_idx] = num_pairs
+            progress = (
+                epoch_nr - 1 + worker_words.sum() / max(epoch_num_words, 1)
+            ) / end_epoch_nr
+            alpha = max(
+                learning_rate * (1 - progress) + min_learning_rate * progress,
+                min_learning_rate,
+            )
+            words_since_update = 0
+
+        # Subsample words
+        text_len = 0
+        for i in range(corpus_offsets[text_idx], corpus_offsets[text_idx + 1]):
+            word = corpus_tokens[i]
+            if np.random.random() < word_keep_probs[word]:
+                text[text_len] = word
+                text_len += 1
+        text_num_words = corpus_offsets[text_idx + 1] - corpus_offsets[text_idx]
+        worker_words[worker_idx] += text_num_words
+        words_since_update += text_num_words
+
+        for target_pos in range(text_len):
+            target = text[target_pos]
+            target_row = _embedding_row(
+                target_embedding_hot, target_embedding_cold, hot_row_idxs, target
+            )
+            window_size = np.random.randint(1, max_window_size + 1)
+            for context_pos in range(
+                max(target_pos - window_size, 0),
+                min(target_pos + window_size + 1, text_len),
+            ):
+                if context_pos == target_pos:
+                    continue
+                context = text[context_pos]
+                neu1e[:] = 0.0
+                for d in range(num_negative_samples + 1):
+                    if d == 0:
+                        output_word = context
+                        label = 1.0
+                    else:
+                        output_word = negative_sampling_table[
+                            np.random.randint(0, negative_sampling_table_size)
+                        ]
+                        if output_word == context:
+                            continue
+                        label = 0.0
+                    output_row = _embedding_row(
+                        context_embedding_hot,
+                        context_embedding_cold,
+                        hot_row_idxs,
+                        output_word,
+                    )
+
+                    # Compute logit and its loss/gradient
+                    logit = 0.0
+                    for k in range(embedding_dim):
+                        logit += target_row[k] * output_row[k]
+                    signed_logit = logit if label == 1.0 else -logit
+                    loss_sum += max(-signed_logit, 0.0) + np.log1p(
+                        np.exp(-abs(signed_logit))
+                    )
+                    if logit > MAX_EXP:
+                        g = (label - 1.0) * alpha
+                    elif logit < -MAX_EXP:
+                        g = label * alpha
+                    else:
+                        g = (label - 1.0 / (1.0 + np.exp(-logit))) * alpha
+
+                    # Update context embedding and accumulate target embedding update
+                    for k in range(embedding_dim):
+                        neu1e[k] += g * output_row[k]
+                        output_row[k] += g * target_row[k]
+                for k in range(embedding_dim):
+                    target_row[k] += neu1e[k]
+                num_pairs += 1
+
+    worker_losses[worker_idx] = loss_sum
+    worker_pairs[worker_idx] = num_pairs
+
+
+def _train_sgns_texts_worker(worker_idx: int, text_start: int, text_end: int) -> None:
+    """
+    Trains a Hogwild worker on a range of texts, using the variables of `mp_var_dict`.
+
+    Parameters
+    ----------
+    worker_idx : int
+        Index of the worker.
+    text_start : int
+        Index of the first text to train on.
+    text_end : int
+        Index of the last text to train on (exclusive).
+    """
+    _train_sgns_texts(
+        target_embedding_hot=np.asarray(mp_var_dict["target_embedding_hot"]),
+        target_embedding_cold=np.asarray(mp_var_dict["target_embedding_cold"]),
+        context_embedding_hot=np.asarray(mp_var_dict["context_embedding_hot"]),
+        context_embedding_cold=np.asarray(mp_var_dict["context_embedding_cold"]),
+        hot_row_idxs=np.asarray(mp_var_dict["hot_row_idxs"]),
+        corpus_tokens=np.asarray(mp_var_dict["corpus_tokens"]),
+        corpus_offsets=np.asarray(mp_var_dict["corpus_offsets"]),
+        text_start=text_start,
+        text_end=text_end,
+        word_keep_probs=mp_var_dict["word_keep_probs"],
+        negative_sampling_table=mp_var_dict["negative_sampling_table"],
+        max_window_size=mp_var_dict["max_window_size"],
+        num_negative_samples=mp_var_dict["num_negative_samples"],
+        learning_rate=mp_var_dict["learning_rate"],
+        min_learning_rate=mp_var_dict["min_learning_rate"],
+        epoch_nr=mp_var_dict["epoch_nr"],
+        end_epoch_nr=mp_var_dict["end_epoch_nr"],
+        worker_idx=worker_idx,
+        worker_words=np.asarray(mp_var_dict["worker_words"]),
+        worker_losses=np.asarray(mp_var_dict["worker_losses"]),
+        worker_pairs=np.asarray(mp_var_dict["worker_pairs"]),
+        seed=mp_var_dict["seed"] + worker_idx,
+    )
+
+
+def train_epoch_hogwild(
+    target_embedding: Union[np.ndarray, TieredEmbedding],
+    context_embedding: Union[np.ndarray, TieredEmbedding],
+    corpus_tokens: np.ndarray,
+    corpus_offsets: np.ndarray,
+    word_keep_probs: np.ndarray,
+    negative_sampling_table: np.ndarray,
+    max_window_size: int,
+    num_negative_samples: int,
+    learning_rate: float,
+    min_learning_rate: float,
+    epoch_nr: int,
+    end_epoch_nr: int,
+    num_workers: int = -1,
+    progress_callback: Optional[Callable[[float, float, float], None]] = None,
+    progress_interval: float = 1.0,
+    seed: int = 0,
+) -> Tuple[float, int]:
+    """
+    Trains word embeddings for a single epoch using skip-gram negative sampling in
+    multiple worker processes, which update the (shared memory) embedding matrices
+    without any locking (Hogwild).
+
+    Parameters
+    ----------
+    target_embedding : np.ndarray or TieredEmbedding
+        Target embedding matrix in shared memory (e.g. created using `sharedmem.copy`),
+        of shape [vocab_size, embedding_dim], or tiered target embedding matrix (see
+        `create_tiered_embedding`).
+    context_embedding : np.ndarray or TieredEmbedding
+        Context embedding matrix in shared memory, of shape [vocab_size, embedding_dim],
+        or tiered context embedding matrix. Must be tiered like `target_embedding`.
+    corpus_tokens : np.ndarray
+        Word integers of all texts in the compiled corpus.
+    corpus_offsets : np.ndarray
+        Offsets of each text into `corpus_tokens`.
+    word_keep_probs : np.ndarray
+        Probabilities of keeping a word during subsampling.
+    negative_sampling_table : np.ndarray
+        Table to draw negative samples from (see `create_negative_sampling_table`).
+    max_window_size : int
+        Maximum number of words to the left and right of a target word.
+    num_negative_samples : int
+        Number of negative samples per target/context pair.
+    learning_rate : float
+        Initial learning rate.
+    min_learning_rate : float
+        Minimum learning rate.
+    epoch_nr : int
+        Current epoch number.
+    end_epoch_nr : int
+        Last epoch number.
+    num_workers : int, optional
+        Number of worker processes to use (defaults to -1, i.e. use all CPUs).
+    progress_callback : Callable[[float, float, float], None], optional
+        Function called periodically with the epoch progress, average loss so far and
+        current learning rate, from the main process (defaults to None).
+    progress_interval : float, optional
+        Number of seconds between each call to `progress_callback` (defaults to 1).
+    seed : int, optional
+        Random seed of the first worker (defaults to 0).
+
+    Returns
+    -------
+    avg_loss : float
+        Average loss of the epoch.
+    num_pairs : int
+        Number of target/context pairs trained on in the epoch.
+    """
+    if num_workers == -1:
+        num_workers = cpu_count()
+    num_texts = len(corpus_offsets) - 1
+    target_embedding_hot, target_embedding_cold, hot_row_idxs = _embedding_tiers(
+        target_embedding
+    )
+    context_embedding_hot, context_embedding_cold, _ = _embedding_tiers(
+        context_embedding
+    )
+    epoch_num_words = max(int(corpus_offsets[-1] - corpus_offsets[0]), 1)
+
+    # Prepare shared data for worker processes (inherited by forking)
+    worker_words = sharedmem.empty(num_workers, dtype=np.int64)
+    worker_losses = sharedmem.empty(num_workers, dtype=np.float64)
+    worker_pairs = sharedmem.empty(num_workers, dtype=np.int64)
+    worker_words[:] = 0
+    worker_losses[:] = 0
+    worker_pairs[:] = 0
+    mp_var_dict.update(
+        {
+            "target_embedding_hot": target_embedding_hot,
+            "target_embedding_cold": target_embedding_cold,
+            "context_embedding_hot": context_embedding_hot,
+            "context_embedding_cold": context_embedding_cold,
+            "hot_row_idxs": hot_row_idxs,
+            "corpus_tokens": corpus_tokens,
+            "corpus_offsets": corpus_offsets,
+            "word_keep_probs": np.asarray(word_keep_probs, dtype=np.float64),
+            "negative_sampling_table": negative_sampling_table,
+            "max_window_size": max_window_size,
+            "num_negative_samples": num_negative_samples,
+            "learning_rate": learning_rate,
+            "min_learning_rate": min_learning_rate,
+            "epoch_nr": epoch_nr,
+            "end_epoch_nr": end_epoch_nr,
+            "worker_words": worker_words,
+            "worker_losses": worker_losses,
+            "worker_pairs": worker_pairs,
+            "seed": seed,
+        }
+    )
+
+    # Compile the training kernel before forking, such that it is compiled only once
+    _train_sgns_texts_worker(worker_idx=0, text_start=0, text_end=0)
+
+    def report_progress() -> None:
+        """
+        Reports the current training progress to `progress_callback`.
+        """
+        if progress_callback is None:
+            return
+        epoch_progress = min(worker_words.sum() / epoch_num_words, 1.0)
+        progress = (epoch_nr - 1 + epoch_progress) / end_epoch_nr
+        current_learning_rate = max(
+            learning_rate * (1 - progress) + min_learning_rate * progress,
+            min_learning_rate,
+        )
+        avg_loss = worker_losses.sum() / max(
+            worker_pairs.sum() * (num_negative_samples + 1), 1
+        )
+        progress_callback(epoch_progress, avg_loss, current_learning_rate)
+
+    # Start one worker process per chunk of texts
+    mp_context = multiprocessing.get_context("fork")
+    text_chunk_bounds = np.linspace(0, num_texts, num_workers + 1).astype(int)
+    workers = [
+        mp_context.Process(
+            target=_train_sgns_texts_worker,
+            args=(
+                worker_idx,
+                text_chunk_bounds[worker_idx],
+                text_chunk_bounds[worker_idx + 1],
+            ),
+        )
+        for worker_idx in range(num_workers)
+    ]
+    for worker in workers:
+        worker.start()
+
+    # Wait for workers to finish and periodically report progress
+    while any(worker.is_alive() for worker in workers):
+        report_progress()
+        sleep(progress_interval)
+    for worker in workers:
+        worker.join()
+    if any(worker.exitcode != 0 for worker in workers):
+        raise RuntimeError("One or more Hogwild worker processes failed.")
+    report_progress()
+
+    avg_loss = worker_losses.sum() / max(
+        worker_pairs.sum() * (num_negative_samples + 1), 1
+    )
+    return avg_loss, int(worker_pairs.sum())
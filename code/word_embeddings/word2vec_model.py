@@ -1,11 +1,11 @@
-from typing import List
+from typing import List, Optional, Tuple
 
 import tensorflow as tf
 
 
 class Word2VecSGNSModel(tf.keras.Model):
     """
-    Word2Vec skip-gram negative sampling Keras model.
+    Word2Vec skip-gram (or CBOW) negative sampling Keras model.
     """
 
     def __init__(
@@ -19,6 +19,8 @@ class Word2VecSGNSModel(tf.keras.Model):
         min_learning_rate: float = 0.0001,
         name: str = "word2vec",
         target_embedding_layer_name: str = "target_embedding",
+        training_mode: str = "skip_gram",
+        num_shared_negative_samples: int = 0,
         **kwargs: dict,
     ) -> None:
         """Initializes the word2vec skip-gram negative sampling Keras model
@@ -43,6 +45,20 @@ class Word2VecSGNSModel(tf.keras.Model):
             Name of the model
         target_embedding_layer_name : str
             Name to use for the target embedding layer (defaults to "target_embedding").
+        training_mode : str
+            Training mode, either "skip_gram" (defaults) or "cbow". In CBOW mode,
+            the input contexts are of shape [batch_size, 2 * max_window_size]
+            (padded with -1) and the average of their target embeddings is used to
+            predict the input targets.
+        num_shared_negative_samples : int scalar
+            Number of negative words to sample once per batch and share among all
+            examples of the batch (defaults to 0, i.e. sample `num_negative_samples`
+            negative words for each example). If positive, the negative logits are
+            computed using a single matrix multiplication and the loss of each
+            negative word is weighted by `num_negative_samples /
+            num_shared_negative_samples`, such that the loss is an unbiased estimate
+            of the loss using `num_negative_samples` negative words per example
+            (see `mean_loss`).
         """
         super(Word2VecSGNSModel, self).__init__(name=name, **kwargs)
         self._word_counts = word_counts
@@ -54,6 +70,16 @@ class Word2VecSGNSModel(tf.keras.Model):
         self._learning_rate = learning_rate
         self._min_learning_rate = min_learning_rate
         self._target_embedding_layer_name = target_embedding_layer_name
+        self._training_mode = training_mode
+        self._num_shared_negative_samples = num_shared_negative_samples
+
+        # Weight of the loss of each negative sample
+        if self._num_shared_negative_samples > 0:
+            self._negative_samples_weight = (
+                self._num_negative_samples / self._num_shared_negative_samples
+            )
+        else:
+            self._negative_samples_weight = 1.0
 
         self.add_weight(
             self._target_embedding_layer_name,
@@ -82,40 +108,20 @@ class Word2VecSGNSModel(tf.keras.Model):
             "unigram_exponent_negative_sampling": self._unigram_exponent_negative_sampling,
             "learning_rate": self._learning_rate,
             "min_learning_rate": self._min_learning_rate,
+            "training_mode": self._training_mode,
+            "num_shared_negative_samples": self._num_shared_negative_samples,
         }
         return config
 
-    def call(self, input_targets: tf.Tensor, input_contexts: tf.Tensor) -> tf.Tensor:
+    def _sample_negative_samples(self) -> tf.Tensor:
         """
-        Runs the forward pass to compute loss. Uses negative sampling to compute loss.
-
-        Parameters
-        ----------
-        input_targets: int tensor of shape [batch_size]
-            Input targets to train on.
-        input_contexts: int tensor of shape [batch_size]
-            Input contexts to train on.
+        Samples negative samples from the (distorted) unigram distribution.
 
         Returns
         -------
-        loss: float tensor
-            Cross entropy loss, of shape [batch_size, negatives + 1].
+        negative_samples_mat: int tensor of shape [batch_size, negatives]
+            Negative samples for each target/context pair.
         """
-        target_embedding, context_embedding = self.weights
-
-        # Positive samples
-        # [batch_size, hidden_size]
-        inputs_target_embedding = tf.gather(target_embedding, input_targets)
-        # [batch_size, hidden_size]
-        inputs_context_embedding = tf.gather(context_embedding, input_contexts)
-
-        # Multiply target and context embeddings to get (unnormalized) cosine similarities
-        # [batch_size]
-        positive_logits = tf.reduce_sum(
-            tf.multiply(inputs_target_embedding, inputs_context_embedding), axis=1
-        )
-
-        # Negative samples
         negative_sampler = tf.random.fixed_unigram_candidate_sampler(
             true_classes=tf.expand_dims(
                 tf.range(self._batch_size, dtype=tf.int64), axis=0
@@ -131,19 +137,139 @@ class Word2VecSGNSModel(tf.keras.Model):
         negative_samples_mat = tf.reshape(
             negative_samples, [self._batch_size, self._num_negative_samples]
         )
-        # [batch_size, negatives, hidden_size]
-        negative_samples_embedding = tf.gather(context_embedding, negative_samples_mat)
+        return negative_samples_mat
 
-        # Multiply target embeddings with embeddings of negative samples to get
-        # (unnormalized) cosine similarities
-        # [batch_size, negatives]
-        negative_logits = tf.einsum(
-            "ijk,ikl->il",
-            tf.expand_dims(inputs_target_embedding, 1),
-            tf.transpose(negative_samples_embedding, (0, 2, 1)),
+    def _sample_shared_negative_samples(self) -> tf.Tensor:
+        """
+        Samples negative samples, shared among all examples of the batch, from the
+        (distorted) unigram distribution. The samples are drawn independently
+        (with replacement), such that they follow the distribution.
+
+        Returns
+        -------
+        shared_negative_samples: int tensor of shape [shared_negatives]
+            Negative samples for the batch.
+        """
+        negative_sampler = tf.random.fixed_unigram_candidate_sampler(
+            true_classes=tf.zeros([1, 1], dtype=tf.int64),
+            num_true=1,
+            num_sampled=self._num_shared_negative_samples,
+            unique=False,
+            range_max=len(self._word_counts),
+            distortion=self._unigram_exponent_negative_sampling,
+            unigrams=self._word_counts,
         )
+        return negative_sampler.sampled_candidates
 
-        # Use cross-entropy to compute losses for both positive and negative logits
+    def _negative_logits(
+        self, inputs_embedding: tf.Tensor
+    ) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor]:
+        """
+        Samples negative samples and computes their logits.
+
+        Parameters
+        ----------
+        inputs_embedding: float tensor of shape [batch_size, hidden_size]
+            Input embeddings of the examples, i.e. the target embeddings of the input
+            targets (or the averaged target embeddings of the input contexts in CBOW
+            mode).
+
+        Returns
+        -------
+        result : tuple of tf.Tensor
+            Negative samples of shape [batch_size, negatives] (or [shared_negatives]),
+            their context embeddings of shape [batch_size, negatives, hidden_size]
+            (or [shared_negatives, hidden_size]) and the negative logits of shape
+            [batch_size, negatives] (or [batch_size, shared_negatives]).
+        """
+        context_embedding = self.weights[1]
+
+        if self._num_shared_negative_samples > 0:
+            # [shared_negatives]
+            negative_samples = self._sample_shared_negative_samples()
+            # [shared_negatives, hidden_size]
+            negative_samples_embedding = tf.gather(context_embedding, negative_samples)
+            # [batch_size, shared_negatives]
+            negative_logits = tf.matmul(
+                inputs_embedding, negative_samples_embedding, transpose_b=True
+            )
+        else:
+            # [batch_size, negatives]
+            negative_samples = self._sample_negative_samples()
+            # [batch_size, negatives, hidden_size]
+            negative_samples_embedding = tf.gather(context_embedding, negative_samples)
+            # [batch_size, negatives]
+            negative_logits = tf.einsum(
+                "ik,ijk->ij", inputs_embedding, negative_samples_embedding
+            )
+        return negative_samples, negative_samples_embedding, negative_logits
+
+    def _negative_samples_grads(
+        self,
+        negative_logits_grad: tf.Tensor,
+        inputs_embedding: tf.Tensor,
+        negative_samples_embedding: tf.Tensor,
+    ) -> Tuple[tf.Tensor, tf.Tensor]:
+        """
+        Computes the gradients of the loss of negative samples w.r.t. the input
+        embeddings and the context embeddings of the negative samples.
+
+        Parameters
+        ----------
+        negative_logits_grad: float tensor
+            Gradients of the loss w.r.t. the negative logits (see `_negative_logits`).
+        inputs_embedding: float tensor of shape [batch_size, hidden_size]
+            Input embeddings of the examples.
+        negative_samples_embedding: float tensor
+            Context embeddings of the negative samples (see `_negative_logits`).
+
+        Returns
+        -------
+        result : tuple of tf.Tensor
+            Gradients w.r.t. the input embeddings, of shape [batch_size, hidden_size],
+            and w.r.t. the context embeddings of the (flattened) negative samples, of
+            shape [batch_size * negatives, hidden_size] (or
+            [shared_negatives, hidden_size]).
+        """
+        if self._num_shared_negative_samples > 0:
+            inputs_grad = tf.matmul(negative_logits_grad, negative_samples_embedding)
+            negative_samples_grad = tf.matmul(
+                negative_logits_grad, inputs_embedding, transpose_a=True
+            )
+        else:
+            inputs_grad = tf.einsum(
+                "ij,ijk->ik", negative_logits_grad, negative_samples_embedding
+            )
+            negative_samples_grad = tf.reshape(
+                tf.expand_dims(negative_logits_grad, 2)
+                * tf.expand_dims(inputs_embedding, 1),
+                [-1, self._embedding_dim],
+            )
+        return inputs_grad, negative_samples_grad
+
+    @staticmethod
+    def _cross_entropy_loss(
+        positive_logits: tf.Tensor,
+        negative_logits: tf.Tensor,
+        negative_samples_weight: float = 1.0,
+    ) -> tf.Tensor:
+        """
+        Computes cross-entropy losses for both positive and negative logits.
+
+        Parameters
+        ----------
+        positive_logits: float tensor of shape [batch_size]
+            Logits of target/context pairs.
+        negative_logits: float tensor of shape [batch_size, negatives]
+            Logits of target/negative sample pairs.
+        negative_samples_weight: float
+            Weight of the loss of each negative sample (defaults to 1).
+
+        Returns
+        -------
+        loss: float tensor
+            Cross entropy loss, of shape [batch_size, negatives + 1].
+        """
         # [batch_size]
         positive_cross_entropy = tf.nn.sigmoid_cross_entropy_with_logits(
             labels=tf.ones_like(positive_logits), logits=positive_logits
@@ -152,9 +278,227 @@ class Word2VecSGNSModel(tf.keras.Model):
         negative_cross_entropy = tf.nn.sigmoid_cross_entropy_with_logits(
             labels=tf.zeros_like(negative_logits), logits=negative_logits
         )
+        if negative_samples_weight != 1.0:
+            negative_cross_entropy *= negative_samples_weight
 
         # Merge losses together into a single loss
         loss = tf.concat(
             [tf.expand_dims(positive_cross_entropy, 1), negative_cross_entropy], axis=1
         )
         return loss
+
+    def mean_loss(self, loss: tf.Tensor) -> tf.Tensor:
+        """
+        Computes the mean loss of a batch, normalized by the number of positive and
+        negative samples of each example (i.e. `num_negative_samples` + 1).
+
+        With shared negative samples, the (weighted) losses of the shared negative
+        samples of each example are thus normalized as if `num_negative_samples`
+        negative words were sampled per example, such that the mean loss is
+        comparable to the mean loss without shared negative samples.
+
+        Parameters
+        ----------
+        loss: float tensor
+            Cross entropy loss, of shape [batch_size, negatives + 1] (or
+            [batch_size, shared_negatives + 1]).
+
+        Returns
+        -------
+        mean_loss: float tensor
+            Mean loss of the batch.
+        """
+        return tf.reduce_mean(tf.reduce_sum(loss, axis=1)) / (
+            self._num_negative_samples + 1
+        )
+
+    def _average_context_embedding(
+        self, input_contexts: tf.Tensor
+    ) -> Tuple[tf.Tensor, tf.Tensor, tf.Tensor]:
+        """
+        Averages the target embeddings of the context words of CBOW examples.
+
+        Parameters
+        ----------
+        input_contexts: int tensor of shape [batch_size, contexts]
+            Context words of each example, padded with -1.
+
+        Returns
+        -------
+        result : tuple of tf.Tensor
+            Averaged context embeddings of shape [batch_size, hidden_size], the
+            context words with padding replaced by 0 and the weight of each context
+            word in the average (0 for padding), of shape [batch_size, contexts].
+        """
+        target_embedding = self.weights[0]
+
+        # [batch_size, contexts]
+        context_words = tf.maximum(input_contexts, 0)
+        # [batch_size, contexts, hidden_size]
+        contexts_embedding = tf.gather(target_embedding, context_words)
+
+        # Weigh context words by 1 / (number of context words), ignoring padding
+        # [batch_size, contexts]
+        context_mask = tf.cast(
+            tf.greater_equal(input_contexts, 0), contexts_embedding.dtype
+        )
+        context_weights = context_mask / tf.maximum(
+            tf.reduce_sum(context_mask, axis=1, keepdims=True), 1
+        )
+
+        # [batch_size, hidden_size]
+        average_context_embedding = tf.einsum(
+            "ij,ijk->ik", context_weights, contexts_embedding
+        )
+        return average_context_embedding, context_words, context_weights
+
+    def call(self, input_targets: tf.Tensor, input_contexts: tf.Tensor) -> tf.Tensor:
+        """
+        Runs the forward pass to compute loss. Uses negative sampling to compute loss.
+
+        Parameters
+        ----------
+        input_targets: int tensor of shape [batch_size]
+            Input targets to train on.
+        input_contexts: int tensor of shape [batch_size]
+            Input contexts to train on (of shape [batch_size, contexts] in CBOW mode).
+
+        Returns
+        -------
+        loss: float tensor
+            Cross entropy loss, of shape [batch_size, negatives + 1] (or
+            [batch_size, shared_negatives + 1]).
+        """
+        target_embedding, context_embedding = self.weights
+
+        # Positive samples
+        if self._training_mode == "cbow":
+            # Average of the context words predicts the target word
+            # [batch_size, hidden_size]
+            inputs_embedding, _, _ = self._average_context_embedding(input_contexts)
+            output_words = input_targets
+        else:
+            # Target word predicts the context word
+            # [batch_size, hidden_size]
+            inputs_embedding = tf.gather(target_embedding, input_targets)
+            output_words = input_contexts
+        # [batch_size, hidden_size]
+        outputs_embedding = tf.gather(context_embedding, output_words)
+
+        # Multiply input and output embeddings to get (unnormalized) cosine similarities
+        # [batch_size]
+        positive_logits = tf.reduce_sum(
+            tf.multiply(inputs_embedding, outputs_embedding), axis=1
+        )
+
+        # Negative samples
+        _, _, negative_logits = self._negative_logits(inputs_embedding)
+
+        # Use cross-entropy to compute losses for both positive and negative logits
+        return self._cross_entropy_loss(
+            positive_logits, negative_logits, self._negative_samples_weight
+        )
+
+    def sparse_sgd_step(
+        self,
+        input_targets: tf.Tensor,
+        input_contexts: tf.Tensor,
+        learning_rate: tf.Tensor,
+        touched_rows: Optional[Tuple[tf.Variable, tf.Variable]] = None,
+    ) -> tf.Tensor:
+        """
+        Runs the forward pass to compute loss and performs a SGD step directly on the
+        rows of the embedding matrices which are used in the batch.
+
+        The gradients of the loss w.r.t. the gathered rows are computed in closed form
+        and subtracted from the embedding matrices using scatter operations, such that
+        no gradients of the full embedding matrices (nor an optimizer) are needed.
+
+        Parameters
+        ----------
+        input_targets: int tensor of shape [batch_size]
+            Input targets to train on.
+        input_contexts: int tensor of shape [batch_size]
+            Input contexts to train on (of shape [batch_size, contexts] in CBOW mode).
+        learning_rate: float tensor
+            Learning rate to use for the SGD step.
+        touched_rows: tuple of tf.Variable, optional
+            Boolean variables of shape [vocab_size], in which the rows of the target
+            and context embedding matrices updated by the SGD step are set to True
+            (defaults to None).
+
+        Returns
+        -------
+        loss: float tensor
+            Cross entropy loss, of shape [batch_size, negatives + 1] (or
+            [batch_size, shared_negatives + 1]).
+        """
+        target_embedding, context_embedding = self.weights
+
+        # [batch_size, hidden_size]
+        if self._training_mode == "cbow":
+            (
+                inputs_embedding,
+                context_words,
+                context_weights,
+            ) = self._average_context_embedding(input_contexts)
+            output_words = input_targets
+        else:
+            inputs_embedding = tf.gather(target_embedding, input_targets)
+            output_words = input_contexts
+        # [batch_size, hidden_size]
+        outputs_embedding = tf.gather(context_embedding, output_words)
+        (
+            negative_samples,
+            negative_samples_embedding,
+            negative_logits,
+        ) = self._negative_logits(inputs_embedding)
+
+        # [batch_size]
+        positive_logits = tf.reduce_sum(
+            tf.multiply(inputs_embedding, outputs_embedding), axis=1
+        )
+        loss = self._cross_entropy_loss(
+            positive_logits, negative_logits, self._negative_samples_weight
+        )
+
+        # Gradients of the loss w.r.t. the logits, i.e. sigmoid(logits) - labels
+        # [batch_size, 1]
+        positive_logits_grad = tf.expand_dims(tf.sigmoid(positive_logits) - 1, 1)
+        negative_logits_grad = self._negative_samples_weight * tf.sigmoid(
+            negative_logits
+        )
+
+        # Gradients of the loss w.r.t. the gathered rows
+        inputs_negatives_grad, negative_samples_grad = self._negative_samples_grads(
+            negative_logits_grad, inputs_embedding, negative_samples_embedding
+        )
+        # [batch_size, hidden_size]
+        inputs_grad = positive_logits_grad * outputs_embedding + inputs_negatives_grad
+        # [batch_size, hidden_size]
+        outputs_grad = positive_logits_grad * inputs_embedding
+        if self._training_mode == "cbow":
+            # Distribute the gradient of the average among the context words
+            # (zero for padding)
+            inputs_rows = tf.reshape(context_words, [-1, 1])
+            inputs_grad = tf.reshape(
+                tf.expand_dims(context_weights, 2) * tf.expand_dims(inputs_grad, 1),
+                [-1, self._embedding_dim],
+            )
+        else:
+            inputs_rows = tf.expand_dims(input_targets, 1)
+
+        # Apply SGD updates to the rows (updates of duplicate rows are summed)
+        outputs_rows = tf.expand_dims(
+            tf.concat([output_words, tf.reshape(negative_samples, [-1])], 0), 1
+        )
+        target_embedding.scatter_nd_sub(inputs_rows, learning_rate * inputs_grad)
+        context_embedding.scatter_nd_sub(
+            outputs_rows,
+            learning_rate * tf.concat([outputs_grad, negative_samples_grad], 0),
+        )
+        if touched_rows is not None:
+            for rows, touched in zip([inputs_rows, outputs_rows], touched_rows):
+                touched.scatter_nd_update(rows, tf.ones(tf.shape(rows)[:1], tf.bool))
+
+        return loss
@@ -0,0 +1,423 @@
+import os
+import sys
+from time import time
+from typing import List, Optional, TextIO
+
+import numpy as np
+import tensorflow as tf
+from tensorflow.keras.utils import Progbar
+
+sys.path.append("..")
+
+from word_embeddings.dataset import create_dataset  # noqa: E402
+from word_embeddings.train_utils import (  # noqa: E402
+    EpochProfiler,
+    create_model_checkpoint_filepath,
+    create_model_intermediate_embedding_weights_filepath,
+)
+from word_embeddings.word2vec import Word2vec, prepare_compiled_corpus  # noqa: E402
+
+
+def _check_sweep(word2vecs: List[Word2vec], output_dirs: List[str]) -> None:
+    """
+    Checks that word2vec instances can be fit/trained together using `fit_sweep`.
+
+    Parameters
+    ----------
+    word2vecs : list of Word2vec
+        Word2vec instances to fit/train.
+    output_dirs : list of str
+        Output directory of each word2vec instance.
+    """
+    if len(word2vecs) == 0:
+        raise ValueError("At least one word2vec instance has to be specified.")
+    if len(word2vecs) != len(output_dirs):
+        raise ValueError("Each word2vec instance needs its own output directory.")
+    if len(set(output_dirs)) != len(output_dirs):
+        raise ValueError("Output directories of the word2vec instances must differ.")
+    tokenizer = word2vecs[0].tokenizer
+    if tokenizer is None:
+        raise ValueError("Word2vec instances must have a tokenizer.")
+    for word2vec in word2vecs[1:]:
+        if (
+            word2vec.tokenizer is None
+            or not np.array_equal(word2vec.tokenizer.words, tokenizer.words)
+            or word2vec._batch_size != word2vecs[0]._batch_size
+            or word2vec._max_window_size != word2vecs[0]._max_window_size
+            or word2vec._training_mode != word2vecs[0]._training_mode
+        ):
+            raise ValueError(
+                "Word2vec instances must share tokenizer, batch size, "
+                "maximum window size and training mode."
+            )
+
+
+def _save_sweep_embedding_weights(
+    word2vecs: List[Word2vec],
+    output_dirs: List[str],
+    dataset_name: str,
+    epoch_nr: int,
+    intermediate_embedding_nr: int,
+) -> None:
+    """
+    Saves the (intermediate) embedding weights of every word2vec instance to file.
+
+    Parameters
+    ----------
+    word2vecs : list of Word2vec
+        Word2vec instances being fit/trained.
+    output_dirs : list of str
+        Output directory of each word2vec instance.
+    dataset_name : str
+        Name of the dataset we are fitting/training on.
+    epoch_nr : int
+        Current epoch number.
+    intermediate_embedding_nr : int
+        Number of the intermediate save in the epoch.
+    """
+    for word2vec, output_dir in zip(word2vecs, output_dirs):
+        word2vec.save_embedding_weights(
+            create_model_intermediate_embedding_weights_filepath(
+                output_dir,
+                word2vec._model_name,
+                dataset_name,
+                epoch_nr,
+                intermediate_embedding_nr,
+            )
+        )
+
+
+def _save_sweep_intermediate_embedding_weights(
+    word2vecs: List[Word2vec],
+    output_dirs: List[str],
+    dataset_name: str,
+    epoch_nr: int,
+    epoch_progress: float,
+    intermediate_embedding_progress: int,
+    intermediate_embedding_weights_saves: int,
+) -> int:
+    """
+    Performs the intermediate saves of embedding weights of every word2vec instance
+    whose saving thresholds the epoch progress has reached (except for the last one,
+    which is saved at the end of the epoch).
+
+    Parameters
+    ----------
+    word2vecs : list of Word2vec
+        Word2vec instances being fit/trained.
+    output_dirs : list of str
+        Output directory of each word2vec instance.
+    dataset_name : str
+        Name of the dataset we are fitting/training on.
+    epoch_nr : int
+        Current epoch number.
+    epoch_progress : float
+        Current epoch progress.
+    intermediate_embedding_progress : int
+        Number of intermediate saves performed so far in the epoch.
+    intermediate_embedding_weights_saves : int
+        Number of intermediate saves of embedding weights per epoch.
+
+    Returns
+    -------
+    intermediate_embedding_progress : int
+        Number of intermediate saves performed so far in the epoch,
+        including the current ones.
+    """
+    while (
+        intermediate_embedding_weights_saves > 0
+        and epoch_progress * intermediate_embedding_weights_saves
+        - intermediate_embedding_progress
+        >= 1
+        and intermediate_embedding_progress < intermediate_embedding_weights_saves - 1
+    ):
+        intermediate_embedding_progress += 1
+        _save_sweep_embedding_weights(
+            word2vecs,
+            output_dirs,
+            dataset_name,
+            epoch_nr,
+            intermediate_embedding_progress,
+        )
+    return intermediate_embedding_progress
+
+
+def _save_sweep_epoch(
+    word2vecs: List[Word2vec],
+    output_dirs: List[str],
+    dataset_name: str,
+    epoch_nr: int,
+) -> None:
+    """
+    Saves the model checkpoint of every word2vec instance at the end of an epoch.
+
+    Parameters
+    ----------
+    word2vecs : list of Word2vec
+        Word2vec instances being fit/trained.
+    output_dirs : list of str
+        Output directory of each word2vec instance.
+    dataset_name : str
+        Name of the dataset we are fitting/training on.
+    epoch_nr : int
+        Current epoch number.
+    """
+    for word2vec, output_dir in zip(word2vecs, output_dirs):
+        word2vec.save_model(
+            create_model_checkpoint_filepath(
+                output_dir,
+                word2vec._model_name,
+                dataset_name,
+                epoch_nr,
+            )
+        )
+
+
+def fit_sweep(
+    word2vecs: List[Word2vec],
+    output_dirs: List[str],
+    text_data_filepaths: List[str],
+    num_texts: int,
+    dataset_name: str,
+    n_epochs: int,
+    starting_epoch_nr: int = 1,
+    intermediate_embedding_weights_saves: int = 0,
+    train_logs_to_file: bool = True,
+    compiled_corpus_dir: str = "",
+    sparse_updates: bool = False,
+    verbose: int = 1,
+) -> None:
+    """
+    Fits/trains several word2vec models (e.g. a sweep over hyperparameters) at the
+    same time, feeding the same stream of skip-gram target/context pairs to every
+    model in each training step. The corpus is thus only read and tokenized once per
+    epoch, regardless of the number of models.
+
+    The models must share the tokenizer (vocabulary), batch size, maximum window
+    size and training mode, as these determine the stream of target/context pairs,
+    while e.g. the embedding dimension, number of negative samples and learning
+    rates may differ.
+
+    Parameters
+    ----------
+    word2vecs : list of Word2vec
+        Word2vec instances to fit/train.
+    output_dirs : list of str
+        Output directory of each word2vec instance, to save metadata files,
+        checkpoints and intermediate model weights to.
+    text_data_filepaths : list
+        Paths of text data to generate skip-gram target/context pairs from.
+    num_texts : int
+        Number of texts (or sentences) of the contents of `text_data_filepaths`.
+    dataset_name : str
+        Name of the dataset we are fitting/training on.
+    n_epochs : int
+        Number of epochs to fit/train.
+    starting_epoch_nr : int, optional
+        Denotes the starting epoch number (defaults to 1).
+    intermediate_embedding_weights_saves : int, optional
+        Number of intermediate saves of embedding weights per epoch during training
+        (defaults to 0).
+    train_logs_to_file : bool, optional
+        Whether or not to save logs from training to file.
+    compiled_corpus_dir : str, optional
+        Directory of a compiled (pre-tokenized) corpus of `text_data_filepaths`
+        to read the texts from during training (defaults to ""). If the compiled
+        corpus does not exist yet, it is compiled before training.
+    sparse_updates : bool, optional
+        Whether or not to update the embedding matrices of the models in-place
+        (defaults to False).
+    verbose : int, optional
+        Verbosity mode, 0 (silent), 1 (verbose), 2 (semi-verbose).
+        Defaults to 1 (verbose).
+    """
+    _check_sweep(word2vecs, output_dirs)
+    tokenizer = word2vecs[0].tokenizer
+    batch_size = word2vecs[0]._batch_size
+    max_window_size = word2vecs[0]._max_window_size
+
+    # Build models and set up optimizers
+    for word2vec in word2vecs:
+        word2vec.get_model()
+    optimizers = [word2vec._create_optimizer() for word2vec in word2vecs]
+
+    @tf.function(input_signature=word2vecs[0]._train_step_signature)
+    def perform_train_step(
+        input_targets: tf.Tensor,
+        input_contexts: tf.Tensor,
+        progress: tf.Tensor,
+    ):
+        """
+        Performs a single training step of every model on the same batch of
+        target/context pairs.
+
+        Parameters
+        ----------
+        input_targets : tf.Tensor
+            Input targets to train on
+        input_contexts : tf.Tensor
+            Input contexts to train on
+        progress : tf.Tensor
+            Current training progress
+
+        Returns
+        -------
+        losses : list of tf.Tensor
+            Mean loss of each model.
+        """
+        losses = []
+        for word2vec, optimizer in zip(word2vecs, optimizers):
+            loss, _ = word2vec._train_step(
+                input_targets, input_contexts, progress, optimizer, sparse_updates
+            )
+            losses.append(tf.cast(word2vec._model.mean_loss(loss), tf.float32))
+        return losses
+
+    # Save metadata files and initialize train logs files
+    train_logs_files: List[Optional[TextIO]] = []
+    for word2vec, output_dir in zip(word2vecs, output_dirs):
+        os.makedirs(output_dir, exist_ok=True)
+        word2vec._save_training_metadata(output_dir, dataset_name, n_epochs, verbose)
+        train_logs_files.append(
+            word2vec._open_train_logs_file(output_dir, dataset_name, starting_epoch_nr)
+            if train_logs_to_file
+            else None
+        )
+    end_epoch_nr = n_epochs + starting_epoch_nr - 1
+
+    # Initialize profiling of the training stages
+    profiler = EpochProfiler()
+
+    # Compile corpus once, such that texts are only read and tokenized once
+    if compiled_corpus_dir != "":
+        prepare_compiled_corpus(
+            compiled_corpus_dir, text_data_filepaths, num_texts, tokenizer, verbose
+        )
+
+    if verbose == 1:
+        print("---")
+        print(
+            f"Fitting {len(word2vecs)} word2vec models on {dataset_name} with "
+            f"batch_size={batch_size}, max_window_size={max_window_size} "
+            f"and n_epochs={n_epochs}"
+        )
+        print("---")
+    for epoch_nr in range(starting_epoch_nr, end_epoch_nr + 1):
+        if verbose >= 1:
+            print(f"Epoch {epoch_nr}/{end_epoch_nr}")
+
+        # Initialize progressbar
+        progressbar = Progbar(num_texts, verbose=verbose)
+        progressbar.update(0)
+
+        # Measure time spent per epoch
+        time_epoch_start = time()
+        profiler.reset()
+
+        # Initialize new (shared) dataset per epoch
+        train_dataset = create_dataset(
+            text_data_filepaths,
+            num_texts,
+            tokenizer,
+            max_window_size,
+            batch_size,
+            compiled_corpus_dir,
+            training_mode=word2vecs[0]._training_mode,
+        )
+
+        # Iterate over batches of data and train every model on them
+        loss_sums = [0.0] * len(word2vecs)
+        steps = 0
+        pairs = 0
+        intermediate_embedding_progress = 0
+        train_iterator = iter(train_dataset)
+        while True:
+            with profiler.measure("input_wait"):
+                batch = next(train_iterator, None)
+            if batch is None:
+                break
+            input_targets, input_contexts, epoch_progress = batch
+
+            # Compute overall progress (over all epochs)
+            overall_progress = tf.reshape(
+                (epoch_nr - 1 + epoch_progress) / end_epoch_nr, shape=(1,)
+            )
+
+            # Train on batch (and wait for the training steps to finish)
+            with profiler.measure("train_step"):
+                losses = [
+                    float(loss)
+                    for loss in perform_train_step(
+                        input_targets, input_contexts, overall_progress
+                    )
+                ]
+            loss_sums = [loss_sum + loss for loss_sum, loss in zip(loss_sums, losses)]
+            steps += 1
+            pairs += int(tf.shape(input_targets)[0])
+
+            # Perform intermediate saves of embedding weights to file (except for
+            # the last one, which is saved at the end of the epoch)
+            epoch_progress_np = float(epoch_progress)
+            with profiler.measure("save"):
+                intermediate_embedding_progress = (
+                    _save_sweep_intermediate_embedding_weights(
+                        word2vecs,
+                        output_dirs,
+                        dataset_name,
+                        epoch_nr,
+                        epoch_progress_np,
+                        intermediate_embedding_progress,
+                        intermediate_embedding_weights_saves,
+                    )
+                )
+
+            # Update progressbar
+            with profiler.measure("sync"):
+                progressbar.update(
+                    int(epoch_progress_np * num_texts),
+                    values=[(f"loss_{i}", loss) for i, loss in enumerate(losses)],
+                )
+        print()
+
+        # Compute time spent on epoch
+        time_spent_epoch = time() - time_epoch_start
+        if verbose == 1:
+            print(f"Spent {time_spent_epoch:.2f} seconds!")
+
+        with profiler.measure("save"):
+
+            # Save last intermediate save of embedding weights to file
+            if intermediate_embedding_weights_saves > 0:
+                _save_sweep_embedding_weights(
+                    word2vecs,
+                    output_dirs,
+                    dataset_name,
+                    epoch_nr,
+                    intermediate_embedding_weights_saves,
+                )
+
+            # Save intermediate models to file
+            if verbose == 1:
+                print("Saving models to file...")
+            _save_sweep_epoch(word2vecs, output_dirs, dataset_name, epoch_nr)
+            if verbose == 1:
+                print("Done!")
+
+        # Write to train logs (the profiling statistics are shared by all models)
+        epoch_stats = profiler.stats(time_spent_epoch, steps, pairs)
+        for word2vec, train_logs_file, loss_sum in zip(
+            word2vecs, train_logs_files, loss_sums
+        ):
+            word2vec._write_epoch_logs(
+                train_logs_file,
+                None,
+                epoch_nr,
+                loss_sum / max(steps, 1),
+                time_spent_epoch,
+                epoch_stats,
+            )
+
+    # Close train logs file handlers
+    for train_logs_file in train_logs_files:
+        if train_logs_file is not None:
+            train_logs_file.close()